@@ -1,5 +1,12 @@
 import streamlit as st
 import process
+import edl
+import downloader
+import upload_store
+import file_server
+import reporter
+import workspace
+from streamlit_reporter import StreamlitReporter
 import os
 import subprocess
 import requests
@@ -7,20 +14,27 @@ import tempfile
 from urllib.parse import urlparse
 import yt_dlp
 import re
-import shutil # <--- TAMBAHKAN IMPORT INI
 
-# Daftar folder yang akan dibersihkan
-if 'initialized' not in st.session_state:
-    # Daftar folder yang akan dibersihkan
-    FOLDERS_TO_CLEAR = ["output", "uploads", "previews"]
+# Pesan dan progres dari process ditampilkan lewat Streamlit (lihat reporter)
+reporter.set_reporter(StreamlitReporter())
 
-    for folder in FOLDERS_TO_CLEAR:
-        if os.path.exists(folder):
-            shutil.rmtree(folder)
-        os.makedirs(folder, exist_ok=True)
-    
-    # Tandai bahwa sesi ini sudah diinisialisasi agar kode ini tidak berjalan lagi
-    st.session_state['initialized'] = True
+if 'session_id' not in st.session_state:
+    # Workspace sesi (lihat workspace): ID disimpan di URL agar hasil tetap ada setelah refresh.
+    # Folder lain tidak dihapus lagi, ruang disk dijaga kuota bersama dengan eviction LRU.
+    session_id = st.query_params.get('ws', '')
+    if not workspace.is_valid_session_id(session_id):
+        session_id = workspace.new_session_id()
+        st.query_params['ws'] = session_id
+    st.session_state['session_id'] = session_id
+    os.makedirs(workspace.session_output_dir(session_id), exist_ok=True)
+    workspace.touch(workspace.session_dir(session_id))
+    # Input/output job yang masih dirender (semua sesi) tidak ikut dibuang
+    workspace.enforce_quota(keep=process.active_paths())
+
+SESSION_ID = st.session_state['session_id']
+SESSION_OUTPUT_DIR = workspace.session_output_dir(SESSION_ID)
+OUTPUT_ROOT = f"ws-{SESSION_ID}"
+PREVIEW_ROOT = f"previews-{SESSION_ID}"
 
 st.title("🎬 AI Short Generator")
 
@@ -29,6 +43,9 @@ if 'video_path' not in st.session_state:
     st.session_state['video_path'] = None
 if 'video_url' not in st.session_state:
     st.session_state['video_url'] = None
+if 'video_page_url' not in st.session_state:
+    # URL halaman (YouTube/sosmed) asal direct URL, untuk download bagian scene dengan yt-dlp
+    st.session_state['video_page_url'] = None
 if 'cuts' not in st.session_state:
     st.session_state['cuts'] = [{'start': '00:00:00:000', 'end': '00:00:00:000'}]
 if 'video_b_path' not in st.session_state:
@@ -39,6 +56,40 @@ if 'cuts_b' not in st.session_state:
     st.session_state['cuts_b'] = [{'start': '00:00:00:000', 'end': '00:00:00:000'}]
 if 'merge_mode' not in st.session_state:
     st.session_state['merge_mode'] = 'Manual'
+if 'uploads' not in st.session_state:
+    # file_id upload Streamlit -> (path di upload_store, sudah_ada)
+    st.session_state['uploads'] = {}
+if 'job_ids' not in st.session_state:
+    # ID job disimpan juga di URL agar tetap bisa dipantau setelah browser di-refresh
+    st.session_state['job_ids'] = [j for j in st.query_params.get('jobs', '').split(',') if j]
+
+def session_files():
+    """File/folder yang sedang dipakai sesi ini: video, proxy-nya, cache HTTP URL dan preview."""
+    files = [st.session_state.get('preview_path')]
+    if st.session_state['video_path']:
+        files += [st.session_state['video_path'], process.proxy.get_proxy(st.session_state['video_path'])]
+    if st.session_state['video_url']:
+        files.append(process.http_cache.cache_dir_for(st.session_state['video_url']))
+    return [f for f in files if f]
+
+# Dicatat di workspace (bukan lewat mtime) agar sesi lain tidak membuangnya saat menjaga kuota
+workspace.mark_used(session_files())
+
+def file_server_base():
+    """
+    URL dasar server file hasil/preview (lihat file_server). None jika link-nya tidak bisa
+    dibuka browser (server hanya di loopback tanpa SHORTGEN_FILE_BASE_URL) atau server gagal
+    dijalankan; video dan download lalu lewat st.video/st.download_button.
+    """
+    file_server.register_root(OUTPUT_ROOT, SESSION_OUTPUT_DIR)
+    # Folder preview dipakai bersama semua sesi: setiap sesi hanya bisa membuka preview miliknya
+    file_server.register_root(PREVIEW_ROOT, process.preview_cache.PREVIEW_DIR, restricted=True)
+    if not file_server.links_reachable() or not file_server.start():
+        return None
+    host = st.context.headers.get("Host") if hasattr(st, "context") else None
+    return file_server.base_url(host)
+
+FILE_BASE_URL = file_server_base()
 
 def is_youtube_url(url):
     """Check if URL is from YouTube"""
@@ -65,26 +116,15 @@ def is_social_media_url(url):
 
 def get_video_url_with_yt_dlp(url):
     """
-    Mendapatkan direct video URL menggunakan yt-dlp tanpa download
+    Mendapatkan direct video URL menggunakan yt-dlp tanpa download.
+    Hasil ekstraksi di-cache sampai direct URL kedaluwarsa (lihat url_resolver).
     """
     try:
-        ydl_opts = {
-            'format': 'best[ext=mp4][height<=1080]/best[height<=1080]/best',
-            'noplaylist': True,
-            'quiet': True,
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            video_url = info.get('url')
-            title = info.get('title', 'video')
-            duration = info.get('duration', 0)
-            
-            if video_url:
-                return video_url, title, duration, None
-            else:
-                return None, None, None, "Tidak bisa mendapatkan direct video URL"
-                
+        record = process.url_resolver.resolve(url)
+        return record['url'], record['title'], record['duration'], None
+
+    except ValueError as e:
+        return None, None, None, str(e)
     except yt_dlp.utils.DownloadError as e:
         error_msg = str(e)
         if "Video unavailable" in error_msg:
@@ -182,6 +222,52 @@ def download_video_with_yt_dlp(url):
         st.error(f"Error download: {str(e)}")
         return None, str(e)
 
+def store_upload(uploaded_file):
+    """
+    Menyimpan file upload ke store berbasis konten (lihat upload_store).
+    Hanya dilakukan sekali per file upload, bukan di setiap rerun Streamlit.
+    Mengembalikan (path, sudah_ada).
+    """
+    upload_key = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    stored = st.session_state['uploads'].get(upload_key)
+    if stored and os.path.exists(stored[0]):
+        return stored
+
+    uploaded_file.seek(0)
+    stored = upload_store.store(uploaded_file, uploaded_file.name)
+    st.session_state['uploads'][upload_key] = stored
+    return stored
+
+def download_video_from_url(url, filename=None):
+    """
+    Download video dari URL langsung (non sosial media) ke folder uploads.
+    File diambil paralel per range dan bisa dilanjutkan jika terputus (lihat downloader).
+    """
+    _, supports_ranges = validate_direct_url(url)
+
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+
+    def on_progress(downloaded, total):
+        downloaded_mb = downloaded / (1024*1024)
+        if total:
+            progress_bar.progress(min(downloaded / total, 1.0))
+            status_text.text(f"Downloading: {downloaded_mb:.1f} MB / {total / (1024*1024):.1f} MB")
+        else:
+            status_text.text(f"Downloading: {downloaded_mb:.1f} MB")
+
+    try:
+        file_path = downloader.download(
+            url, "uploads", filename=filename, supports_ranges=supports_ranges, on_progress=on_progress
+        )
+        return file_path, None
+    except (requests.RequestException, RuntimeError, OSError) as e:
+        st.error(f"Error download: {str(e)}")
+        return None, str(e)
+    finally:
+        progress_bar.empty()
+        status_text.empty()
+
 # Pilihan metode input
 input_method = st.radio(
     "Pilih metode input video:",
@@ -189,17 +275,24 @@ input_method = st.radio(
     horizontal=True
 )
 
+build_proxy = st.checkbox(
+    "⚡ Buat proxy 360p di background",
+    help="Setelah video di-upload/divalidasi, dibuat salinan 360p lokal untuk preview instan. Render final tetap memakai video asli."
+)
+
 if input_method == "📁 Upload File":
     uploaded_file = st.file_uploader("Upload file video (mp4/mkv/webm):", type=['mp4', 'mkv', 'webm'])
 
     if uploaded_file is not None:
-        os.makedirs("uploads", exist_ok=True)
-        file_path = os.path.join("uploads", uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        file_path, already_stored = store_upload(uploaded_file)
         st.session_state['video_path'] = file_path
         st.session_state['video_url'] = None  # Reset URL
-        st.success(f"✅ File berhasil di-upload: {uploaded_file.name}")
+        if already_stored:
+            st.success(f"✅ File sudah pernah di-upload, memakai salinan yang ada: {uploaded_file.name}")
+        else:
+            st.success(f"✅ File berhasil di-upload: {uploaded_file.name}")
+        if build_proxy:
+            process.start_proxy(file_path)
 
 elif input_method == "🌐 URL Video (Direct Clip)":
     # Mode baru: Direct clip dari URL tanpa download
@@ -220,8 +313,12 @@ elif input_method == "🌐 URL Video (Direct Clip)":
                         direct_url, title, duration, error = get_video_url_with_yt_dlp(video_url)
                         if direct_url:
                             st.session_state['video_url'] = direct_url
+                            st.session_state['video_page_url'] = video_url
                             st.session_state['video_path'] = None  # Reset file path
                             st.success(f"✅ URL siap untuk direct clipping!")
+                            process.prefetch_url(direct_url)
+                            if build_proxy:
+                                process.start_proxy(direct_url, is_url=True)
                             st.info(f"📹 **Judul:** {title}")
                             if duration:
                                 hours = duration // 3600
@@ -235,8 +332,12 @@ elif input_method == "🌐 URL Video (Direct Clip)":
                         is_valid, supports_ranges = validate_direct_url(video_url)
                         if is_valid:
                             st.session_state['video_url'] = video_url
+                            st.session_state['video_page_url'] = None
                             st.session_state['video_path'] = None  # Reset file path
                             st.success("✅ URL valid dan siap untuk direct clipping!")
+                            process.prefetch_url(video_url)
+                            if build_proxy:
+                                process.start_proxy(video_url, is_url=True)
                             if supports_ranges:
                                 st.info("🚀 Server mendukung range requests - clipping akan optimal!")
                             else:
@@ -293,23 +394,19 @@ elif input_method == "🌐 Download dari URL":
             else:
                 st.error(f"❌ Gagal download video: {error}")
 
-# Function download_video_from_url tetap sama seperti kode asli
-def download_video_from_url(url, filename=None):
-    """Download video dari URL - function asli dipertahankan"""
-    # ... (kode asli download_video_from_url)
-    pass
-
 # Preview section
 if st.session_state.get('preview_path'):
     st.subheader("👀 Preview")
-    try:
-        video_file = open(st.session_state['preview_path'], 'rb')
-        video_bytes = video_file.read()
-        st.video(video_bytes)
-        video_file.close()
-    except FileNotFoundError:
+    preview_path = st.session_state['preview_path']
+    if not os.path.exists(preview_path):
         st.error("File preview tidak ditemukan. Silakan coba buat preview lagi.")
         st.session_state['preview_path'] = None
+    elif FILE_BASE_URL:
+        # Browser memutar preview langsung dari server file (Range), tanpa lewat memori Streamlit
+        file_server.allow_file(PREVIEW_ROOT, os.path.basename(preview_path))
+        st.video(file_server.file_url(FILE_BASE_URL, PREVIEW_ROOT, os.path.basename(preview_path)))
+    else:
+        st.video(preview_path)
 
 # Main processing section
 if st.session_state.get('video_path') or st.session_state.get('video_url'):
@@ -321,13 +418,93 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
     else:
         st.info("📁 **Mode File** - Menggunakan file yang sudah diupload")
 
+    proxy_status = process.proxy.proxy_status(video_source)
+    if proxy_status == "running":
+        st.caption("⏳ Proxy 360p sedang dibuat, preview masih memakai video asli")
+    elif proxy_status == "ready":
+        st.caption("⚡ Proxy 360p siap, preview diambil dari proxy lokal")
+    elif proxy_status == "failed":
+        st.caption("⚠️ Gagal membuat proxy 360p, preview memakai video asli")
+
     st.subheader("🎯 Tentukan Potongan Video")
 
+    kf_index = process.get_keyframe_index(video_source, is_url_mode)
+    if kf_index is None:
+        if st.button("📇 Buat Index Keyframe", help="Membaca posisi keyframe sekali lalu disimpan. Dipakai untuk smart cut dan snap potongan."):
+            with st.spinner("Membangun index keyframe..."):
+                try:
+                    kf_index = process.get_keyframe_index(video_source, is_url_mode, build=True)
+                    st.success(f"✅ Index keyframe siap: {len(kf_index)} keyframe")
+                except RuntimeError as e:
+                    st.error(f"❌ {e}")
+    else:
+        st.caption(f"📇 Index keyframe tersedia: {len(kf_index)} keyframe")
+
+    with st.expander("🎞️ Filmstrip Video"):
+        strip_interval = st.number_input("Satu frame setiap (detik):", min_value=1, value=10, key="filmstrip_interval")
+        if st.button("Tampilkan Filmstrip"):
+            with st.spinner("Membuat filmstrip..."):
+                try:
+                    strip = process.source_filmstrip(video_source, is_url_mode, interval=strip_interval)
+                    per_sheet = strip['columns'] * strip['rows']
+                    for n, sheet in enumerate(strip['sheets']):
+                        first = n * per_sheet * strip['interval']
+                        st.image(sheet, caption=f"Mulai {process.seconds_to_cut_timestamp(first)} (kiri-atas), {strip['interval']} detik per frame")
+                except RuntimeError as e:
+                    st.error(f"❌ {e}")
+
+    with st.expander("📋 Import Daftar Scene"):
+        st.caption("Satu scene per baris (start end [label]), CSV, subtitle SRT/VTT, atau EDL CMX3600.")
+        pasted_cuts = st.text_area("Paste daftar scene:", key="cuts_paste", height=150)
+        cuts_file = st.file_uploader("...atau upload file", type=["txt", "csv", "srt", "vtt", "edl"], key="cuts_file")
+        col_import1, col_import2 = st.columns(2)
+        merge_overlaps = col_import1.checkbox("Gabungkan scene yang tumpang tindih", value=False)
+        edl_fps = col_import2.number_input("FPS timecode (EDL)", min_value=1.0, value=30.0)
+        if st.button("📥 Import Scene"):
+            try:
+                if cuts_file is not None:
+                    imported = edl.load(cuts_file.getvalue().decode("utf-8-sig"), filename=cuts_file.name, fps=edl_fps)
+                else:
+                    imported = edl.load(pasted_cuts, fps=edl_fps)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                problems = imported.validate()
+                overlaps = imported.overlaps()
+                if problems:
+                    st.error("❌ " + "\n".join(message for _, message in problems[:20]))
+                elif not len(imported):
+                    st.warning("Tidak ada scene yang ditemukan.")
+                elif overlaps and not merge_overlaps and not st.session_state.get('confirm_overlaps'):
+                    # Ditampilkan dulu; klik Import sekali lagi untuk tetap memakai scene apa adanya
+                    st.session_state['confirm_overlaps'] = True
+                    st.warning(f"⚠️ {len(overlaps)} pasang scene tumpang tindih, contoh: scene {overlaps[0][0]+1} & {overlaps[0][1]+1}. "
+                               "Klik Import lagi untuk tetap memakai, atau centang 'Gabungkan'.")
+                else:
+                    if merge_overlaps and overlaps:
+                        imported = imported.merged()
+                    # Nilai text_input lama disimpan per key, harus dibuang agar scene baru tampil
+                    for key in [k for k in st.session_state if k.startswith(("start_", "end_")) and k.split("_", 1)[1].isdigit()]:
+                        del st.session_state[key]
+                    st.session_state['cuts'] = imported.to_cut_list()
+                    st.session_state['confirm_overlaps'] = False
+                    st.rerun()
+
     for i, cut in enumerate(st.session_state['cuts']):
         st.write(f"🎞️ Scene {i+1}")
-        col1, col2, col3, col4 = st.columns([3, 3, 1, 2])
+        col1, col2, col3, col4, col5 = st.columns([3, 3, 1, 2, 2])
         cut['start'] = col1.text_input(f"Start (HH:MM:SS:ms) Scene {i+1}", value=cut['start'], key=f"start_{i}")
         cut['end'] = col2.text_input(f"End (HH:MM:SS:ms) Scene {i+1}", value=cut['end'], key=f"end_{i}")
+        if kf_index is not None:
+            try:
+                start_s = process.timestamp_to_seconds(process.parse_timestamp(cut['start']))
+                end_s = process.timestamp_to_seconds(process.parse_timestamp(cut['end']))
+                st.caption(
+                    f"Keyframe terdekat: start ≈ {process.seconds_to_cut_timestamp(kf_index.nearest(start_s) or 0)}"
+                    f" | end ≈ {process.seconds_to_cut_timestamp(kf_index.nearest(end_s) or 0)}"
+                )
+            except ValueError:
+                pass
         
         if col3.button("🗑️", key=f"delete_{i}"):
             st.session_state['cuts'].pop(i)
@@ -349,6 +526,21 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
                         st.session_state['preview_path'] = None
                 st.rerun()
 
+        with col5:
+            st.write("")
+            st.write("")
+            if st.button("🖼️ Frame", key=f"frames_{i}", help="Tampilkan frame awal & akhir scene tanpa render preview"):
+                st.session_state[f"show_frames_{i}"] = not st.session_state.get(f"show_frames_{i}", False)
+
+        if st.session_state.get(f"show_frames_{i}"):
+            try:
+                start_frame, end_frame = process.scene_boundary_frames(video_source, cut, is_url_mode)
+                frame_col1, frame_col2 = st.columns(2)
+                frame_col1.image(start_frame, caption=f"Awal {cut['start']}")
+                frame_col2.image(end_frame, caption=f"Akhir {cut['end']}")
+            except (ValueError, RuntimeError) as e:
+                st.warning(f"⚠️ Tidak bisa mengambil frame scene {i+1}: {e}")
+
     if st.button("➕ Tambah Scene"):
         st.session_state['cuts'].append({'start': '00:00:00:000', 'end': '00:00:00:000'})
 
@@ -358,15 +550,83 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
             "Potrait (Landscape Blur, Hitam, Putih)",
             "Potrait (9:16 TikTok Mode)",
             "Potrait Left-Right to Up-Bottom",
-            # "Potrait Streamer (Berat)",
+            "Potrait Streamer (Berat)",
             "Potrait Merge 2 Video",
-            "Generate Video Overlay"
+            "Generate Video Overlay",
+            process.SMART_CUT_MODE
         ]
     )
 
+    if crop_mode == process.SMART_CUT_MODE:
+        st.info("✂️ **Smart Cut** - Tanpa crop. Hanya bagian awal/akhir scene yang di-encode ulang, sisanya di-copy langsung.")
+
     bg_mode = None
     if crop_mode == "Potrait (Landscape Blur, Hitam, Putih)":
-        bg_mode = st.selectbox("Pilih Background:", [ "Hitam", "Putih"]) #"Blur (Berat)" bisa ditambahkan,
+        bg_mode = st.selectbox("Pilih Background:", ["Blur", "Hitam", "Putih"])
+
+    facecam = None
+    facecam_invalid = False
+    if crop_mode == process.filtergraph.STREAMER_MODE:
+        st.write("🎥 **Area Facecam** (piksel, relatif ke frame 1920x1080)")
+        default_x, default_y, default_w, default_h = process.filtergraph.DEFAULT_FACECAM
+        fc1, fc2, fc3, fc4 = st.columns(4)
+        facecam = (
+            fc1.number_input("X", min_value=0, max_value=1904, value=default_x, key="facecam_x"),
+            fc2.number_input("Y", min_value=0, max_value=1064, value=default_y, key="facecam_y"),
+            fc3.number_input("Lebar", min_value=16, max_value=1920, value=default_w, key="facecam_w"),
+            fc4.number_input("Tinggi", min_value=16, max_value=1080, value=default_h, key="facecam_h"),
+        )
+        st.caption("Gameplay (atas) diambil dari 1920x900 bagian atas frame, facecam (bawah) dari area di atas.")
+        try:
+            process.filtergraph.validate_facecam(facecam)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            facecam_invalid = True
+
+    st.caption(f"🖥️ Encoder video: {process.encoders.best_profile()['label']}")
+
+    snap_keyframes = False
+    if kf_index is not None:
+        snap_keyframes = st.checkbox(
+            "🧲 Snap potongan ke keyframe",
+            help="Start/End setiap scene digeser ke keyframe terdekat agar pemotongan lebih cepat."
+        )
+
+    section_download = False
+    if is_url_mode and st.session_state.get('video_page_url') and crop_mode not in ("Potrait Merge 2 Video", "Generate Video Overlay"):
+        section_download = st.checkbox(
+            "📥 Download bagian scene saja (yt-dlp)",
+            help="Hanya rentang scene (+ beberapa detik padding) yang di-download, lalu dirender dari klip lokal. Cocok untuk beberapa scene dari video/stream yang panjang."
+        )
+
+    batch_mode = False
+    if not section_download and crop_mode not in ("Potrait Merge 2 Video", "Generate Video Overlay", process.SMART_CUT_MODE):
+        batch_mode = st.checkbox(
+            "⚡ Mode batch (decode sekali)",
+            help="Semua scene dirender oleh satu proses ffmpeg, source hanya dibuka dan di-decode sekali. Cocok untuk banyak scene dari URL."
+        )
+
+    background_render = False
+    if not batch_mode:
+        background_render = st.checkbox(
+            "📨 Render di background (antrean)",
+            value=True,
+            help="Render dikirim ke antrean bersama dan tetap berjalan walau halaman di-refresh. Scene yang selesai langsung muncul di daftar job."
+        )
+
+    # Antrean bersama (background / render farm) memakai jumlah worker-nya sendiri,
+    # jadi input ini hanya ditampilkan untuk render langsung
+    max_workers = process.DEFAULT_MAX_WORKERS
+    if background_render or process.FARM_DB:
+        st.caption("⚙️ Jumlah render paralel diatur oleh worker antrean bersama")
+    else:
+        max_workers = st.number_input(
+            "⚙️ Maksimal render paralel",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=min(process.DEFAULT_MAX_WORKERS, os.cpu_count() or 1),
+            help="Jumlah scene yang dirender bersamaan. Turunkan jika server sedang dipakai proses lain."
+        )
 
     # Handle merge mode for URL
     if crop_mode == "Potrait Merge 2 Video":
@@ -390,9 +650,7 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
         if input_method_b == "📁 Upload File":
             uploaded_file_b = st.file_uploader("Upload file video kedua (bawah):", type=['mp4', 'mkv', 'webm'])
             if uploaded_file_b is not None:
-                file_b_path = os.path.join("uploads", uploaded_file_b.name)
-                with open(file_b_path, "wb") as f:
-                    f.write(uploaded_file_b.getbuffer())
+                file_b_path, _ = store_upload(uploaded_file_b)
                 st.session_state['video_b_path'] = file_b_path
                 st.session_state['video_b_url'] = None
                 st.success(f"✅ File video kedua berhasil di-upload: {uploaded_file_b.name}")
@@ -411,6 +669,7 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
                         if direct_url_b:
                             st.session_state['video_b_url'] = direct_url_b
                             st.session_state['video_b_path'] = None
+                            process.prefetch_url(direct_url_b)
                             st.success(f"✅ URL video kedua siap!")
                             st.info(f"📹 **Judul Video B:** {title_b}")
                             if duration_b:
@@ -425,6 +684,7 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
                         if is_valid:
                             st.session_state['video_b_url'] = video_url_b
                             st.session_state['video_b_path'] = None
+                            process.prefetch_url(video_url_b)
                             st.success("✅ URL video kedua valid!")
                         else:
                             st.error("❌ URL tidak valid")
@@ -469,7 +729,16 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        if st.button("🚀 Potong Video"):
+        if st.button("🚀 Potong Video", disabled=facecam_invalid):
+            render_cuts = st.session_state['cuts']
+            if snap_keyframes:
+                try:
+                    render_cuts = process.snap_cuts_to_keyframes(render_cuts, kf_index)
+                except ValueError as e:
+                    st.error(f"❌ Error parsing timestamp: {e}")
+            render_result = None
+            # Setiap render mendapat folder sendiri agar tidak menimpa hasil sebelumnya
+            job_output_dir = workspace.job_output_dir(SESSION_ID)
             with st.spinner("Memproses potongan video..."):
                 if crop_mode == "Potrait Merge 2 Video":
                     video_a_source = st.session_state.get('video_path') or st.session_state.get('video_url')
@@ -477,48 +746,92 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
                     
                     if st.session_state['merge_mode'] == "Otomatis":
                         # Mode otomatis
-                        process.manual_cut_merge_auto(
+                        render_result = process.manual_cut_merge_auto(
                             video_a_source,
-                            st.session_state['cuts'],
+                            render_cuts,
                             video_b_source,
                             is_url_a=st.session_state.get('video_url') is not None,
                             is_url_b=st.session_state.get('video_b_url') is not None,
                             video_b_start=video_b_start,
-                            video_b_end=video_b_end if video_b_end else None
+                            video_b_end=video_b_end if video_b_end else None,
+                            max_workers=max_workers,
+                            background=background_render,
+                            output_dir=job_output_dir
                         )
                     else:
                         # Mode manual
-                        process.manual_cut_merge_direct(
+                        render_result = process.manual_cut_merge_direct(
                             video_a_source,
-                            st.session_state['cuts'],
+                            render_cuts,
                             video_b_source,
                             st.session_state['cuts_b'],
                             is_url_a=st.session_state.get('video_url') is not None,
-                            is_url_b=st.session_state.get('video_b_url') is not None
+                            is_url_b=st.session_state.get('video_b_url') is not None,
+                            max_workers=max_workers,
+                            background=background_render,
+                            output_dir=job_output_dir
                         )
                 
                 elif crop_mode == "Generate Video Overlay":
                     background_path = "background_1080x1920.png"
                     if is_url_mode:
-                        process.overlay_to_laptop_direct(background_path, video_source, st.session_state['cuts'])
+                        render_result = process.overlay_to_laptop_direct(background_path, video_source, render_cuts, max_workers=max_workers, background=background_render, output_dir=job_output_dir)
                     else:
-                        process.overlay_to_laptop(background_path, video_source, st.session_state['cuts'])
+                        render_result = process.overlay_to_laptop(background_path, video_source, render_cuts, max_workers=max_workers, background=background_render, output_dir=job_output_dir)
+
+                elif section_download:
+                    manifest = process.download_sections(st.session_state['video_page_url'], render_cuts)
+                    if manifest:
+                        render_result = process.manual_cut_sections(
+                            manifest,
+                            render_cuts,
+                            crop_mode,
+                            bg_mode=bg_mode,
+                            max_workers=max_workers,
+                            background=background_render,
+                            facecam=facecam,
+                            output_dir=job_output_dir
+                        )
+
+                elif batch_mode:
+                    render_result = process.manual_cut_batch(
+                        video_source,
+                        render_cuts,
+                        crop_mode,
+                        bg_mode=bg_mode,
+                        is_url=is_url_mode,
+                        facecam=facecam,
+                        output_dir=job_output_dir
+                    )
 
                 else:
                     if is_url_mode:
-                        process.manual_cut_direct(
+                        render_result = process.manual_cut_direct(
                             video_source,
-                            st.session_state['cuts'],
+                            render_cuts,
                             crop_mode,
-                            bg_mode=bg_mode
+                            bg_mode=bg_mode,
+                            max_workers=max_workers,
+                            background=background_render,
+                            facecam=facecam,
+                            output_dir=job_output_dir
                         )
                     else:
-                        process.manual_cut(
+                        render_result = process.manual_cut(
                             video_source,
-                            st.session_state['cuts'],
+                            render_cuts,
                             crop_mode,
-                            bg_mode=bg_mode
+                            bg_mode=bg_mode,
+                            max_workers=max_workers,
+                            background=background_render,
+                            facecam=facecam,
+                            output_dir=job_output_dir
                         )
+
+            # Mode background mengembalikan ID job, simpan agar bisa dipantau
+            if isinstance(render_result, str):
+                st.session_state['job_ids'].append(render_result)
+                st.query_params['jobs'] = ",".join(st.session_state['job_ids'])
     
     # with col2:
     #     if st.button("📂 Buka Folder Output"):
@@ -530,23 +843,64 @@ if st.session_state.get('video_path') or st.session_state.get('video_url'):
     #         folder_path = os.path.abspath("uploads")
     #         subprocess.Popen(f'explorer "{folder_path}"')
 
-output_dir = "output"
+def render_job_panel():
+    """Menampilkan status job render milik sesi ini, scene yang selesai langsung tampil."""
+    for job_id in st.session_state['job_ids']:
+        job = process.RENDER_QUEUE.status(job_id)
+        if job is None:
+            continue
+        done = len(job['results'])
+        snapshots = dict(job['progress'])
+        for result in job['results']:
+            snapshots[result['scene']] = process.ffmpeg_progress.make_snapshot({'progress': 'end'})
+        overall = process.ffmpeg_progress.aggregate(snapshots, job['durations'])
+        eta = f" • ETA {overall['eta']:.0f}s" if job['finished'] is None and overall['eta'] is not None else ""
+        st.write(f"📨 **{job['label']}** (job `{job_id}`): {done}/{job['total']} scene selesai{eta}")
+        st.progress(min(1.0, overall['percent']) if job['total'] else 1.0)
+        if job.get('workers') == 0 and job['finished'] is None:
+            st.caption("⚠️ Belum ada worker render farm aktif; job digagalkan jika tetap tidak ada worker")
+        for scene, snapshot in sorted(job['progress'].items()):
+            if not any(r['scene'] == scene for r in job['results']):
+                st.caption(f"⏳ Scene {scene}: {process.ffmpeg_progress.format_snapshot(snapshot)}")
+        for result in job['results']:
+            if result['ok']:
+                st.caption(f"✅ Scene {result['scene']}: {os.path.basename(result['output'])}")
+            else:
+                with st.expander(f"❌ Scene {result['scene']} gagal"):
+                    st.code(result['log'])
+
+if st.session_state['job_ids']:
+    st.subheader("🗂️ Job Render")
+    if hasattr(st, "fragment"):
+        # Status job di-refresh otomatis tanpa menjalankan ulang seluruh script
+        st.fragment(run_every=2)(render_job_panel)()
+    else:
+        render_job_panel()
+        st.button("🔄 Refresh Status Job")
+
+output_files = file_server.list_files(OUTPUT_ROOT)
 
-# Tampilkan seluruh bagian ini HANYA JIKA folder 'output' ada dan berisi file
-if os.path.exists(output_dir) and len(os.listdir(output_dir)) > 0:
+# Tampilkan seluruh bagian ini HANYA JIKA workspace sesi ini sudah berisi file hasil
+if output_files:
     
     st.subheader("📁 File Hasil") # Judul sekarang hanya muncul jika ada file
-    
+
+    if FILE_BASE_URL:
+        # ZIP dibuat on-the-fly oleh server file, tanpa file sementara
+        st.link_button("📦 Download Semua (ZIP)", file_server.zip_url(FILE_BASE_URL, OUTPUT_ROOT, "hasil_short.zip"))
+
     # Urutkan file agar tampil rapi
-    for filename in sorted(os.listdir(output_dir)):
-        file_path = os.path.join(output_dir, filename)
-        if os.path.isfile(file_path):
-            st.write(f"✅ **{filename}**")
-            with open(file_path, "rb") as f:
+    for filename in output_files:
+        st.write(f"✅ **{filename}**")
+        if FILE_BASE_URL:
+            st.link_button("⬇️ Download Video Ini", file_server.file_url(FILE_BASE_URL, OUTPUT_ROOT, filename, download=True))
+        elif st.button("⬇️ Siapkan Download", key=f"prepare_download_{filename}"):
+            # Tanpa server file: file hanya dibaca saat benar-benar diminta
+            with open(os.path.join(SESSION_OUTPUT_DIR, filename), "rb") as f:
                 st.download_button(
                     label="⬇️ Download Video Ini",
                     data=f,
-                    file_name=filename,
+                    file_name=os.path.basename(filename),
                     mime="video/mp4"
                 )
-            st.divider()
\ No newline at end of file
+        st.divider()
@@ -0,0 +1,108 @@
+"""
+Benchmark filtergraph crop_mode tanpa encode (output ke null muxer).
+
+Contoh:
+    python fix_data/benchmark.py --seconds 20
+    python fix_data/benchmark.py --encode      # ikut mengukur encode libx264
+    python fix_data/benchmark.py --only Streamer
+
+Input dibuat dengan lavfi testsrc2 1920x1080 30fps sehingga hasilnya bisa
+dibandingkan antar mesin tanpa file video.
+
+Skrip ini hanya alat ukur. Belum ada hasilnya yang dicatat (ffmpeg tidak
+tersedia saat graph baru ditulis), jadi graph baru, termasuk layout Streamer,
+tidak diklaim lebih cepat dari graph lama.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import process  # noqa: E402
+
+LANDSCAPE = "Potrait (Landscape Blur, Hitam, Putih)"
+
+# Graph lama (string literal sebelum builder filtergraph.py), sebagai pembanding
+LEGACY_GRAPHS = {
+    "Blur (boxblur 1080x1920)": (
+        "[0:v]split=2[bg_in][fg_in];"
+        "[bg_in]scale=1080:1920:force_original_aspect_ratio=increase,"
+        "crop=1080:1920,boxblur=30:30[bg];"
+        "[fg_in]scale=1080:800[fg];"
+        "[bg][fg]overlay=(W-w)/2:(H-h)/2[out]"
+    ),
+    "TikTok": "[0:v]crop=in_h*9/16:in_h:(in_w-in_h*9/16)/2:0,scale=1080:1920[out]",
+    "Streamer": (
+        "[0:v]scale=1920:1080,split=2[scaled_a][scaled_b];"
+        "[scaled_a]crop=1920:900:0:0[gameplay];"
+        "[scaled_b]crop=150:250:20:ih-250[facecam];"
+        "[gameplay]scale=1080:1000[gameplay_scaled];"
+        "[facecam]scale=1080:920[facecam_scaled];"
+        "[gameplay_scaled][facecam_scaled]vstack=inputs=2[out]"
+    ),
+    "Left-Right": (
+        "[0:v]split=2[left_in][right_in];"
+        "[left_in]crop=iw/2:ih:0:0[left];"
+        "[right_in]crop=iw/2:ih:iw/2:0[right];"
+        "[left][right]vstack,scale=1080:1920[out]"
+    ),
+    # shortest=1 agar source color tidak membuat benchmark berjalan 999 detik
+    "Hitam": (
+        "color=c=black:s=1080x1920:d=999[bg];"
+        "[0:v]scale=1080:800[fg];"
+        "[bg][fg]overlay=(W-w)/2:(H-h)/2:shortest=1[out]"
+    ),
+}
+
+CASES = [
+    ("TikTok (lama)", lambda: LEGACY_GRAPHS["TikTok"]),
+    ("TikTok", lambda: process.scene_filter_graph("Potrait (9:16 TikTok Mode)")),
+    ("Streamer (lama)", lambda: LEGACY_GRAPHS["Streamer"]),
+    ("Streamer", lambda: process.scene_filter_graph("Potrait Streamer (Berat)")),
+    ("Left-Right (lama)", lambda: LEGACY_GRAPHS["Left-Right"]),
+    ("Left-Right", lambda: process.scene_filter_graph("Potrait Left-Right to Up-Bottom")),
+    ("Blur (lama)", lambda: LEGACY_GRAPHS["Blur (boxblur 1080x1920)"]),
+    ("Blur", lambda: process.scene_filter_graph(LANDSCAPE, "Blur")),
+    ("Hitam (lama)", lambda: LEGACY_GRAPHS["Hitam"]),
+    ("Hitam", lambda: process.scene_filter_graph(LANDSCAPE, "Hitam")),
+    ("Putih", lambda: process.scene_filter_graph(LANDSCAPE, "Putih")),
+]
+
+
+def run_case(graph, seconds, encode):
+    cmd = [
+        "ffmpeg", "-hide_banner", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=s=1920x1080:r=30:d={seconds}",
+        "-filter_complex", graph, "-map", "[out]",
+    ]
+    if encode:
+        cmd += ["-c:v", "libx264", "-preset", "veryfast", "-b:v", "4M"]
+    cmd += ["-f", "null", "-"]
+    started = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10, help="durasi input uji (detik)")
+    parser.add_argument("--encode", action="store_true", help="ikut encode libx264 veryfast")
+    parser.add_argument("--only", help="hanya jalankan case yang namanya mengandung teks ini")
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<28}{'waktu (s)':>10}{'x realtime':>12}")
+    for name, graph in CASES:
+        if args.only and args.only.lower() not in name.lower():
+            continue
+        elapsed = run_case(graph(), args.seconds, args.encode)
+        print(f"{name:<28}{elapsed:>10.2f}{args.seconds / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
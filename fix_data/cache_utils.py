@@ -0,0 +1,70 @@
+"""Utilitas bersama untuk cache di disk (lokasi folder dan identitas source)."""
+import hashlib
+import os
+import shutil
+import uuid
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+# Semua cache (index keyframe, preview, dll.) disimpan di bawah folder ini.
+CACHE_DIR = os.environ.get("SHORTGEN_CACHE_DIR", "cache")
+
+# Parameter query yang berubah setiap kali URL googlevideo/YouTube ditandatangani
+# ulang, tidak ikut menentukan identitas video. Hanya dibuang untuk VOLATILE_QUERY_HOSTS:
+# di host lain nama seperti "n" atau "c" bisa saja bagian dari identitas file.
+VOLATILE_QUERY_HOSTS = ("googlevideo.com", "youtube.com", "youtu.be")
+VOLATILE_QUERY_PARAMS = {
+    "expire", "signature", "sig", "lsig", "lsparams", "sparams", "ip", "ipbits",
+    "ei", "initcwndbps", "mh", "mm", "mn", "ms", "mv", "mvi", "pl", "pcm2", "rqh",
+    "requiressl", "susc", "vprv", "xpc", "n", "spc", "txp", "bui", "c", "ctier",
+}
+
+def is_url_source(source):
+    """True jika source adalah URL http(s), bukan path lokal."""
+    return source.startswith(("http://", "https://"))
+
+def has_volatile_query(url):
+    """True jika URL berasal dari host yang query-nya ditandatangani ulang (googlevideo/YouTube)."""
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == h or host.endswith("." + h) for h in VOLATILE_QUERY_HOSTS)
+
+def canonical_url(url):
+    """
+    URL tanpa fragment. Untuk host googlevideo/YouTube, parameter query yang volatile
+    dibuang dan sisanya diurutkan; host lain query-nya dipertahankan apa adanya.
+    """
+    parsed = urlparse(url)
+    if not has_volatile_query(url):
+        return parsed._replace(fragment="").geturl()
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in VOLATILE_QUERY_PARAMS
+    )
+    return parsed._replace(query=urlencode(query), fragment="").geturl()
+
+def source_fingerprint(source):
+    """
+    Identitas stabil sebuah source untuk kunci cache.
+    File lokal: path absolut + ukuran + mtime. URL: URL kanonik tanpa tanda tangan.
+    """
+    if is_url_source(source):
+        identity = "url:" + canonical_url(source)
+    else:
+        stat = os.stat(source)
+        identity = f"file:{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+def atomic_write_text(path, text):
+    """Menulis file teks secara atomik (tulis ke file sementara lalu rename)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def remove_paths(paths):
+    """Menghapus file/folder sementara, mengabaikan yang sudah tidak ada."""
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,136 @@
+"""
+Pemeriksaan http_cache terhadap server asli tiruan (http.server di 127.0.0.1).
+
+Contoh:
+    python fix_data/check_http_cache.py
+
+Yang dicek: isi yang dibaca lewat local_url sama dengan server asli, request
+berikutnya dilayani dari disk, range dibuang jika ETag berubah, evict/discard hanya
+menghapus entry yang tidak sedang dibaca, dan file data yang dihapus dari luar
+diambil ulang dari server asli. Cache ditulis ke folder sementara.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_cache  # noqa: E402
+
+
+class _Origin:
+    """Isi file di server asli tiruan; diganti untuk mensimulasikan file yang berubah."""
+
+    def __init__(self, data):
+        self.requests = 0
+        self.set(data)
+
+    def set(self, data):
+        self.data = data
+        self.etag = '"' + hashlib.sha1(data).hexdigest()[:12] + '"'
+
+
+def _origin_handler(origin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            origin.requests += 1
+            data = origin.data
+            start, end = http_cache.parse_range_header(self.headers.get("Range"), len(data)) or (0, len(data))
+            self.send_response(206 if self.headers.get("Range") else 200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(end - start))
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(data)}")
+            self.send_header("ETag", origin.etag)
+            self.end_headers()
+            self.wfile.write(data[start:end])
+
+    return Handler
+
+
+def _get(url, range_header=None):
+    response = requests.get(url, headers={"Range": range_header} if range_header else {}, timeout=10)
+    response.raise_for_status()
+    return response.content
+
+
+def _wait_idle(entry, timeout=5.0):
+    """Menunggu handler cache selesai (klien bisa menerima byte terakhir sebelum handler keluar)."""
+    deadline = time.monotonic() + timeout
+    while entry.readers and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def main():
+    http_cache.HTTP_CACHE_DIR = tempfile.mkdtemp(prefix="check_http_cache_")
+    origin = _Origin(os.urandom(3 * 1024 * 1024 + 123))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _origin_handler(origin))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/video.mp4?token=abc"
+
+    local = http_cache.local_url(url)
+    assert _get(local) == origin.data, "isi dari cache berbeda dengan server asli"
+    assert _get(local, "bytes=100-199") == origin.data[100:200], "range dari cache salah"
+    before = origin.requests
+    assert _get(local, "bytes=1000-") == origin.data[1000:]
+    assert origin.requests == before, "byte yang sudah ada tetap diminta ke server asli"
+    print("OK  baca penuh/range, request ulang dilayani dari disk")
+
+    # File di server asli berubah (ukuran sama, ETag lain); proses baru mengecek ulang
+    entry = http_cache.entry_for(local)
+    origin.set(os.urandom(len(origin.data)))
+    entry.validated = False
+    assert _get(local, "bytes=0-99") == origin.data[:100], "range lama dipakai walau ETag berubah"
+    assert entry.cached_bytes() == 100, "range lama tidak dibuang"
+    print("OK  ETag berubah -> range lama dibuang")
+
+    # Entry yang sedang dibaca tidak boleh di-evict; setelah idle, dihapus dari disk dan _entries
+    _wait_idle(entry)
+    with entry.reading():
+        http_cache.evict(max_bytes=0)
+        assert os.path.isdir(entry.dir) and http_cache.entry_for(local) is entry, "entry yang dibaca ikut di-evict"
+    entry.last_read -= http_cache.READ_GRACE_SECONDS
+    http_cache.evict(max_bytes=0)
+    assert not os.path.exists(entry.dir), "entry idle tidak di-evict"
+    assert http_cache.entry_for(local) is None, "entry yang di-evict masih ada di _entries"
+    print("OK  evict melewati entry yang dibaca, entry idle dibuang dari _entries")
+
+    # Setelah evict, local_url baru tetap bisa dibaca (didaftarkan ulang)
+    assert _get(http_cache.local_url(url), "bytes=0-9") == origin.data[:10]
+    print("OK  URL didaftarkan ulang setelah evict")
+
+    # File data dihapus dari luar (mis. rmtree lama): range dianggap belum di-cache
+    local = http_cache.local_url(url)
+    entry = http_cache.entry_for(local)
+    _wait_idle(entry)
+    os.remove(entry.data_path)
+    before = origin.requests
+    assert _get(local, "bytes=0-9") == origin.data[:10], "file data yang hilang tidak diambil ulang"
+    assert origin.requests > before and entry.cached_bytes() == 10, "range lama tetap dipercaya"
+    assert _get(local) == origin.data
+    print("OK  file data hilang -> diambil ulang dari server asli")
+
+    # discard (kuota workspace): entry yang dibaca dilewati, entry idle dibuang dari disk dan _entries
+    _wait_idle(entry)
+    with entry.reading():
+        assert not http_cache.discard(entry.key) and os.path.isdir(entry.dir), "entry yang dibaca ikut dihapus"
+    entry.last_read -= http_cache.READ_GRACE_SECONDS
+    assert http_cache.discard(entry.key) and not os.path.exists(entry.dir)
+    assert http_cache.entry_for(local) is None, "entry yang dihapus masih ada di _entries"
+    assert _get(http_cache.local_url(url), "bytes=0-9") == origin.data[:10]
+    print("OK  discard melewati entry yang dibaca, entry idle dibuang dari _entries")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
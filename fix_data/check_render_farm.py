@@ -0,0 +1,247 @@
+"""
+Pemeriksaan FarmQueue dengan runner tiruan (tanpa ffmpeg), di database SQLite sementara.
+
+Contoh:
+    python fix_data/check_render_farm.py
+
+Yang dicek: klaim scene berurutan, lease yang habis dikembalikan ke antrean dan
+diambil worker lain (hasil worker lama diabaikan), scene gagal setelah MAX_ATTEMPTS,
+hasil status terurut per nomor scene, dan setiap percobaan _render_job memakai
+folder kerja sendiri. Dengan proses worker sungguhan (multiprocessing, spawn):
+worker yang di-kill di tengah lease scene-nya diambil alih worker lain, dan tidak
+ada scene yang diklaim dua proses sekaligus (BEGIN IMMEDIATE antarproses). Job
+tanpa worker aktif digagalkan setelah NO_WORKER_TIMEOUT.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import job_queue  # noqa: E402
+import render_farm  # noqa: E402
+
+LEASE = 0.2
+# Lease untuk proses worker sungguhan (lebih longgar: start proses spawn butuh waktu)
+PROCESS_LEASE = 1.0
+
+
+def _scene_job(work_dir, scene):
+    output = os.path.join(work_dir, f"scene_{scene:03d}.mp4")
+    return {'scene': scene, 'cmd': ["ffmpeg", "-i", "input.mp4", output], 'output': output, 'duration': 1.0}
+
+
+def _fake_runner(job, on_progress=None):
+    """Runner tiruan: 'merender' dengan menulis file output."""
+    if on_progress:
+        on_progress({'percent': 100.0})
+    with open(job['output'], "wb") as f:
+        f.write(b"video")
+    return {'scene': job['scene'], 'output': job['output'], 'ok': True, 'log': ""}
+
+
+def check_lease_and_reap(queue, work_dir):
+    job_id = queue.submit([_scene_job(work_dir, scene) for scene in (1, 2, 10)], label="cek")
+    assert queue.status(job_id)['status'] == 'queued'
+
+    # Worker A mengklaim scene pertama lalu "mati" (tidak ada heartbeat)
+    task_id, job = queue.claim("node-a/0", lease=LEASE)
+    assert job['scene'] == 1, "klaim tidak berurutan"
+    assert os.path.isabs(job['output']) and job['cmd'][2] == os.path.abspath("input.mp4"), "job tidak portable"
+    time.sleep(LEASE + 0.1)
+
+    # Worker B mengklaim: lease A sudah habis, scene 1 dikembalikan ke antrean dan diambil B
+    task_b, job_b = queue.claim("node-b/0", lease=30)
+    assert task_b == task_id and job_b['scene'] == 1, "lease habis tidak dikembalikan ke antrean"
+    assert not queue.heartbeat(task_id, "node-a/0"), "heartbeat worker lama masih diterima"
+    stale = {'scene': 1, 'output': job['output'], 'ok': False, 'log': "hasil worker lama"}
+    assert not queue.complete(task_id, "node-a/0", stale), "hasil worker lama tidak diabaikan"
+    assert queue.heartbeat(task_b, "node-b/0")
+    assert queue.complete(task_b, "node-b/0", _fake_runner(job_b))
+    print("OK  lease habis -> scene diambil alih, hasil worker lama diabaikan")
+
+    # Sisa scene dikerjakan worker biasa sampai antrean kosong
+    render_farm.run_worker(queue, worker_id="node-c", runner=_fake_runner, concurrency=2, poll_interval=0.05, once=True)
+    status = queue.status(job_id)
+    assert status['finished'] is not None and status['status'] == 'done', status
+    assert [r['scene'] for r in status['results']] == [1, 2, 10], "hasil tidak terurut per nomor scene"
+    assert all(os.path.exists(r['output']) for r in status['results'])
+    print("OK  run_worker menyelesaikan antrean, hasil terurut 1, 2, 10")
+
+
+def _worker_process(db_path, worker_id, render_seconds, claims_log):
+    """Proses worker: runner tiruan mencatat setiap klaim ke claims_log lalu 'merender' render_seconds detik."""
+    queue = render_farm.FarmQueue(db_path)
+
+    def runner(job, on_progress=None):
+        with open(claims_log, "a", encoding="utf-8") as f:
+            f.write(f"{job['scene']} {worker_id}\n")
+        time.sleep(render_seconds)
+        result = _fake_runner(job, on_progress)
+        result['log'] = worker_id
+        return result
+
+    render_farm.run_worker(queue, worker_id=worker_id, runner=runner, concurrency=2,
+                           poll_interval=0.05, lease=PROCESS_LEASE)
+
+
+def _read_claims(claims_log):
+    if not os.path.exists(claims_log):
+        return []
+    with open(claims_log, encoding="utf-8") as f:
+        return [line.split() for line in f if line.strip()]
+
+
+def _wait_until(condition, timeout, message):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, message
+        time.sleep(0.05)
+
+
+def check_worker_processes(work_dir):
+    """Worker di proses terpisah: satu di-kill di tengah lease, scene-nya diambil alih proses lain."""
+    db_path = os.path.join(work_dir, "farm-proc.db")
+    claims_log = os.path.join(work_dir, "claims.log")
+    queue = render_farm.FarmQueue(db_path)
+    scenes = list(range(1, 9))
+    job_id = queue.submit([_scene_job(work_dir, scene) for scene in scenes], label="proses")
+
+    ctx = multiprocessing.get_context("spawn")
+    # Worker A "hang" di dua scene pertama lalu di-kill (SIGKILL, tanpa sempat membersihkan apa pun)
+    hung = ctx.Process(target=_worker_process, args=(db_path, "node-a", 60, claims_log))
+    hung.start()
+    _wait_until(lambda: len(_read_claims(claims_log)) == 2, 30, "worker A tidak mengklaim scene")
+    assert "node-a" in queue.active_workers(), "heartbeat worker A tidak tercatat"
+    hung.kill()
+    hung.join()
+    taken = {int(scene) for scene, _ in _read_claims(claims_log)}
+
+    # Dua worker lain berebut antrean yang sama (klaim bersamaan antarproses)
+    workers = [ctx.Process(target=_worker_process, args=(db_path, name, 0.05, claims_log))
+               for name in ("node-b", "node-c")]
+    for worker in workers:
+        worker.start()
+    try:
+        _wait_until(lambda: queue.status(job_id)['finished'] is not None, 60, "job tidak selesai setelah worker A mati")
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+    status = queue.status(job_id)
+    assert status['status'] == 'done' and [r['scene'] for r in status['results']] == scenes, status
+    for result in status['results']:
+        assert result['log'] != "node-a", f"scene {result['scene']} tercatat dari worker yang sudah mati"
+    claims = _read_claims(claims_log)
+    for scene in scenes:
+        owners = [worker for s, worker in claims if int(s) == scene]
+        expected = 2 if scene in taken else 1
+        assert len(owners) == expected, f"scene {scene} diklaim {owners}"
+    print(f"OK  worker proses di-kill di tengah lease: scene {sorted(taken)} diambil alih, "
+          f"tidak ada klaim ganda dari {len(workers)} proses")
+
+
+def check_no_workers(work_dir):
+    """Tanpa worker aktif, status() menggagalkan job setelah NO_WORKER_TIMEOUT (pemanggil tidak menunggu selamanya)."""
+    import process
+    import reporter
+
+    queue = render_farm.FarmQueue(os.path.join(work_dir, "farm-idle.db"))
+    timeout = render_farm.NO_WORKER_TIMEOUT
+    original = process.RENDER_QUEUE
+    render_farm.NO_WORKER_TIMEOUT = 0.3
+    process.RENDER_QUEUE = queue
+    try:
+        job_id = queue.submit([_scene_job(work_dir, 30)], label="idle")
+        status = queue.status(job_id)
+        assert status['status'] == 'queued' and status['workers'] == 0, status
+        with reporter.using(reporter.Reporter()):
+            results = process.follow_queue_job(job_id, poll_interval=0.05)
+    finally:
+        render_farm.NO_WORKER_TIMEOUT = timeout
+        process.RENDER_QUEUE = original
+    assert len(results) == 1 and not results[0]['ok'], results
+    assert queue.status(job_id)['status'] == 'failed'
+    print(f"OK  tanpa worker aktif -> job gagal: {results[0]['log']}")
+
+
+def check_max_attempts(queue, work_dir):
+    job_id = queue.submit([_scene_job(work_dir, 20)], label="hang")
+    for attempt in range(render_farm.MAX_ATTEMPTS):
+        claimed = queue.claim(f"node-hang/{attempt}", lease=LEASE)
+        assert claimed is not None, f"scene tidak diantrekan ulang setelah percobaan {attempt}"
+        time.sleep(LEASE + 0.1)
+    assert queue.claim("node-last/0") is None, "scene masih diantrekan setelah MAX_ATTEMPTS"
+    status = queue.status(job_id)
+    assert status['status'] == 'failed' and not status['results'][0]['ok'], status
+    print(f"OK  scene gagal setelah {render_farm.MAX_ATTEMPTS}x lease habis: {status['results'][0]['log']}")
+
+
+def check_scratch_per_attempt(work_dir):
+    """Dua percobaan job smart cut yang sama (mis. setelah lease diambil alih) memakai folder kerja berbeda."""
+    import process
+
+    scratch = job_queue.SCRATCH_TOKEN
+    part = os.path.join(scratch, "middle.ts")
+    list_file = os.path.join(scratch, "parts.txt")
+    output = os.path.join(work_dir, "smart.mp4")
+    job = {
+        'scene': 1, 'output': output, 'software': True,
+        'pre_cmds': [["ffmpeg", "-i", "input.mp4", "-c:v", "copy", part]],
+        'cmd': ["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_file, "-c:v", "copy", output],
+        'concat_lists': {list_file: [part]},
+    }
+    seen = []
+    both_running = threading.Barrier(2)
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+
+    def fake_run_ffmpeg(cmd, duration=None, on_progress=None, software=False):
+        assert software, "smart cut tidak dipaksa libx264"
+        assert scratch not in " ".join(cmd), "placeholder folder kerja tidak diganti"
+        if cmd[-1] != output:
+            seen.append(os.path.dirname(cmd[-1]))
+            # Kedua percobaan berjalan bersamaan, seperti worker lama yang belum mati
+            both_running.wait(timeout=5)
+            with open(cmd[-1], "wb") as f:
+                f.write(b"ts")
+        else:
+            with open(cmd[cmd.index("-i") + 1], encoding="utf-8") as f:
+                assert f.read().startswith(f"file '{os.path.dirname(cmd[cmd.index('-i') + 1])}"), "list concat salah"
+            with open(output, "wb") as f:
+                f.write(b"video")
+        return _Result()
+
+    original = process.run_ffmpeg
+    process.run_ffmpeg = fake_run_ffmpeg
+    try:
+        threads = [threading.Thread(target=process._render_job, args=(dict(job),)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        process.run_ffmpeg = original
+    assert len(seen) == 2 and seen[0] != seen[1], "percobaan berbagi folder kerja"
+    assert not any(os.path.exists(d) for d in seen), "folder kerja tidak dihapus"
+    print("OK  setiap percobaan _render_job memakai folder kerja sendiri")
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix="check_render_farm_")
+    queue = render_farm.FarmQueue(os.path.join(work_dir, "farm.db"))
+    check_lease_and_reap(queue, work_dir)
+    check_max_attempts(queue, work_dir)
+    check_scratch_per_attempt(work_dir)
+    check_worker_processes(work_dir)
+    check_no_workers(work_dir)
+
+
+if __name__ == "__main__":
+    main()
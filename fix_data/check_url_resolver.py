@@ -0,0 +1,105 @@
+"""
+Pemeriksaan url_resolver dengan extractor tiruan (set_extractor), tanpa yt-dlp/jaringan.
+
+Contoh:
+    python fix_data/check_url_resolver.py
+
+Yang dicek: resolve() memakai cache, refresh() mengekstrak ulang URL kedaluwarsa,
+refresh bersamaan dari banyak scene hanya memicu satu ekstraksi, current()
+mengganti URL yang lewat masa berlaku, dan URL dari proses lain (track) bisa di-refresh.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import url_resolver  # noqa: E402
+
+PAGE_URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+
+class _FakeExtractor:
+    """Setiap panggilan menghasilkan direct URL googlevideo dengan tanda tangan baru."""
+
+    def __init__(self, lifetime=3600):
+        self.calls = 0
+        self.lifetime = lifetime
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        # Ekstraksi yt-dlp butuh waktu; refresh bersamaan harus tetap satu kali
+        time.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("ekstraksi gagal")
+        expire = int(time.time()) + self.lifetime
+        return {
+            'url': f"https://r1---sn-test.googlevideo.com/videoplayback?id=abc&itag=22&expire={expire}&sig=s{n}",
+            'title': "Video uji",
+            'duration': 120,
+            'formats': [{'format_id': "22", 'ext': "mp4", 'height': 720}],
+        }
+
+
+def main():
+    url_resolver.EXTRACT_DIR = tempfile.mkdtemp(prefix="check_url_resolver_")
+    extractor = _FakeExtractor()
+    previous = url_resolver.set_extractor(extractor)
+    try:
+        first = url_resolver.resolve(PAGE_URL)
+        assert url_resolver.resolve(PAGE_URL)['url'] == first['url'] and extractor.calls == 1, "resolve tidak memakai cache"
+        assert url_resolver.page_url_for(first['url']) == PAGE_URL
+        print("OK  resolve memakai cache")
+
+        # Ekstraksi pertama sudah lebih lama dari MIN_REFRESH_INTERVAL: refresh mengekstrak ulang
+        first['extracted'] -= url_resolver.MIN_REFRESH_INTERVAL + 1
+        refreshed = url_resolver.refresh(first['url'])
+        assert refreshed and refreshed != first['url'] and extractor.calls == 2, "refresh tidak mengekstrak ulang"
+        print("OK  refresh mengekstrak ulang URL kedaluwarsa")
+
+        # Banyak scene gagal dengan URL lama yang sama: cukup satu ekstraksi (URL baru dipakai bersama)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(url_resolver.refresh(first['url']))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert set(results) == {refreshed} and extractor.calls == 2, "refresh bersamaan memicu ekstraksi berulang"
+        print("OK  refresh bersamaan hanya satu ekstraksi")
+
+        assert url_resolver.refresh("https://example.com/lain.mp4") is None, "URL asing ikut di-refresh"
+
+        # current(): record yang lewat masa berlaku diganti URL baru
+        record = url_resolver.lookup(PAGE_URL)
+        record['expires'] = 0
+        record['extracted'] -= url_resolver.MIN_REFRESH_INTERVAL + 1
+        latest = url_resolver.current(refreshed)
+        assert latest not in (refreshed, first['url']) and extractor.calls == 3, "current tidak me-refresh URL kedaluwarsa"
+        print("OK  current mengganti URL yang lewat masa berlaku")
+
+        # Ekstraksi ulang gagal: refresh mengembalikan None, URL lama tidak hilang
+        extractor.fail = True
+        url_resolver.lookup(PAGE_URL)['extracted'] -= url_resolver.MIN_REFRESH_INTERVAL + 1
+        assert url_resolver.refresh(first['url']) is None, "refresh gagal tidak mengembalikan None"
+        extractor.fail = False
+        print("OK  ekstraksi gagal -> None")
+
+        # Direct URL dari node lain (render farm): track lalu refresh dari URL halamannya
+        other_page = "https://youtu.be/zyxwvutsrqp"
+        foreign = "https://r2---sn-other.googlevideo.com/videoplayback?id=zzz&expire=1&sig=old"
+        url_resolver.track(foreign, other_page)
+        assert url_resolver.page_url_for(foreign) == other_page
+        assert url_resolver.refresh(foreign) not in (None, foreign), "URL hasil track tidak bisa di-refresh"
+        print("OK  track + refresh untuk URL dari proses lain")
+    finally:
+        url_resolver.set_extractor(previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Render batch tanpa UI dari file job JSON atau CSV.
+
+Contoh:
+    python fix_data/cli.py jobs.json
+    python fix_data/cli.py jobs.csv --output hasil --workers 8 --report hasil.json
+
+JSON: list job (atau {"jobs": [...]}), setiap job:
+    {"name": "klip1", "source": "video.mp4" | "https://...",
+     "cuts": [{"start": "00:01:00:000", "end": "00:01:30:000"}, ["00:02:00:000", "00:02:20:000"]],
+     "cuts_file": "highlight.srt",
+     "mode": "Potrait (9:16 TikTok Mode)", "bg_mode": "Blur",
+     "facecam": [x, y, w, h], "batch": false, "resolve": false,
+     "source_b": "...", "cuts_b": [...], "background_image": "..."}
+cuts boleh juga berupa teks daftar scene, atau diganti cuts_file (txt/csv/srt/vtt/edl,
+lihat edl.load). source_b/cuts_b hanya untuk mode merge, background_image untuk mode overlay.
+URL YouTube (atau "resolve": true) diekstrak dulu menjadi direct URL dengan yt-dlp.
+
+CSV: kolom source,start,end[,mode,bg_mode,job]; baris dengan kolom `job` yang
+sama (atau source+mode+bg_mode yang sama jika tanpa kolom job) menjadi satu job.
+
+Semua scene dari semua job masuk ke satu antrean render (process.RENDER_QUEUE),
+jadi mesin tetap penuh walau job-nya kecil-kecil. Ringkasan hasil (JSON) ditulis
+ke stdout atau --report; exit code 1 jika ada scene yang gagal.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import edl  # noqa: E402
+import reporter  # noqa: E402
+
+MERGE_MODE = "Potrait Merge 2 Video"
+OVERLAY_MODE = "Generate Video Overlay"
+DEFAULT_MODE = "Potrait (9:16 TikTok Mode)"
+DEFAULT_BACKGROUND_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "background_1080x1920.png")
+
+
+def _normalize_cuts(cuts):
+    """Cut list dari list dict {'start', 'end'}, pasangan [start, end], atau teks daftar scene."""
+    if isinstance(cuts, str):
+        return edl.load(cuts).to_cut_list()
+    normalized = []
+    for cut in cuts or []:
+        if isinstance(cut, dict):
+            normalized.append({'start': str(cut['start']).strip(), 'end': str(cut['end']).strip()})
+        else:
+            start, end = cut
+            normalized.append({'start': str(start).strip(), 'end': str(end).strip()})
+    return normalized
+
+
+def _normalize_job(job, index):
+    if not job.get('source'):
+        raise ValueError(f"Job {index}: kolom 'source' wajib diisi")
+    if job.get('cuts_file'):
+        with open(job['cuts_file'], encoding="utf-8-sig") as f:
+            cuts = edl.load(f.read(), filename=job['cuts_file']).to_cut_list()
+    else:
+        cuts = _normalize_cuts(job.get('cuts'))
+    if not cuts:
+        raise ValueError(f"Job {index}: cut list kosong")
+    # Semua scene divalidasi di depan, sebelum ada yang dirender
+    problems = edl.EDL.from_cut_list(cuts).validate()
+    if problems:
+        raise ValueError(f"Job {index}: {problems[0][1]}")
+    normalized = dict(job)
+    normalized['name'] = re.sub(r"[^\w.\-]+", "_", str(job.get('name') or f"job_{index:03d}"))
+    normalized['cuts'] = cuts
+    normalized['mode'] = job.get('mode') or DEFAULT_MODE
+    normalized['bg_mode'] = job.get('bg_mode') or None
+    if normalized['mode'] == MERGE_MODE:
+        if not job.get('source_b'):
+            raise ValueError(f"Job {index}: mode merge butuh 'source_b'")
+        normalized['cuts_b'] = _normalize_cuts(job.get('cuts_b'))
+    if job.get('facecam') is not None:
+        normalized['facecam'] = tuple(int(v) for v in job['facecam'])
+    return normalized
+
+
+def load_csv_jobs(path):
+    jobs = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            if not row.get('source'):
+                raise ValueError(f"{path}:{line}: kolom 'source' kosong")
+            key = row.get('job') or (row['source'], row.get('mode', ""), row.get('bg_mode', ""))
+            job = jobs.setdefault(key, {
+                'name': row.get('job') or None,
+                'source': row['source'],
+                'mode': row.get('mode') or None,
+                'bg_mode': row.get('bg_mode') or None,
+                'cuts': [],
+            })
+            job['cuts'].append({'start': row['start'], 'end': row['end']})
+    return list(jobs.values())
+
+
+def load_jobs(path):
+    """Membaca file job JSON/CSV dan mengembalikan list job yang sudah dinormalisasi."""
+    if path.lower().endswith(".csv"):
+        raw = load_csv_jobs(path)
+    else:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        if isinstance(raw, dict):
+            raw = raw.get('jobs', [raw])
+    jobs = [_normalize_job(job, i + 1) for i, job in enumerate(raw)]
+    seen = set()
+    for i, job in enumerate(jobs):
+        # Nama job menjadi nama folder output, jadi harus unik
+        if job['name'] in seen:
+            job['name'] = f"{job['name']}_{i + 1:03d}"
+        seen.add(job['name'])
+    return jobs
+
+
+def resolve_source(source, force=False):
+    """Source siap render: (path/URL, is_url). URL halaman YouTube diekstrak menjadi direct URL."""
+    import process
+
+    if not process.is_url_source(source):
+        return source, False
+    if force or process.url_resolver.YOUTUBE_ID_PATTERN.search(source):
+        return process.url_resolver.resolve(source)['url'], True
+    return source, True
+
+
+def submit_job(job, output_dir, max_workers=None):
+    """
+    Menjalankan satu job. Mode batch dirender langsung dan mengembalikan list hasil;
+    mode lain dikirim ke RENDER_QUEUE dan mengembalikan ID job ([] jika gagal direncanakan).
+    """
+    import process
+
+    source, is_url = resolve_source(job['source'], job.get('resolve'))
+    mode = job['mode']
+    if mode == MERGE_MODE:
+        source_b, is_url_b = resolve_source(job['source_b'], job.get('resolve'))
+        return process.manual_cut_merge_direct(
+            source, job['cuts'], source_b, job['cuts_b'], is_url_a=is_url, is_url_b=is_url_b,
+            max_workers=max_workers, background=True, output_dir=output_dir
+        )
+    if mode == OVERLAY_MODE:
+        return process.overlay_to_laptop_direct(
+            job.get('background_image') or DEFAULT_BACKGROUND_IMAGE, source, job['cuts'], is_url=is_url,
+            max_workers=max_workers, background=True, output_dir=output_dir
+        )
+    if job.get('batch'):
+        return process.manual_cut_batch(
+            source, job['cuts'], mode, bg_mode=job['bg_mode'], is_url=is_url,
+            facecam=job.get('facecam'), output_dir=output_dir
+        )
+    render = process.manual_cut_direct if is_url else process.manual_cut
+    return render(
+        source, job['cuts'], mode, bg_mode=job['bg_mode'], max_workers=max_workers,
+        background=True, facecam=job.get('facecam'), output_dir=output_dir
+    )
+
+
+def wait_for_jobs(job_ids, poll_interval=2.0):
+    """Menunggu semua job di RENDER_QUEUE selesai sambil melaporkan progres gabungan."""
+    import process
+
+    progress = reporter.progress()
+    try:
+        while True:
+            statuses = {name: process.RENDER_QUEUE.status(job_id) for name, job_id in job_ids.items()}
+            done = sum(len(s['results']) for s in statuses.values())
+            total = sum(s['total'] for s in statuses.values())
+            progress.update(done / total if total else 1.0, f"{done}/{total} scene selesai")
+            if all(s['finished'] is not None for s in statuses.values()):
+                return statuses
+            time.sleep(poll_interval)
+    finally:
+        progress.close()
+
+
+def run(jobs, output_root, max_workers=None):
+    """Menjalankan semua job dan mengembalikan ringkasan {'ok', 'jobs': [...]}."""
+    summary = []
+    job_ids = {}
+    collectors = {}
+    for job in jobs:
+        output_dir = os.path.join(output_root, job['name'])
+        collector = collectors[job['name']] = reporter.CollectingReporter(
+            forward=reporter.ConsoleReporter(prefix=f"[{job['name']}] ")
+        )
+        with reporter.using(collector):
+            try:
+                outcome = submit_job(job, output_dir, max_workers)
+            except Exception as e:
+                collector.error(f"❌ {e}")
+                outcome = []
+        if isinstance(outcome, str):
+            job_ids[job['name']] = outcome
+        else:
+            summary.append({'name': job['name'], 'output_dir': output_dir, 'results': outcome})
+
+    statuses = wait_for_jobs(job_ids) if job_ids else {}
+    for name, status in statuses.items():
+        summary.append({'name': name, 'output_dir': os.path.join(output_root, name), 'results': status['results']})
+
+    order = {job['name']: i for i, job in enumerate(jobs)}
+    summary.sort(key=lambda entry: order[entry['name']])
+    for entry in summary:
+        # Scene dirender di thread worker RENDER_QUEUE (atau node farm), di luar context
+        # reporter job ini; error render diambil dari log setiap hasil yang gagal
+        entry['errors'] = collectors[entry['name']].errors() + [
+            f"Scene {r['scene']}: {(r.get('log') or '').strip() or 'gagal tanpa log'}"
+            for r in entry['results'] if not r['ok']
+        ]
+        entry['ok'] = bool(entry['results']) and not entry['errors']
+    return {'ok': all(entry['ok'] for entry in summary), 'jobs': summary}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("job_file", help="file job .json atau .csv")
+    parser.add_argument("--output", default="output", help="folder output (satu subfolder per job)")
+    parser.add_argument("--workers", type=int, help="jumlah proses ffmpeg paralel (default SHORTGEN_MAX_WORKERS)")
+    parser.add_argument("--report", help="tulis ringkasan JSON ke file ini, bukan ke stdout")
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        # Harus diset sebelum process diimport: RENDER_QUEUE dibuat saat import
+        os.environ["SHORTGEN_MAX_WORKERS"] = str(args.workers)
+
+    try:
+        jobs = load_jobs(args.job_file)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+
+    result = run(jobs, args.output, args.workers)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if result['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Downloader URL langsung: file dibagi menjadi beberapa range yang diambil paralel
+lewat koneksi yang di-pool, setiap chunk langsung ditulis ke posisinya di file
+.part (tidak ditampung di RAM). Range yang sudah selesai dicatat di file .part.json
+sehingga download yang terputus bisa dilanjutkan. Download dianggap lengkap jika
+range yang selesai menutup seluruh Content-Length; server tanpa Accept-Ranges
+di-download dengan satu stream biasa.
+
+File yang sudah selesai dicatat di cache/downloads.json (ukuran, ETag/Last-Modified,
+mtime) dan hanya dipakai ulang jika validator server asli masih sama.
+"""
+import json
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import unquote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache_utils import CACHE_DIR, atomic_write_text
+
+DEFAULT_CONNECTIONS = int(os.environ.get("SHORTGEN_DOWNLOAD_CONNECTIONS", "4"))
+PART_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+PART_RETRIES = 3
+TIMEOUT = 20
+DOWNLOAD_INDEX = os.path.join(CACHE_DIR, "downloads.json")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+def make_session(connections):
+    """Session requests dengan pool koneksi sebanyak jumlah worker."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=connections, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def filename_from_response(url, response=None):
+    """Nama file dari Content-Disposition, atau dari path URL."""
+    if response is not None:
+        disposition = response.headers.get("Content-Disposition", "")
+        match = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', disposition)
+        if match:
+            return safe_filename(unquote(match.group(1)))
+    return safe_filename(unquote(os.path.basename(urlparse(url).path)) or "video.mp4")
+
+
+def safe_filename(name):
+    name = re.sub(r"[^\w.\-]+", "_", os.path.basename(name)).strip("._")
+    if not name:
+        name = "video"
+    if not os.path.splitext(name)[1]:
+        name += ".mp4"
+    return name
+
+
+_index_lock = threading.Lock()
+
+
+def _load_index():
+    try:
+        with open(DOWNLOAD_INDEX, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _record_download(dest_path, size, validator):
+    """Mencatat file hasil download beserta validator server asli."""
+    with _index_lock:
+        index = _load_index()
+        index[os.path.abspath(dest_path)] = {
+            'size': size, 'validator': validator, 'mtime_ns': os.stat(dest_path).st_mtime_ns,
+        }
+        atomic_write_text(DOWNLOAD_INDEX, json.dumps(index, indent=1))
+
+
+def is_current(dest_path, size, validator):
+    """
+    True jika dest_path adalah hasil download sebelumnya dari versi yang sama: ukuran dan
+    validator cocok, dan file tidak diganti sejak itu. Tanpa validator selalu False.
+    """
+    if not validator or size is None:
+        return False
+    with _index_lock:
+        record = _load_index().get(os.path.abspath(dest_path))
+    try:
+        stat = os.stat(dest_path)
+    except OSError:
+        return False
+    return (record is not None and record['validator'] == validator and record['size'] == size
+            and stat.st_size == size and stat.st_mtime_ns == record['mtime_ns'])
+
+
+def probe(session, url):
+    """
+    Mengecek ukuran file dan dukungan range dengan GET bytes=0-0.
+    Mengembalikan (size atau None, supports_ranges, validator, response headers).
+    """
+    response = session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=TIMEOUT)
+    try:
+        response.raise_for_status()
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        if response.status_code == 206 and total.isdigit():
+            size, ranged = int(total), True
+        else:
+            length = response.headers.get("Content-Length")
+            size, ranged = (int(length) if length and length.isdigit() else None), False
+        validator = response.headers.get("ETag") or response.headers.get("Last-Modified") or ""
+        return size, ranged, validator, response
+    finally:
+        response.close()
+
+
+def split_parts(size, part_size=PART_SIZE):
+    """Daftar range (start, end) eksklusif sebesar part_size."""
+    return [(start, min(start + part_size, size)) for start in range(0, size, part_size)]
+
+
+def _load_state(state_path, url_size, validator):
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get('size') == url_size and state.get('validator') == validator:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {'size': url_size, 'validator': validator, 'done': []}
+
+
+def _fetch_part(session, url, part_path, start, end, counter, lock):
+    """Mengambil satu range dan menulisnya ke posisinya di file .part."""
+    last_error = None
+    for _ in range(PART_RETRIES):
+        received = 0
+        try:
+            response = session.get(url, headers={"Range": f"bytes={start}-{end - 1}"}, stream=True, timeout=TIMEOUT)
+            with response:
+                if response.status_code != 206:
+                    raise RuntimeError(f"Server membalas HTTP {response.status_code} untuk range {start}-{end - 1}")
+                with open(part_path, "r+b") as f:
+                    f.seek(start)
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        chunk = chunk[:end - start - received]
+                        f.write(chunk)
+                        received += len(chunk)
+                        with lock:
+                            counter[0] += len(chunk)
+            if received != end - start:
+                raise RuntimeError(f"Range {start}-{end - 1} terpotong ({received}/{end - start} byte)")
+            return start, end
+        except (requests.RequestException, RuntimeError) as e:
+            last_error = e
+            with lock:
+                counter[0] -= received
+    raise RuntimeError(f"Gagal mengambil range {start}-{end - 1}: {last_error}")
+
+
+def _download_ranges(session, url, dest_path, size, validator, connections, on_progress):
+    part_path = dest_path + ".part"
+    state_path = part_path + ".json"
+    state = _load_state(state_path, size, validator)
+    if not os.path.exists(part_path):
+        state['done'] = []
+    with open(part_path, "ab") as f:
+        f.truncate(size)
+
+    done = {tuple(part) for part in state['done']}
+    pending = [part for part in split_parts(size) if part not in done]
+    counter = [sum(end - start for start, end in done)]
+    lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        futures = {executor.submit(_fetch_part, session, url, part_path, start, end, counter, lock)
+                   for start, end in pending}
+        try:
+            while futures:
+                finished, futures = wait(futures, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    state['done'].append(list(future.result()))
+                if finished:
+                    atomic_write_text(state_path, json.dumps(state))
+                if on_progress:
+                    on_progress(counter[0], size)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    # Part dari split_parts tidak bertumpuk, jadi jumlah byte part yang selesai == size
+    # berarti seluruh file sudah terisi (ukuran file .part sendiri selalu == size karena truncate)
+    completed = sum(end - start for start, end in {tuple(part) for part in state['done']})
+    if completed != size:
+        raise RuntimeError(f"Download belum lengkap ({completed}/{size} byte)")
+    os.replace(part_path, dest_path)
+    os.remove(state_path)
+
+
+def _download_single(session, url, dest_path, size, on_progress):
+    part_path = dest_path + ".part"
+    received = 0
+    with session.get(url, stream=True, timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        with open(part_path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                received += len(chunk)
+                if on_progress:
+                    on_progress(received, size)
+    if size is not None and received != size:
+        raise RuntimeError(f"Ukuran file tidak sesuai Content-Length ({received}/{size} byte)")
+    os.replace(part_path, dest_path)
+
+
+def download(url, dest_dir="uploads", filename=None, connections=None, supports_ranges=None, on_progress=None):
+    """
+    Download `url` ke `dest_dir` dan mengembalikan path file.
+    `supports_ranges=False` (mis. dari validate_direct_url) langsung memakai satu stream.
+    `on_progress(downloaded, total)` dipanggil dari thread pemanggil (total bisa None).
+    Melempar RuntimeError/requests.RequestException jika gagal.
+    """
+    connections = connections or DEFAULT_CONNECTIONS
+    os.makedirs(dest_dir, exist_ok=True)
+    session = make_session(connections)
+    try:
+        size, ranged, validator, response = probe(session, url)
+        dest_path = os.path.join(dest_dir, safe_filename(filename) if filename else filename_from_response(url, response))
+
+        if is_current(dest_path, size, validator):
+            return dest_path
+
+        if ranged and supports_ranges is not False and size:
+            _download_ranges(session, url, dest_path, size, validator, connections, on_progress)
+        else:
+            _download_single(session, url, dest_path, size, on_progress)
+        _record_download(dest_path, size, validator)
+        return dest_path
+    finally:
+        session.close()
@@ -0,0 +1,384 @@
+"""
+Edit decision list (EDL): daftar scene dalam milidetik integer.
+
+Scene disimpan di dua array('q') (start dan end) plus list label, bukan list dict
+string, sehingga ribuan scene bisa diurutkan (O(n log n)), dicek tumpang tindih
+dan digabung tanpa parsing timestamp berulang. Jam tidak dibatasi 24 (VOD
+livestream panjang), berbeda dengan datetime.strptime.
+
+Format timestamp yang diterima parse_ms:
+    HH:MM:SS:ms     format input scene (ms boleh 1-3 digit, dianggap milidetik)
+    HH:MM:SS.mmm    format ffmpeg / WebVTT (juga HH:MM:SS,mmm dari SRT)
+    MM:SS[.mmm]     tanpa jam
+    123.5           detik
+
+Importer: from_text (daftar hasil paste, satu scene per baris), from_csv,
+from_cues (SRT/WebVTT), from_cmx (EDL gaya CMX3600); load() memilih otomatis.
+"""
+import csv
+import io
+import operator
+import re
+from array import array
+from functools import partial
+from itertools import compress
+
+MS_PER_SECOND = 1000
+
+# Token timestamp di dalam teks bebas (untuk from_text)
+# (koma hanya dianggap desimal jika diikuti tepat 3 digit, agar "1:00,1:30" tetap dua token)
+TIMESTAMP_TOKEN = re.compile(r"\d+(?::\d{1,2}){1,2}(?:[:.]\d{1,3}|,\d{3}(?!\d))?|\d+(?:\.\d+)?")
+# Penomoran daftar di awal baris ("1. ", "12) ")
+LIST_NUMBER = re.compile(r"^\d+[.)]\s+")
+CUE_TIMING = re.compile(r"^\s*(\S+)\s+-->\s+(\S+)")
+CMX_EVENT = re.compile(
+    r"^\s*(\d{3,6})\s+(\S+)\s+(\S+)\s+(C|D\s+\d+|W\d*\s+\d+|K\s*[BO]?\s*\d*)\s+"
+    r"(\d{2}:\d{2}:\d{2}[:;.]\d{2})\s+(\d{2}:\d{2}:\d{2}[:;.]\d{2})"
+)
+CMX_CLIP_NAME = re.compile(r"^\s*\*\s*FROM CLIP NAME:\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def parse_ms(ts):
+    """Timestamp (lihat docstring modul) menjadi milidetik integer. ValueError jika tidak valid."""
+    text = str(ts).strip().replace(",", ".")
+    if not text:
+        raise ValueError("Timestamp kosong")
+    parts = text.split(":")
+    if len(parts) == 1:
+        try:
+            seconds = float(text)
+        except ValueError:
+            raise ValueError(f"Timestamp tidak valid: {ts!r}") from None
+        if seconds < 0:
+            raise ValueError(f"Timestamp tidak boleh negatif: {ts!r}")
+        return round(seconds * MS_PER_SECOND)
+
+    if len(parts) == 4:
+        # HH:MM:SS:ms, bagian ms diartikan milidetik (sama dengan parse_timestamp)
+        *clock, ms_text = parts
+        if not ms_text.isdigit() or len(ms_text) > 3:
+            raise ValueError(f"Milidetik harus 1-3 digit angka: {ts!r}")
+        millis = int(ms_text)
+    elif len(parts) in (2, 3):
+        clock = parts[:-1]
+        seconds_text, _, fraction = parts[-1].partition(".")
+        clock.append(seconds_text)
+        if fraction and (not fraction.isdigit() or len(fraction) > 3):
+            raise ValueError(f"Pecahan detik maksimal 3 digit: {ts!r}")
+        millis = int(fraction.ljust(3, "0")) if fraction else 0
+    else:
+        raise ValueError(f"Format timestamp harus HH:MM:SS:ms (contoh: 00:01:23:456), bukan {ts!r}")
+
+    if not all(p.isdigit() for p in clock):
+        raise ValueError(f"Semua bagian timestamp harus berupa angka: {ts!r}")
+    values = [int(p) for p in clock]
+    if len(values) == 2:
+        values.insert(0, 0)
+    hours, minutes, seconds = values
+    if minutes >= 60 or seconds >= 60:
+        raise ValueError(f"Menit dan detik harus di bawah 60: {ts!r}")
+    return ((hours * 60 + minutes) * 60 + seconds) * MS_PER_SECOND + millis
+
+
+def _split_ms(ms):
+    seconds, millis = divmod(max(0, int(ms)), MS_PER_SECOND)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return hours, minutes, seconds, millis
+
+
+def format_cut(ms):
+    """Milidetik menjadi format input scene HH:MM:SS:mmm (jam boleh >= 24)."""
+    return "%02d:%02d:%02d:%03d" % _split_ms(ms)
+
+
+def format_ffmpeg(ms):
+    """Milidetik menjadi format ffmpeg HH:MM:SS.mmm (jam boleh >= 24)."""
+    return "%02d:%02d:%02d.%03d" % _split_ms(ms)
+
+
+def timecode_to_ms(timecode, fps=30.0):
+    """
+    Timecode HH:MM:SS:FF (atau HH:MM:SS;FF drop-frame) menjadi milidetik.
+    Drop-frame dihitung dengan aturan NTSC (2 frame per menit dilewati, kecuali tiap 10 menit).
+    """
+    drop_frame = ";" in timecode
+    hours, minutes, seconds, frames = (int(p) for p in re.split(r"[:;.]", timecode))
+    nominal = round(fps)
+    if frames >= nominal:
+        raise ValueError(f"Frame {frames} melebihi fps {nominal}: {timecode!r}")
+    frame_number = ((hours * 60 + minutes) * 60 + seconds) * nominal + frames
+    if drop_frame:
+        dropped = 2 * (nominal // 30)
+        total_minutes = hours * 60 + minutes
+        frame_number -= dropped * (total_minutes - total_minutes // 10)
+        fps = nominal * 1000 / 1001
+    return round(frame_number * MS_PER_SECOND / fps)
+
+
+class Cut:
+    """Satu scene: start/end dalam milidetik dan label opsional."""
+
+    __slots__ = ("start", "end", "label")
+
+    def __init__(self, start, end, label=""):
+        self.start = start
+        self.end = end
+        self.label = label
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def to_dict(self):
+        """Format cut list lama {'start': 'HH:MM:SS:ms', 'end': ...} untuk renderer."""
+        cut = {'start': format_cut(self.start), 'end': format_cut(self.end)}
+        if self.label:
+            cut['label'] = self.label
+        return cut
+
+    def __repr__(self):
+        return f"Cut({format_cut(self.start)}, {format_cut(self.end)}, {self.label!r})"
+
+
+class EDL:
+    """Daftar scene berbasis array. Operasi pengurutan/penggabungan mengembalikan EDL baru."""
+
+    __slots__ = ("starts", "ends", "labels")
+
+    def __init__(self, cuts=()):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.labels = []
+        for cut in cuts:
+            self.append(cut.start, cut.end, cut.label)
+
+    def append(self, start, end, label=""):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.labels.append(label or "")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        return Cut(self.starts[index], self.ends[index], self.labels[index])
+
+    def __iter__(self):
+        for start, end, label in zip(self.starts, self.ends, self.labels):
+            yield Cut(start, end, label)
+
+    @classmethod
+    def from_cut_list(cls, cut_list):
+        """Dari cut list [{'start': 'HH:MM:SS:ms', 'end': ...}]. ValueError menyebut nomor scene."""
+        edl = cls()
+        for i, cut in enumerate(cut_list):
+            try:
+                edl.append(parse_ms(cut['start']), parse_ms(cut['end']), cut.get('label', ""))
+            except ValueError as e:
+                raise ValueError(f"Scene {i + 1}: {e}") from None
+        return edl
+
+    def to_cut_list(self):
+        return [cut.to_dict() for cut in self]
+
+    def seconds(self):
+        """Daftar (start, end) dalam detik."""
+        return [(start / MS_PER_SECOND, end / MS_PER_SECOND) for start, end in zip(self.starts, self.ends)]
+
+    def total_ms(self):
+        return sum(self.ends) - sum(self.starts)
+
+    def _take(self, order):
+        edl = EDL()
+        edl.starts = array("q", (self.starts[i] for i in order))
+        edl.ends = array("q", (self.ends[i] for i in order))
+        edl.labels = [self.labels[i] for i in order]
+        return edl
+
+    def sort_order(self):
+        return sorted(range(len(self)), key=lambda i: (self.starts[i], self.ends[i]))
+
+    def sorted(self):
+        """EDL baru yang diurutkan berdasarkan (start, end)."""
+        return self._take(self.sort_order())
+
+    def validate(self, min_duration_ms=1, max_end_ms=None):
+        """
+        Mengecek semua scene dan mengembalikan semua masalah sebagai list (index, pesan)
+        terurut, tidak berhenti di scene pertama yang salah; kosong berarti valid.
+        max_end_ms (mis. durasi video) opsional.
+
+        Index yang salah dicari dengan map/compress atas kedua array sekaligus (tanpa
+        loop Python per scene); pesan hanya dibuat untuk index yang salah.
+        """
+        indexes = range(len(self))
+        durations = map(operator.sub, self.ends, self.starts)
+        too_short = set(compress(indexes, map(partial(operator.gt, min_duration_ms), durations)))
+        too_long = set()
+        if max_end_ms is not None:
+            too_long = set(compress(indexes, map(partial(operator.lt, max_end_ms), self.ends))) - too_short
+
+        problems = [(i, f"Scene {i + 1}: timestamp 'end' harus lebih besar dari 'start'") for i in too_short]
+        if too_long:
+            limit = format_cut(max_end_ms)
+            problems += [(i, f"Scene {i + 1}: melewati durasi video ({limit})") for i in too_long]
+        problems.sort()
+        return problems
+
+    def overlaps(self):
+        """
+        Pasangan index (i, j) scene yang saling tumpang tindih, dengan satu kali sweep
+        setelah diurutkan. Setiap scene dibandingkan dengan scene sebelumnya yang end-nya paling jauh.
+        """
+        pairs = []
+        reach = -1
+        reach_index = None
+        for i in self.sort_order():
+            if reach_index is not None and self.starts[i] < reach:
+                pairs.append((reach_index, i))
+            if self.ends[i] > reach:
+                reach, reach_index = self.ends[i], i
+        return pairs
+
+    def merged(self, gap_ms=0):
+        """EDL baru (terurut) dengan scene yang tumpang tindih atau berjarak <= gap_ms digabung."""
+        edl = EDL()
+        for i in self.sort_order():
+            start, end, label = self.starts[i], self.ends[i], self.labels[i]
+            if len(edl) and start <= edl.ends[-1] + gap_ms:
+                edl.ends[-1] = max(edl.ends[-1], end)
+                if label and label not in edl.labels[-1].split(" + "):
+                    edl.labels[-1] = f"{edl.labels[-1]} + {label}" if edl.labels[-1] else label
+            else:
+                edl.append(start, end, label)
+        return edl
+
+
+def _error(line_number, message):
+    return ValueError(f"Baris {line_number}: {message}")
+
+
+def from_text(text, default_duration_ms=None):
+    """
+    Daftar scene hasil paste: satu scene per baris, dua timestamp dipisah spasi,
+    '-', ',', ';', tab atau 'to'. Sisa teks di baris menjadi label. Baris dengan
+    satu timestamp memakai default_duration_ms (jika diisi). Baris kosong dan
+    baris berawalan '#' diabaikan.
+    """
+    edl = EDL()
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = LIST_NUMBER.sub("", line.strip())
+        if not line or line.startswith("#"):
+            continue
+        tokens = list(TIMESTAMP_TOKEN.finditer(line))[:2]
+        if not tokens:
+            raise _error(line_number, f"tidak ada timestamp di {line!r}")
+        try:
+            start = parse_ms(tokens[0].group())
+            if len(tokens) == 2:
+                end = parse_ms(tokens[1].group())
+            elif default_duration_ms:
+                end = start + default_duration_ms
+            else:
+                raise ValueError("butuh timestamp start dan end")
+        except ValueError as e:
+            raise _error(line_number, e) from None
+        label = line[tokens[-1].end():].strip(" \t-,;|")
+        edl.append(start, end, label)
+    return edl
+
+
+def from_csv(text):
+    """CSV dengan kolom start,end[,label]; baris header (jika ada) dilewati."""
+    edl = EDL()
+    for line_number, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        cells = [c.strip() for c in row]
+        if not any(cells):
+            continue
+        if len(cells) < 2:
+            raise _error(line_number, "butuh kolom start dan end")
+        try:
+            start, end = parse_ms(cells[0]), parse_ms(cells[1])
+        except ValueError as e:
+            if line_number == 1:
+                continue  # header
+            raise _error(line_number, e) from None
+        edl.append(start, end, cells[2] if len(cells) > 2 else "")
+    return edl
+
+
+def from_cues(text):
+    """File subtitle SRT atau WebVTT: setiap cue menjadi satu scene, teks cue menjadi label."""
+    edl = EDL()
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        match = CUE_TIMING.match(lines[i])
+        if not match:
+            i += 1
+            continue
+        try:
+            start, end = parse_ms(match.group(1)), parse_ms(match.group(2))
+        except ValueError as e:
+            raise _error(i + 1, e) from None
+        i += 1
+        body = []
+        while i < len(lines) and lines[i].strip():
+            body.append(lines[i].strip())
+            i += 1
+        edl.append(start, end, " ".join(body))
+    return edl
+
+
+from_srt = from_cues
+from_vtt = from_cues
+
+
+def from_cmx(text, fps=30.0):
+    """
+    EDL gaya CMX3600: setiap event memakai source in/out (timecode kolom pertama),
+    bukan record in/out. Komentar '* FROM CLIP NAME:' menjadi label event.
+    """
+    edl = EDL()
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        match = CMX_EVENT.match(line)
+        if match:
+            try:
+                start, end = timecode_to_ms(match.group(5), fps), timecode_to_ms(match.group(6), fps)
+            except ValueError as e:
+                raise _error(line_number, e) from None
+            edl.append(start, end, "")
+            continue
+        clip_name = CMX_CLIP_NAME.match(line)
+        if clip_name and len(edl) and not edl.labels[-1]:
+            edl.labels[-1] = clip_name.group(1)
+    return edl
+
+
+def detect_format(text, filename=None):
+    """Menebak format: 'cues', 'cmx', 'csv' atau 'text'."""
+    ext = (filename or "").lower().rsplit(".", 1)[-1] if filename and "." in filename else ""
+    if ext in ("srt", "vtt"):
+        return "cues"
+    if ext == "edl":
+        return "cmx"
+    if ext == "csv":
+        return "csv"
+    if "-->" in text:
+        return "cues"
+    if re.search(r"^\s*TITLE:", text, re.MULTILINE) or any(CMX_EVENT.match(l) for l in text.splitlines()[:50]):
+        return "cmx"
+    return "text"
+
+
+def load(text, fmt=None, filename=None, fps=30.0, default_duration_ms=None):
+    """Import daftar scene dari teks (format otomatis jika fmt None). ValueError jika ada baris yang tidak valid."""
+    fmt = fmt or detect_format(text, filename)
+    if fmt == "cues":
+        return from_cues(text)
+    if fmt == "cmx":
+        return from_cmx(text, fps)
+    if fmt == "csv":
+        return from_csv(text)
+    return from_text(text, default_duration_ms)
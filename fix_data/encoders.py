@@ -0,0 +1,196 @@
+"""
+Registry backend encoder H.264. Kemampuan ffmpeg (-encoders / -hwaccels) di-probe
+sekali lalu di-cache; setiap perintah di process.py ditulis untuk libx264 dan
+diadaptasi ke backend tercepat yang tersedia (NVENC > QSV > VAAPI > software).
+Di mesin tanpa GPU, -hwaccel sama sekali tidak dipakai.
+"""
+import functools
+import os
+import subprocess
+
+VAAPI_DEVICE = os.environ.get("SHORTGEN_VAAPI_DEVICE", "/dev/dri/renderD128")
+# Paksa backend tertentu, mis. SHORTGEN_ENCODER=software
+FORCED_BACKEND = os.environ.get("SHORTGEN_ENCODER")
+
+PROFILES = {
+    "nvenc": {
+        'name': "nvenc",
+        'label': "NVIDIA NVENC",
+        'encoder': "h264_nvenc",
+        'encoder_args': ["-preset", "p1"],
+        'quality_flag': "-cq",
+        'hwaccel_args': ["-hwaccel", "cuda"],
+        'global_args': [],
+        'filter_suffix': None,
+    },
+    "qsv": {
+        'name': "qsv",
+        'label': "Intel Quick Sync",
+        'encoder': "h264_qsv",
+        'encoder_args': ["-preset", "veryfast"],
+        'quality_flag': "-global_quality",
+        'hwaccel_args': ["-hwaccel", "qsv"],
+        'global_args': [],
+        'filter_suffix': None,
+    },
+    "vaapi": {
+        'name': "vaapi",
+        'label': "VAAPI",
+        'encoder': "h264_vaapi",
+        'encoder_args': [],
+        'quality_flag': "-qp",
+        'hwaccel_args': ["-hwaccel", "vaapi"],
+        'global_args': ["-vaapi_device", VAAPI_DEVICE],
+        'filter_suffix': "format=nv12,hwupload",
+    },
+    "software": {
+        'name': "software",
+        'label': "Software (libx264)",
+        'encoder': "libx264",
+        'encoder_args': ["-preset", "veryfast"],
+        'quality_flag': "-crf",
+        'hwaccel_args': [],
+        'global_args': [],
+        'filter_suffix': None,
+    },
+}
+PREFERENCE = ["nvenc", "qsv", "vaapi", "software"]
+SOFTWARE = PROFILES["software"]
+
+# Pesan ffmpeg saat sesi encoder/hwaccel GPU gagal dibuka (NVENC/QSV/VAAPI);
+# hanya kegagalan seperti ini yang layak diulang dengan libx264
+HARDWARE_ERRORS = (
+    "no capable devices found",
+    "error while opening encoder",
+    "openencodesessionex failed",
+    "cannot load libcuda",
+    "cannot load libnvidia-encode",
+    "device creation failed",
+    "failed to initialise vaapi connection",
+    "mfx session",
+    "hwaccel initialisation returned error",
+    "failed setup for format",
+)
+
+
+def _ffmpeg_output(args, timeout=15):
+    try:
+        result = subprocess.run(["ffmpeg", "-hide_banner", *args], capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result
+
+
+@functools.lru_cache(maxsize=1)
+def capabilities():
+    """Daftar encoder dan metode hwaccel yang dikompilasi di ffmpeg (di-cache)."""
+    encoders, hwaccels = set(), set()
+    result = _ffmpeg_output(["-encoders"])
+    if result and result.returncode == 0:
+        for line in result.stdout.splitlines():
+            fields = line.split()
+            if len(fields) >= 2 and fields[0].startswith("V"):
+                encoders.add(fields[1])
+    result = _ffmpeg_output(["-hwaccels"])
+    if result and result.returncode == 0:
+        hwaccels = {line.strip() for line in result.stdout.splitlines()[1:] if line.strip()}
+    return {'encoders': encoders, 'hwaccels': hwaccels}
+
+
+@functools.lru_cache(maxsize=None)
+def is_usable(name):
+    """
+    True jika backend ada di build ffmpeg DAN bisa membuka sesi encode sungguhan
+    (encode uji 0.1 detik). Hasilnya di-cache selama proses berjalan.
+    """
+    profile = PROFILES[name]
+    if name == "software":
+        return True
+    if profile['encoder'] not in capabilities()['encoders']:
+        return False
+    if name == "vaapi" and not os.path.exists(VAAPI_DEVICE):
+        return False
+    args = [*profile['global_args'], "-v", "error", "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1"]
+    if profile['filter_suffix']:
+        args += ["-vf", profile['filter_suffix']]
+    args += ["-c:v", profile['encoder'], "-f", "null", "-"]
+    result = _ffmpeg_output(args)
+    return bool(result) and result.returncode == 0
+
+
+def available_profiles():
+    """Profil yang bisa dipakai, urut dari yang tercepat."""
+    names = [FORCED_BACKEND] if FORCED_BACKEND in PROFILES else PREFERENCE
+    return [PROFILES[n] for n in names if is_usable(n)] or [SOFTWARE]
+
+
+def is_hardware_failure(stderr):
+    """True jika stderr ffmpeg menunjukkan sesi encoder/hwaccel GPU gagal dibuka."""
+    text = (stderr or "").lower()
+    return any(marker in text for marker in HARDWARE_ERRORS)
+
+
+def best_profile():
+    return available_profiles()[0]
+
+
+def encodes_h264(cmd):
+    """True jika perintah meng-encode video dengan libx264 (yang bisa diganti backend lain)."""
+    return any(cmd[i] == "-c:v" and cmd[i + 1] == "libx264" for i in range(len(cmd) - 1))
+
+
+def select_profile(cmd):
+    """Backend tercepat yang cocok untuk satu perintah ffmpeg."""
+    if not encodes_h264(cmd):
+        return SOFTWARE
+    # Filter VAAPI perlu hwupload di ujung graph; graph dari file script dan
+    # perintah dengan -pix_fmt eksplisit (format software) tidak cocok untuk itu
+    needs_software_frames = "-filter_complex_script" in cmd or "-pix_fmt" in cmd
+    for profile in available_profiles():
+        if profile['filter_suffix'] and needs_software_frames:
+            continue
+        return profile
+    return SOFTWARE
+
+
+def _with_suffix(graph, suffix, label="[out]"):
+    if graph.endswith(label):
+        return graph[:-len(label)] + "," + suffix + label
+    return graph + "," + suffix
+
+
+def adapt_command(cmd, profile):
+    """
+    Menulis ulang perintah libx264 untuk backend `profile`: -hwaccel diganti (atau
+    dihapus untuk software), encoder + preset diganti, -crf dipetakan ke flag
+    kualitas backend dan filter tambahan (hwupload) ditempel di ujung graph.
+    """
+    out = [cmd[0], *profile['global_args']]
+    has_filter = False
+    i = 1
+    while i < len(cmd):
+        token = cmd[i]
+        value = cmd[i + 1] if i + 1 < len(cmd) else None
+        if token == "-hwaccel":
+            out += profile['hwaccel_args']
+            i += 2
+        elif token == "-c:v" and value == "libx264":
+            if profile['filter_suffix'] and not has_filter:
+                out += ["-vf", profile['filter_suffix']]
+            out += ["-c:v", profile['encoder'], *profile['encoder_args']]
+            i += 2
+            if i < len(cmd) and cmd[i] == "-preset":
+                i += 2
+        elif token == "-crf":
+            out += [profile['quality_flag'], value]
+            i += 2
+        elif token in ("-vf", "-filter_complex") and value is not None:
+            has_filter = True
+            if profile['filter_suffix']:
+                value = _with_suffix(value, profile['filter_suffix']) if token == "-filter_complex" else value + "," + profile['filter_suffix']
+            out += [token, value]
+            i += 2
+        else:
+            out.append(token)
+            i += 1
+    return out
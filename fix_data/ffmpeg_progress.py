@@ -0,0 +1,135 @@
+"""
+Menjalankan ffmpeg dengan `-progress pipe:1` dan mem-parsing output-nya secara
+bertahap menjadi out_time, fps, speed dan ETA. Stderr hanya disimpan sebagai
+ring buffer (N baris terakhir) untuk laporan error, sehingga log ffmpeg yang
+panjang tidak membuat memori terus bertambah.
+"""
+import subprocess
+import threading
+from collections import deque
+
+STDERR_TAIL_LINES = 200
+
+
+class FFmpegResult:
+    """Hasil ffmpeg dengan antarmuka seperti CompletedProcess (returncode, stderr)."""
+
+    __slots__ = ("args", "returncode", "stderr")
+
+    def __init__(self, args, returncode, stderr):
+        self.args = args
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+def _parse_out_time(values):
+    """out_time dalam detik dari blok progress (out_time_us / out_time_ms keduanya mikrodetik)."""
+    for key in ("out_time_us", "out_time_ms"):
+        value = values.get(key, "N/A")
+        if value.lstrip("-").isdigit():
+            return max(0.0, int(value) / 1_000_000)
+    return None
+
+
+def _parse_float(value):
+    try:
+        return float(value.rstrip("x"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def make_snapshot(values, duration=None):
+    """Mengubah satu blok key=value dari -progress menjadi dict progres."""
+    out_time = _parse_out_time(values)
+    speed = _parse_float(values.get("speed"))
+    snapshot = {
+        'out_time': out_time,
+        'fps': _parse_float(values.get("fps")),
+        'speed': speed,
+        'percent': None,
+        'eta': None,
+        'done': values.get("progress") == "end",
+    }
+    if duration and out_time is not None:
+        snapshot['percent'] = min(1.0, out_time / duration)
+        if speed:
+            snapshot['eta'] = max(0.0, (duration - out_time) / speed)
+    if snapshot['done']:
+        snapshot['percent'] = 1.0
+        snapshot['eta'] = 0.0
+    return snapshot
+
+
+def aggregate(snapshots, durations):
+    """
+    Progres gabungan beberapa scene. `snapshots` dan `durations` di-key dengan scene.
+    ETA dihitung dari sisa durasi media dibagi total speed scene yang sedang berjalan.
+    """
+    total = sum(durations.values())
+    processed = 0.0
+    remaining = 0.0
+    speed = 0.0
+    for scene, duration in durations.items():
+        snap = snapshots.get(scene)
+        out_time = min(duration, snap['out_time'] or 0.0) if snap else 0.0
+        if snap and snap['done']:
+            out_time = duration
+        processed += out_time
+        remaining += duration - out_time
+        if snap and not snap['done'] and snap['speed']:
+            speed += snap['speed']
+    return {
+        'percent': processed / total if total else 0.0,
+        'eta': remaining / speed if speed else None,
+        'speed': speed,
+    }
+
+
+def format_snapshot(snapshot):
+    """Teks ringkas untuk ditampilkan, mis. '45% • 120 fps • 2.1x • ETA 12s'."""
+    parts = []
+    if snapshot.get('percent') is not None:
+        parts.append(f"{snapshot['percent'] * 100:.0f}%")
+    if snapshot.get('fps'):
+        parts.append(f"{snapshot['fps']:.0f} fps")
+    if snapshot.get('speed'):
+        parts.append(f"{snapshot['speed']:.1f}x")
+    if snapshot.get('eta') is not None:
+        parts.append(f"ETA {snapshot['eta']:.0f}s")
+    return " • ".join(parts)
+
+
+def _drain(stream, tail):
+    for line in stream:
+        tail.append(line)
+    stream.close()
+
+
+def run(cmd, duration=None, on_progress=None, stderr_lines=STDERR_TAIL_LINES):
+    """
+    Menjalankan perintah ffmpeg (cmd[0] == "ffmpeg") dengan laporan progres.
+    `on_progress(snapshot)` dipanggil di thread pemanggil setiap blok progres.
+    """
+    full_cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    tail = deque(maxlen=stderr_lines)
+    proc = subprocess.Popen(
+        full_cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, encoding="utf-8", errors="replace"
+    )
+    drainer = threading.Thread(target=_drain, args=(proc.stderr, tail), daemon=True)
+    drainer.start()
+
+    values = {}
+    for line in proc.stdout:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        values[key] = value
+        if key == "progress":
+            if on_progress:
+                on_progress(make_snapshot(values, duration))
+            values = {}
+    proc.stdout.close()
+    returncode = proc.wait()
+    drainer.join()
+    return FFmpegResult(full_cmd, returncode, "".join(tail))
@@ -0,0 +1,252 @@
+"""
+Server file statis untuk hasil render dan preview.
+
+Browser mengambil video langsung dari server ini (mendukung Range, jadi bisa di-seek
+dan diputar sambil di-stream), sehingga Streamlit tidak perlu membaca file ke memori
+di setiap rerun. /zip/<root> membuat arsip ZIP semua file secara on-the-fly langsung
+ke socket (tanpa file sementara); memori server tetap datar berapa pun jumlah file.
+
+    /files/<root>/<nama>[?download=1]   satu file (download=1 -> attachment)
+    /zip/<root>[?name=hasil.zip]        semua file di root (termasuk subfolder) sebagai ZIP
+
+Secara default server hanya mendengarkan di 127.0.0.1 dan link-nya tidak dipakai
+(links_reachable() False): browser di mesin lain atau lewat port-forward (mis.
+devcontainer yang hanya meneruskan port Streamlit) tidak bisa membukanya, jadi
+aplikasi memakai st.video/st.download_button. Link dipakai jika server di balik
+reverse proxy (SHORTGEN_FILE_BASE_URL) atau SHORTGEN_FILE_HOST bukan loopback
+(mis. 0.0.0.0 agar bisa dibuka langsung dari jaringan). Root yang dibatasi (register_root dengan
+restricted=True) hanya membuka file yang sudah diizinkan dengan allow_file.
+"""
+import ipaddress
+import mimetypes
+import os
+import threading
+import zipfile
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from http_cache import parse_range_header
+
+HOST = os.environ.get("SHORTGEN_FILE_HOST", "127.0.0.1")
+PORT = int(os.environ.get("SHORTGEN_FILE_PORT", "8502"))
+# URL publik jika server berada di balik reverse proxy, mis. https://example.com/files-srv
+PUBLIC_BASE_URL = os.environ.get("SHORTGEN_FILE_BASE_URL", "").rstrip("/")
+CHUNK_SIZE = 256 * 1024
+
+_roots = {}
+# Root yang dibatasi: nama root -> nama file (relatif) yang boleh diakses
+_allowed = {}
+_server = None
+_server_lock = threading.Lock()
+
+
+def register_root(name, path, restricted=False):
+    """
+    Mendaftarkan folder yang boleh diakses lewat /files/<name>/ dan /zip/<name>.
+    restricted=True: hanya file yang diizinkan dengan allow_file (mis. folder cache
+    yang dipakai bersama banyak sesi). Mendaftarkan ulang tidak menghapus izin yang ada.
+    """
+    _roots[name] = os.path.abspath(path)
+    if restricted:
+        _allowed.setdefault(name, set())
+
+
+def allow_file(root, name):
+    """Mengizinkan satu file (path relatif terhadap root) di root yang dibatasi."""
+    _allowed.setdefault(root, set()).add(name)
+
+
+def resolve(root, name):
+    """
+    Path absolut file di dalam root, None jika root tidak dikenal, path keluar dari
+    root, atau file belum diizinkan di root yang dibatasi.
+    """
+    base = _roots.get(root)
+    if base is None:
+        return None
+    if root in _allowed and name not in _allowed[root]:
+        return None
+    path = os.path.abspath(os.path.join(base, name))
+    if os.path.commonpath([base, path]) != base or not os.path.isfile(path):
+        return None
+    return path
+
+
+def list_files(root):
+    """Semua file di bawah root (termasuk subfolder) sebagai path relatif berpemisah '/'."""
+    base = _roots.get(root)
+    if base is None or not os.path.isdir(base):
+        return []
+    if root in _allowed:
+        return sorted(name for name in set(_allowed[root]) if resolve(root, name))
+    names = []
+    for dirpath, _, filenames in os.walk(base):
+        rel = os.path.relpath(dirpath, base)
+        for name in filenames:
+            if not name.endswith(".tmp.mp4"):
+                names.append(name if rel == "." else os.path.join(rel, name).replace(os.sep, "/"))
+    return sorted(names)
+
+
+class _StreamWriter:
+    """File-like tanpa seek di atas socket: zipfile otomatis memakai data descriptor."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data):
+        self.wfile.write(data)
+        return len(data)
+
+    def flush(self):
+        self.wfile.flush()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._dispatch(head=True)
+
+    def do_GET(self):
+        self._dispatch(head=False)
+
+    def _dispatch(self, head):
+        parsed = urlparse(self.path)
+        parts = [unquote(p) for p in parsed.path.strip("/").split("/", 2)]
+        query = parse_qs(parsed.query)
+        try:
+            if len(parts) == 3 and parts[0] == "files":
+                self._serve_file(parts[1], parts[2], query, head)
+            elif len(parts) == 2 and parts[0] == "zip":
+                self._serve_zip(parts[1], query, head)
+            else:
+                self.send_error(404)
+        except (BrokenPipeError, ConnectionResetError):
+            # Browser berhenti membaca (mis. seek video), bukan error
+            self.close_connection = True
+
+    def _serve_file(self, root, name, query, head):
+        path = resolve(root, name)
+        if path is None:
+            self.send_error(404)
+            return
+        stat = os.stat(path)
+        size = stat.st_size
+        try:
+            requested = parse_range_header(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = requested or (0, size)
+        self.send_response(206 if requested else 200)
+        self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start))
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("Cache-Control", "no-cache")
+        if requested:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        if query.get("download"):
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(os.path.basename(path))}")
+        self.end_headers()
+        if head:
+            return
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def _serve_zip(self, root, query, head):
+        names = list_files(root)
+        if not names:
+            self.send_error(404)
+            return
+        archive_name = os.path.basename(query.get("name", [f"{root}.zip"])[0])
+        # Ukuran ZIP tidak diketahui di depan: koneksi ditutup di akhir arsip
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(archive_name)}")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        if head:
+            return
+
+        # Video sudah terkompresi, jadi disimpan apa adanya (ZIP_STORED) agar cepat
+        with zipfile.ZipFile(_StreamWriter(self.wfile), "w", compression=zipfile.ZIP_STORED) as archive:
+            for name in names:
+                path = resolve(root, name)
+                if path is None:
+                    continue
+                with open(path, "rb") as src, archive.open(name, "w", force_zip64=True) as dest:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+
+
+def start():
+    """Menjalankan server (sekali per proses). Mengembalikan True jika server berjalan."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((HOST, PORT), _Handler)
+            except OSError:
+                return False
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True, name="file-server").start()
+        return True
+
+
+def links_reachable():
+    """
+    True jika link server ini bisa dibuka browser pengguna: ada SHORTGEN_FILE_BASE_URL,
+    atau server mendengarkan di alamat selain loopback.
+    """
+    if PUBLIC_BASE_URL:
+        return True
+    try:
+        return not ipaddress.ip_address(HOST.strip("[]")).is_loopback
+    except ValueError:
+        return HOST != "localhost"
+
+
+def base_url(request_host=None, scheme="http"):
+    """
+    URL dasar yang bisa dibuka browser: SHORTGEN_FILE_BASE_URL jika diset, selain itu
+    host yang dipakai browser untuk membuka aplikasi (tanpa port) + PORT.
+    """
+    if PUBLIC_BASE_URL:
+        return PUBLIC_BASE_URL
+    host = request_host or "localhost"
+    if host.startswith("["):
+        host = host.split("]")[0] + "]"
+    else:
+        host = host.split(":")[0]
+    return f"{scheme}://{host}:{PORT}"
+
+
+def file_url(base, root, name, download=False):
+    url = f"{base}/files/{quote(root)}/{quote(name)}"
+    return url + "?download=1" if download else url
+
+
+def zip_url(base, root, archive_name):
+    return f"{base}/zip/{quote(root)}?name={quote(archive_name)}"
@@ -0,0 +1,325 @@
+"""
+Builder filtergraph untuk semua crop_mode, disusun dari spesifikasi layout.
+
+Layout = kanvas (W, H), background (None / warna / blur) dan daftar region.
+Setiap region punya rantai operasi "naif" terhadap frame sumber (mis. scale ke
+1920x1080 lalu crop piksel) dan kotak tujuan di kanvas. Sebelum dijadikan string
+ffmpeg, rantai itu melewati rewrite pass: crop dipindah sebelum scale (dalam
+koordinat pecahan eksak frame asli, fractions.Fraction) dan scale berturut-turut
+dilipat menjadi satu,
+sehingga setiap region hanya di-scale sekali langsung ke ukuran tujuannya.
+Komposisi dipilih yang paling sederhana: pad untuk background warna, vstack untuk
+region yang menumpuk penuh, overlay hanya jika memang perlu.
+chain_cost hanya menghitung piksel yang dibaca/ditulis scale, bukan waktu
+proses; tidak ada hasil ukur yang menunjukkan graph ini lebih cepat dari graph
+lama (benchmark.py bisa dipakai untuk mengukurnya di mesin dengan ffmpeg).
+
+Operasi rantai:
+    ('scale', w, h)             scale ke ukuran tetap
+    ('crop', fx, fy, fw, fh)    crop pecahan (0..1) dari frame saat ini
+    ('crop_px', x, y, w, h)     crop piksel, hanya setelah ukuran frame diketahui
+    ('cover', aw, ah)           crop tengah ke rasio aw:ah
+"""
+from fractions import Fraction
+
+# Ukuran input acuan untuk chain_cost (source landscape tipikal)
+REFERENCE_SIZE = (1920, 1080)
+
+LANDSCAPE_BLUR_MODE = "Potrait (Landscape Blur, Hitam, Putih)"
+STREAMER_MODE = "Potrait Streamer (Berat)"
+
+# Area facecam default (x, y, w, h) dalam piksel frame acuan 1920x1080: pojok kiri bawah
+DEFAULT_FACECAM = (20, 830, 150, 250)
+BG_COLORS = {"Hitam": "black", "Putih": "white"}
+
+
+def _even(value):
+    return max(2, int(round(value / 2.0)) * 2)
+
+
+def _exact(value):
+    """Pecahan eksak; float dibaca dari representasi desimalnya (0.3 -> 3/10)."""
+    return Fraction(repr(value)) if isinstance(value, float) else Fraction(value)
+
+
+def _frac(dim, value):
+    """
+    Ekspresi `dim*value` yang ringkas dengan rasio integer eksak (mis. ih*5/6, bukan
+    ih*0.833333 yang membuat crop 1-2 piksel terlalu kecil); 0 dan 1 tidak perlu dikalikan.
+    """
+    value = _exact(value)
+    if value == 0:
+        return "0"
+    if value == 1:
+        return dim
+    if value.denominator == 1:
+        return f"{dim}*{value.numerator}"
+    if value.numerator == 1:
+        return f"{dim}/{value.denominator}"
+    return f"{dim}*{value.numerator}/{value.denominator}"
+
+
+def _cover_fraction(aw, ah, size):
+    """Crop tengah ke rasio aw:ah sebagai pecahan dari frame berukuran size."""
+    w, h = (_exact(v) for v in size)
+    target = Fraction(aw, ah)
+    if w / h > target:
+        fw = (h * target) / w
+        return ((1 - fw) / 2, Fraction(0), fw, Fraction(1))
+    fh = (w / target) / h
+    return (Fraction(0), (1 - fh) / 2, Fraction(1), fh)
+
+
+def _compose(outer, inner):
+    """Crop pecahan `inner` diterapkan pada hasil crop pecahan `outer`."""
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return (ox + ix * ow, oy + iy * oh, iw * ow, ih * oh)
+
+
+def chain_cost(ops, in_size=REFERENCE_SIZE):
+    """
+    Jumlah piksel per frame yang dibaca dan ditulis scale dalam sebuah rantai
+    (crop hanya menggeser pointer, jadi tidak dihitung).
+    """
+    w, h = in_size
+    cost = 0
+    for op in ops:
+        kind = op[0]
+        if kind == "scale":
+            cost += w * h + op[1] * op[2]
+            w, h = op[1], op[2]
+        elif kind == "crop":
+            w, h = w * op[3], h * op[4]
+        elif kind == "crop_px":
+            w, h = op[3], op[4]
+        elif kind == "cover":
+            _, _, fw, fh = _cover_fraction(op[1], op[2], (w, h))
+            w, h = w * fw, h * fh
+    return cost
+
+
+def rewrite_chain(ops, in_size=REFERENCE_SIZE):
+    """
+    Rewrite pass: menormalkan rantai menjadi [cover?] [crop?] [scale?].
+    Crop setelah scale dipindah ke depan dalam koordinat pecahan, scale dilipat.
+    Hasil rewrite hanya dipakai jika chain_cost-nya tidak lebih besar.
+    """
+    cover = None
+    crop = None
+    size = None
+    for op in ops:
+        kind = op[0]
+        if kind == "scale":
+            size = (op[1], op[2])
+        elif kind == "cover":
+            if size is None and crop is None and cover is None:
+                cover = (op[1], op[2])
+                continue
+            if size is None:
+                raise ValueError("cover hanya boleh di awal rantai atau setelah scale")
+            frac = _cover_fraction(op[1], op[2], size)
+            crop = _compose(crop or (0, 0, 1, 1), frac)
+            size = (size[0] * frac[2], size[1] * frac[3])
+        elif kind in ("crop", "crop_px"):
+            if kind == "crop_px":
+                if size is None:
+                    raise ValueError("crop_px butuh ukuran frame yang diketahui (letakkan setelah scale)")
+                x, y, w, h = (_exact(v) for v in op[1:])
+                frac = (x / size[0], y / size[1], w / size[0], h / size[1])
+            else:
+                frac = tuple(_exact(v) for v in op[1:])
+            crop = _compose(crop or (0, 0, 1, 1), frac)
+            if size is not None:
+                size = (size[0] * frac[2], size[1] * frac[3])
+        else:
+            raise ValueError(f"Operasi filter tidak dikenal: {kind}")
+
+    rewritten = []
+    if cover:
+        rewritten.append(("cover",) + cover)
+    if crop and crop != (0, 0, 1, 1):
+        rewritten.append(("crop",) + crop)
+    if size:
+        rewritten.append(("scale", _even(size[0]), _even(size[1])))
+
+    if any(op[0] == "crop_px" for op in ops):
+        return rewritten
+    return rewritten if chain_cost(rewritten, in_size) <= chain_cost(ops, in_size) else list(ops)
+
+
+def chain_to_filters(ops):
+    """Mengubah rantai operasi (sudah di-rewrite) menjadi daftar filter ffmpeg."""
+    filters = []
+    for op in ops:
+        kind = op[0]
+        if kind == "scale":
+            filters.append(f"scale={op[1]}:{op[2]}")
+        elif kind == "crop":
+            _, fx, fy, fw, fh = op
+            filters.append(
+                f"crop=w={_frac('iw', fw)}:h={_frac('ih', fh)}:x={_frac('iw', fx)}:y={_frac('ih', fy)}"
+            )
+        elif kind == "cover":
+            _, aw, ah = op
+            filters.append(
+                f"crop=w='min(iw,ih*{aw}/{ah})':h='min(ih,iw*{ah}/{aw})':x=(iw-ow)/2:y=(ih-oh)/2"
+            )
+        else:
+            raise ValueError(f"Operasi {kind} harus di-rewrite dulu sebelum dijadikan filter")
+    return filters
+
+
+def region(ops, dest, flags=None):
+    """
+    Satu region layout: rantai operasi terhadap frame sumber dan kotak tujuan (x, y, w, h).
+    `flags` opsional untuk scale terakhir (mis. "bilinear" untuk upscale area kecil).
+    """
+    return {'ops': list(ops), 'dest': dest, 'flags': flags}
+
+
+def validate_facecam(facecam):
+    """Memastikan area facecam (x, y, w, h) berada di dalam frame acuan 1920x1080."""
+    x, y, w, h = (int(v) for v in facecam)
+    ref_w, ref_h = REFERENCE_SIZE
+    if w < 16 or h < 16:
+        raise ValueError("Area facecam terlalu kecil (minimal 16x16 piksel)!")
+    if x < 0 or y < 0 or x + w > ref_w or y + h > ref_h:
+        raise ValueError(f"Area facecam di luar frame {ref_w}x{ref_h}!")
+    return (x, y, w, h)
+
+
+def layout_for(crop_mode, bg_mode=None, facecam=None):
+    """
+    Spesifikasi layout untuk crop_mode. Mengembalikan None jika mode tidak perlu filter.
+    `facecam` (x, y, w, h dalam piksel frame 1920x1080) hanya untuk mode Streamer.
+    """
+    if crop_mode == "Potrait (9:16 TikTok Mode)":
+        return {
+            'canvas': (1080, 1920),
+            'background': None,
+            'regions': [region([("cover", 9, 16)], (0, 0, 1080, 1920))],
+        }
+
+    if crop_mode == STREAMER_MODE:
+        # Koordinat facecam relatif ke frame 1920x1080, setelah rewrite keduanya menjadi
+        # crop pecahan langsung dari frame asli dan hanya di-scale sekali ke tujuan
+        fx, fy, fw, fh = validate_facecam(facecam or DEFAULT_FACECAM)
+        return {
+            'canvas': (1080, 1920),
+            'background': None,
+            'regions': [
+                region([("scale", 1920, 1080), ("crop_px", 0, 0, 1920, 900)], (0, 0, 1080, 1000)),
+                region([("scale", 1920, 1080), ("crop_px", fx, fy, fw, fh)], (0, 1000, 1080, 920),
+                       flags="bilinear"),
+            ],
+        }
+
+    if crop_mode == "Potrait Left-Right to Up-Bottom":
+        return {
+            'canvas': (1080, 1920),
+            'background': None,
+            'regions': [
+                region([("crop", 0.0, 0.0, 0.5, 1.0)], (0, 0, 1080, 960)),
+                region([("crop", 0.5, 0.0, 0.5, 1.0)], (0, 960, 1080, 960)),
+            ],
+        }
+
+    if crop_mode == LANDSCAPE_BLUR_MODE:
+        if bg_mode in ("Blur", "Blur (Berat)"):
+            background = {'blur': {'downscale': 8, 'radius': 4, 'power': 3}}
+        elif bg_mode in BG_COLORS:
+            background = {'color': BG_COLORS[bg_mode]}
+        else:
+            raise ValueError("Mode background tidak dikenali!")
+        return {
+            'canvas': (1080, 1920),
+            'background': background,
+            'regions': [region([], (0, 560, 1080, 800))],
+        }
+
+    return None
+
+
+def _is_vertical_stack(regions, canvas):
+    W, H = canvas
+    y = 0
+    for r in regions:
+        x, ry, w, h = r['dest']
+        if x != 0 or w != W or ry != y:
+            return False
+        y += h
+    return y == H
+
+
+def build_graph(layout, src="0:v", out="out", tag=""):
+    """Menyusun string filtergraph dari layout, dari label `src` ke label `out`."""
+    W, H = layout['canvas']
+    background = layout['background'] or {}
+    regions = layout['regions']
+
+    chains = []
+    for r in regions:
+        _, _, w, h = r['dest']
+        filters = chain_to_filters(rewrite_chain(r['ops'] + [("scale", w, h)]))
+        if r.get('flags') and filters[-1].startswith("scale="):
+            filters[-1] += f":flags={r['flags']}"
+        chains.append(",".join(filters + ["setsar=1"]))
+
+    uses_source = len(regions) + (1 if 'blur' in background else 0)
+    parts = []
+    if uses_source > 1:
+        labels = [f"[in{i}{tag}]" for i in range(uses_source)]
+        parts.append(f"[{src}]split={uses_source}" + "".join(labels))
+    else:
+        labels = [f"[{src}]"]
+
+    # 1) Satu region memenuhi kanvas tanpa background: cukup satu rantai
+    if not background and len(regions) == 1 and regions[0]['dest'] == (0, 0, W, H):
+        parts.append(f"{labels[0]}{chains[0]}[{out}]")
+        return ";".join(parts)
+
+    # 2) Background warna + satu region: cukup pad, tanpa source color + overlay
+    if 'color' in background and len(regions) == 1:
+        x, y, _, _ = regions[0]['dest']
+        parts.append(f"{labels[0]}{chains[0]},pad={W}:{H}:{x}:{y}:color={background['color']}[{out}]")
+        return ";".join(parts)
+
+    region_labels = [f"[r{i}{tag}]" for i in range(len(regions))]
+    for label, chain, region_out in zip(labels, chains, region_labels):
+        parts.append(f"{label}{chain}{region_out}")
+
+    # 3) Region menumpuk vertikal selebar kanvas: vstack
+    if not background and _is_vertical_stack(regions, (W, H)):
+        parts.append("".join(region_labels) + f"vstack=inputs={len(regions)}[{out}]")
+        return ";".join(parts)
+
+    # 4) Kasus umum: overlay region satu per satu di atas background
+    if 'blur' in background:
+        blur = background['blur']
+        bw, bh = _even(W / blur['downscale']), _even(H / blur['downscale'])
+        # Blur dikerjakan di resolusi 1/downscale lalu di-upscale; tampilannya mirip,
+        # tidak identik, dengan boxblur di resolusi penuh
+        parts.append(
+            f"{labels[-1]}scale={bw}:{bh}:force_original_aspect_ratio=increase:flags=fast_bilinear,"
+            f"crop={bw}:{bh},boxblur={blur['radius']}:{blur['power']},"
+            f"scale={W}:{H}:flags=bilinear,setsar=1[bg{tag}]"
+        )
+    else:
+        parts.append(f"color=c={background.get('color', 'black')}:s={W}x{H}[bg{tag}]")
+
+    current = f"[bg{tag}]"
+    for i, (r, region_out) in enumerate(zip(regions, region_labels)):
+        x, y, _, _ = r['dest']
+        target = f"[{out}]" if i == len(regions) - 1 else f"[ov{i}{tag}]"
+        parts.append(f"{current}{region_out}overlay={x}:{y}:shortest=1{target}")
+        current = target
+    return ";".join(parts)
+
+
+def graph_for_mode(crop_mode, bg_mode=None, src="0:v", out="out", tag="", facecam=None):
+    """Filtergraph untuk crop_mode (None jika mode tidak memerlukan filter)."""
+    layout = layout_for(crop_mode, bg_mode, facecam=facecam)
+    if layout is None:
+        return None
+    return build_graph(layout, src=src, out=out, tag=tag)
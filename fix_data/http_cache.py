@@ -0,0 +1,571 @@
+"""
+Cache HTTP lokal untuk source URL langsung.
+
+ffmpeg/ffprobe tidak membaca URL asli, tetapi URL server kecil di 127.0.0.1
+(lihat local_url). Server meneruskan request Range ke server asli dan menyimpan
+setiap range byte yang diterima ke disk per URL: satu file sparse berukuran
+penuh + daftar range yang sudah ada (range yang bertumpuk/berdampingan digabung).
+Preview, probe dan potongan berulang dari video yang sama dibaca dari disk.
+
+Identitas URL memakai cache_utils.source_fingerprint (URL kanonik tanpa tanda
+tangan), sehingga URL yang ditandatangani ulang tetap memakai cache yang sama.
+Server asli yang tidak mendukung range cukup diteruskan apa adanya tanpa cache.
+ETag/Last-Modified server asli dicek ulang sekali per proses (dan setiap kali
+ukuran di Content-Range berbeda); jika berubah, range yang tersimpan dibuang.
+"""
+import contextlib
+import json
+import os
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+
+from cache_utils import CACHE_DIR, atomic_write_text, source_fingerprint
+
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+ENABLED = os.environ.get("SHORTGEN_HTTP_CACHE", "1") != "0"
+MAX_CACHE_BYTES = int(os.environ.get("SHORTGEN_HTTP_CACHE_MB", "4096")) * 1024 * 1024
+
+CHUNK_SIZE = 256 * 1024
+# Daftar range disimpan ke disk setiap kali sebanyak ini byte baru masuk
+SAVE_EVERY_BYTES = 8 * 1024 * 1024
+# Header container (moov/index) biasanya di awal, kadang di akhir file
+HEADER_PREFETCH_BYTES = 2 * 1024 * 1024
+UPSTREAM_TIMEOUT = 15
+# ffmpeg membuka request baru setiap seek, jadi entry yang baru selesai dibaca
+# masih dianggap dipakai selama ini (detik) dan tidak di-evict
+READ_GRACE_SECONDS = 60
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+_entries = {}
+_entries_lock = threading.Lock()
+_server = None
+_server_lock = threading.Lock()
+_evict_lock = threading.Lock()
+_session = requests.Session()
+
+
+class ContentChanged(Exception):
+    """Isi file di server asli berubah (ETag/Last-Modified/ukuran) saat sedang dibaca."""
+
+
+class UpstreamError(Exception):
+    """Server asli membalas dengan status error (mis. 403/410 untuk URL kedaluwarsa)."""
+
+    def __init__(self, status, message=""):
+        super().__init__(message or f"HTTP {status}")
+        self.status = status
+
+
+def merge_range(ranges, start, end):
+    """Menambahkan [start, end) ke daftar range terurut, menggabungkan yang bertumpuk/berdampingan."""
+    merged = []
+    placed = False
+    for s, e in ranges:
+        if e < start:
+            merged.append([s, e])
+        elif s > end:
+            if not placed:
+                merged.append([start, end])
+                placed = True
+            merged.append([s, e])
+        else:
+            start, end = min(s, start), max(e, end)
+    if not placed:
+        merged.append([start, end])
+    return merged
+
+
+def missing_ranges(ranges, start, end):
+    """Bagian dari [start, end) yang belum ada di daftar range."""
+    gaps = []
+    pos = start
+    for s, e in ranges:
+        if e <= pos:
+            continue
+        if s >= end:
+            break
+        if s > pos:
+            gaps.append((pos, s))
+        pos = max(pos, e)
+        if pos >= end:
+            break
+    if pos < end:
+        gaps.append((pos, end))
+    return gaps
+
+
+def parse_range_header(header, size):
+    """
+    Mengurai header Range (hanya range pertama) menjadi (start, end) eksklusif.
+    None jika tidak ada Range, ValueError jika range tidak bisa dipenuhi.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].split(",")[0].strip()
+    first, _, last = spec.partition("-")
+    if first == "":
+        length = int(last)
+        if length <= 0:
+            raise ValueError(header)
+        return max(0, size - length), size
+    start = int(first)
+    end = size if last == "" else min(int(last) + 1, size)
+    if start >= size or end <= start:
+        raise ValueError(header)
+    return start, end
+
+
+class CacheEntry:
+    """Cache byte satu URL: file data sparse + meta.json (ukuran, content type, range)."""
+
+    def __init__(self, key, url):
+        self.key = key
+        self.url = url
+        self.dir = os.path.join(HTTP_CACHE_DIR, key)
+        self.data_path = os.path.join(self.dir, "data")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock = threading.Lock()
+        # Status error terakhir dari server asli (403/410 = URL bertanda tangan kedaluwarsa)
+        self.last_status = None
+        # Validator meta.json sudah dicocokkan dengan server asli di proses ini
+        self.validated = False
+        # Jumlah request yang sedang membaca entry ini dan kapan terakhir selesai dibaca
+        self.readers = 0
+        self.last_read = float("-inf")
+        self.meta = self._load_meta()
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get('size') is None or os.path.exists(self.data_path):
+                return meta
+        except (OSError, ValueError):
+            pass
+        return {'size': None, 'content_type': None, 'ranges': [], 'ranged': None,
+                'etag': None, 'last_modified': None}
+
+    def _save_meta(self):
+        atomic_write_text(self.meta_path, json.dumps(self.meta))
+
+    def cached_bytes(self):
+        return sum(e - s for s, e in self.meta['ranges'])
+
+    @contextlib.contextmanager
+    def reading(self):
+        """Menandai entry sedang dibaca (lihat in_use) selama blok with."""
+        with self.lock:
+            self.readers += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.readers -= 1
+                self.last_read = time.monotonic()
+
+    def in_use(self):
+        """True jika entry sedang dibaca atau baru saja selesai dibaca (READ_GRACE_SECONDS)."""
+        with self.lock:
+            return self.readers > 0 or time.monotonic() - self.last_read < READ_GRACE_SECONDS
+
+    def _check_validators(self, size, etag, last_modified):
+        """
+        Membandingkan ukuran dan validator dari server asli dengan meta.json (lock sudah dipegang).
+        Jika ada yang berubah, range yang tersimpan dibuang. Mengembalikan True jika berubah.
+        """
+        meta = self.meta
+        changed = meta['size'] != size or any(
+            meta.get(name) is not None and value is not None and meta.get(name) != value
+            for name, value in (('etag', etag), ('last_modified', last_modified))
+        )
+        if changed:
+            meta['ranges'] = []
+        meta['size'] = size
+        meta['etag'] = etag
+        meta['last_modified'] = last_modified
+        return changed
+
+    def _request(self, headers=None, stream=True):
+        headers = dict(headers or {})
+        headers.setdefault("User-Agent", USER_AGENT)
+        response = _session.get(self.url, headers=headers, stream=stream,
+                                timeout=UPSTREAM_TIMEOUT, allow_redirects=True)
+        if response.status_code >= 400:
+            self.last_status = response.status_code
+            response.close()
+            raise UpstreamError(response.status_code, f"Server asli membalas HTTP {response.status_code}")
+        return response
+
+    def ensure_meta(self):
+        """
+        Ukuran total, content type dan validator dari server asli. Dicek sekali per
+        proses (lagi jika URL diganti atau isinya berubah), selanjutnya dari meta.json.
+        """
+        with self.lock:
+            if self.meta['ranged'] is not None and self.validated:
+                return self.meta
+        response = self._request({"Range": "bytes=0-0"})
+        try:
+            content_type = response.headers.get("Content-Type", "application/octet-stream")
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            ranged = response.status_code == 206 and total.isdigit()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        finally:
+            response.close()
+
+        with self.lock:
+            self.meta['content_type'] = content_type
+            self.meta['ranged'] = ranged
+            self.validated = True
+            if ranged:
+                size = int(total)
+                # Ukuran/ETag/Last-Modified berubah: isi cache lama tidak bisa dipercaya lagi
+                self._check_validators(size, etag, last_modified)
+                os.makedirs(self.dir, exist_ok=True)
+                with open(self.data_path, "ab") as f:
+                    f.truncate(size)
+            self._save_meta()
+            return self.meta
+
+    def _add_range(self, start, end, save):
+        with self.lock:
+            self.meta['ranges'] = merge_range(self.meta['ranges'], start, end)
+            if save:
+                self._save_meta()
+
+    def _ensure_data_file(self):
+        """Membuat ulang file data sparse yang hilang (mis. dihapus kuota workspace); range lama dibuang."""
+        with self.lock:
+            if os.path.exists(self.data_path):
+                return
+            self.meta['ranges'] = []
+            os.makedirs(self.dir, exist_ok=True)
+            with open(self.data_path, "wb") as f:
+                f.truncate(self.meta['size'])
+            self._save_meta()
+
+    def _fetch(self, start, end):
+        """Mengambil [start, end) dari server asli, menulis ke cache sambil meneruskan chunk."""
+        self._ensure_data_file()
+        response = self._request({"Range": f"bytes={start}-{end - 1}"})
+        pos = start
+        unsaved = 0
+        try:
+            if response.status_code != 206:
+                raise UpstreamError(response.status_code, "Server asli mengabaikan header Range")
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            with self.lock:
+                size = int(total) if total.isdigit() else self.meta['size']
+                changed = self._check_validators(
+                    size, response.headers.get("ETag", self.meta.get('etag')),
+                    response.headers.get("Last-Modified", self.meta.get('last_modified'))
+                )
+                if changed:
+                    # Byte yang sudah dikirim ke pembaca berasal dari versi lama;
+                    # cache dikosongkan dan request ini dihentikan
+                    self.validated = False
+                    self._save_meta()
+            if changed:
+                raise ContentChanged(f"Isi {self.url} berubah di server asli")
+            with open(self.data_path, "r+b") as f:
+                f.seek(start)
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    chunk = chunk[:end - pos]
+                    f.write(chunk)
+                    f.flush()
+                    unsaved += len(chunk)
+                    self._add_range(pos, pos + len(chunk), save=unsaved >= SAVE_EVERY_BYTES)
+                    if unsaved >= SAVE_EVERY_BYTES:
+                        unsaved = 0
+                    pos += len(chunk)
+                    yield chunk
+                    if pos >= end:
+                        break
+        finally:
+            response.close()
+            if unsaved:
+                with self.lock:
+                    self._save_meta()
+
+    def _read_cached(self, start, end):
+        """
+        Byte [start, end) dari disk. Jika file data hilang atau terpotong, sisanya
+        dianggap belum di-cache dan diambil dari server asli.
+        """
+        pos = start
+        try:
+            with open(self.data_path, "rb") as f:
+                f.seek(start)
+                while pos < end:
+                    chunk = f.read(min(CHUNK_SIZE, end - pos))
+                    if not chunk:
+                        break
+                    pos += len(chunk)
+                    yield chunk
+        except FileNotFoundError:
+            pass
+        if pos < end:
+            yield from self._fetch(pos, end)
+
+    def read(self, start, end):
+        """Generator byte [start, end): bagian yang sudah ada dari disk, sisanya dari server asli."""
+        with self.lock:
+            gaps = missing_ranges(self.meta['ranges'], start, end)
+        pos = start
+        for gap_start, gap_end in gaps:
+            if pos < gap_start:
+                yield from self._read_cached(pos, gap_start)
+            yield from self._fetch(gap_start, gap_end)
+            pos = gap_end
+        if pos < end:
+            yield from self._read_cached(pos, end)
+        touch(self.dir)
+
+    def passthrough(self, range_header=None):
+        """Response server asli apa adanya (untuk server yang tidak mendukung range)."""
+        return self._request({"Range": range_header} if range_header else None)
+
+
+def touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head):
+        key = self.path.lstrip("/").split("/")[0].split(".")[0]
+        with _entries_lock:
+            entry = _entries.get(key)
+            if entry is not None:
+                # Ditandai dibaca di dalam _entries_lock agar evict tidak menghapusnya di antara
+                with entry.lock:
+                    entry.readers += 1
+        if entry is None:
+            self.send_error(404)
+            return
+        try:
+            self._serve_entry(entry, head)
+        finally:
+            with entry.lock:
+                entry.readers -= 1
+                entry.last_read = time.monotonic()
+
+    def _serve_entry(self, entry, head):
+        try:
+            meta = entry.ensure_meta()
+        except UpstreamError as e:
+            self.send_error(e.status, str(e))
+            return
+        except requests.RequestException as e:
+            self.send_error(502, str(e))
+            return
+
+        if not meta['ranged']:
+            self._serve_passthrough(entry, head)
+            return
+
+        size = meta['size']
+        try:
+            requested = parse_range_header(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = requested or (0, size)
+        self.send_response(206 if requested else 200)
+        self.send_header("Content-Type", meta['content_type'])
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start))
+        if requested:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        self.end_headers()
+        if head:
+            return
+
+        try:
+            for chunk in entry.read(start, end):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg menutup koneksi setelah cukup membaca, bagian yang sudah masuk tetap di cache
+            pass
+        except (UpstreamError, ContentChanged, requests.RequestException, OSError):
+            self.close_connection = True
+
+    def _serve_passthrough(self, entry, head):
+        try:
+            response = entry.passthrough(self.headers.get("Range"))
+        except UpstreamError as e:
+            self.send_error(e.status, str(e))
+            return
+        except requests.RequestException as e:
+            self.send_error(502, str(e))
+            return
+        try:
+            self.send_response(response.status_code)
+            for header in ("Content-Type", "Content-Length", "Content-Range", "Accept-Ranges"):
+                if header in response.headers:
+                    self.send_header(header, response.headers[header])
+            if "Content-Length" not in response.headers:
+                self.close_connection = True
+            self.end_headers()
+            if head:
+                return
+            for chunk in response.iter_content(CHUNK_SIZE):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError, requests.RequestException):
+            self.close_connection = True
+        finally:
+            response.close()
+
+
+def _ensure_server():
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True, name="http-cache").start()
+        return _server
+
+
+def register(url):
+    """Mendaftarkan URL ke cache. URL yang ditandatangani ulang memperbarui entry yang sama."""
+    key = source_fingerprint(url)
+    with _entries_lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = _entries[key] = CacheEntry(key, url)
+        elif entry.url != url:
+            entry.url = url
+            entry.last_status = None
+            entry.validated = False
+    return entry
+
+
+def cache_dir_for(url):
+    """Folder cache di disk untuk URL asli (ada atau belum)."""
+    return os.path.join(HTTP_CACHE_DIR, source_fingerprint(url))
+
+
+def entry_for(local):
+    """Entry cache di balik URL lokal hasil local_url(), None jika bukan URL lokal."""
+    with _server_lock:
+        if _server is None:
+            return None
+        host, port = _server.server_address[:2]
+    prefix = f"http://{host}:{port}/"
+    if not local.startswith(prefix):
+        return None
+    key = local[len(prefix):].split("/")[0].split(".")[0]
+    with _entries_lock:
+        return _entries.get(key)
+
+
+def local_url(url):
+    """URL 127.0.0.1 yang dibaca ffmpeg sebagai pengganti `url`."""
+    entry = register(url)
+    host, port = _ensure_server().server_address[:2]
+    ext = os.path.splitext(urlparse(url).path)[1]
+    suffix = ext if 0 < len(ext) <= 5 else ""
+    return f"http://{host}:{port}/{entry.key}{suffix}"
+
+
+def _prefetch(entry):
+    try:
+        with entry.reading():
+            meta = entry.ensure_meta()
+            if not meta['ranged']:
+                return
+            size = meta['size']
+            for start, end in ((0, min(HEADER_PREFETCH_BYTES, size)),
+                               (max(0, size - HEADER_PREFETCH_BYTES), size)):
+                for _ in entry.read(start, end):
+                    pass
+        evict(keep=entry.key)
+    except (UpstreamError, ContentChanged, requests.RequestException, OSError):
+        pass
+
+
+def prefetch_header(url):
+    """Mengambil awal dan akhir file (header/index container) di background thread."""
+    entry = register(url)
+    thread = threading.Thread(target=_prefetch, args=(entry,), daemon=True, name="http-cache-prefetch")
+    thread.start()
+    return thread
+
+
+def discard(key):
+    """
+    Menghapus satu entry cache dari disk dan dari daftar entry proses ini (dipakai
+    kuota workspace). Entry yang sedang dibaca tidak dihapus; mengembalikan False.
+    """
+    with _evict_lock, _entries_lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if entry.in_use():
+                return False
+            del _entries[key]
+        shutil.rmtree(os.path.join(HTTP_CACHE_DIR, key), ignore_errors=True)
+    return True
+
+
+def evict(max_bytes=None, keep=None):
+    """
+    Menghapus cache URL yang paling lama tidak dipakai sampai total byte <= max_bytes.
+    Entry yang sedang dibaca (CacheEntry.in_use) dilewati; entry yang dihapus juga
+    dibuang dari daftar entry proses ini.
+    """
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    with _evict_lock:
+        if not os.path.isdir(HTTP_CACHE_DIR):
+            return
+        entries = []
+        for key in os.listdir(HTTP_CACHE_DIR):
+            path = os.path.join(HTTP_CACHE_DIR, key)
+            try:
+                with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                    ranges = json.load(f).get('ranges', [])
+                mtime = os.stat(path).st_mtime
+            except (OSError, ValueError):
+                continue
+            entries.append((mtime, sum(e - s for s, e in ranges), key, path))
+
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, key, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if key == keep:
+                continue
+            with _entries_lock:
+                entry = _entries.get(key)
+                if entry is not None:
+                    if entry.in_use():
+                        continue
+                    del _entries[key]
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,128 @@
+"""
+Antrean job render di background. Satu antrean (dan satu pool worker) dipakai
+bersama oleh semua sesi Streamlit dalam proses server yang sama, sehingga render
+tidak memblokir script run dan tetap berjalan walau browser di-refresh.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_utils import remove_paths
+
+# Job yang sudah selesai lebih lama dari ini dibuang dari memori
+FINISHED_JOB_TTL = 6 * 3600
+# Placeholder folder kerja sementara di path job scene; diganti runner dengan folder
+# baru di setiap percobaan (lihat process._render_job), jadi percobaan ulang tidak berbagi file
+SCRATCH_TOKEN = "{scratch}"
+
+
+def command_inputs(cmd):
+    """Argumen -i satu perintah ffmpeg (tanpa path folder kerja sementara)."""
+    return [arg for i, arg in enumerate(cmd) if i > 0 and cmd[i - 1] == "-i" and SCRATCH_TOKEN not in arg]
+
+
+def scene_job_paths(scene_job):
+    """Input (argumen -i, termasuk pre_cmds) dan output satu job scene; dipakai untuk kuota disk."""
+    paths = [scene_job['output']]
+    for cmd in [scene_job['cmd'], *scene_job.get('pre_cmds', [])]:
+        paths += command_inputs(cmd)
+    return paths
+
+
+def scene_sort_key(result):
+    """Kunci urut hasil per nomor scene (numerik: 2 sebelum 10); scene non-angka di belakang."""
+    scene = result['scene']
+    if isinstance(scene, int):
+        return (0, scene, "")
+    return (1, 0, str(scene))
+
+
+class JobQueue:
+    """
+    Menjalankan job (kumpulan scene) dengan pool worker bersama.
+    `runner(scene_job, on_progress)` harus mengembalikan dict hasil dengan kunci
+    'scene', 'output', 'ok', 'log', dan memanggil on_progress(snapshot) selama render.
+    """
+
+    def __init__(self, runner, max_workers):
+        self._runner = runner
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, scene_jobs, label="", cleanup=()):
+        """Mengirim daftar scene sebagai satu job. Mengembalikan ID job."""
+        self.prune()
+        job_id = uuid.uuid4().hex[:12]
+        record = {
+            'id': job_id,
+            'label': label,
+            'created': time.time(),
+            'finished': None,
+            'total': len(scene_jobs),
+            'running': 0,
+            'results': [],
+            'progress': {},
+            'durations': {j['scene']: j.get('duration') or 0.0 for j in scene_jobs},
+            'status': 'queued',
+            'cleanup': list(cleanup),
+            'paths': sorted({path for j in scene_jobs for path in scene_job_paths(j)}),
+        }
+        with self._lock:
+            self._jobs[job_id] = record
+        if not scene_jobs:
+            self._finish(record)
+        for scene_job in scene_jobs:
+            self._pool.submit(self._run_scene, record, scene_job)
+        return job_id
+
+    def _run_scene(self, record, scene_job):
+        with self._lock:
+            record['status'] = 'running'
+            record['running'] += 1
+        scene = scene_job.get('scene')
+
+        def on_progress(snapshot):
+            with self._lock:
+                record['progress'][scene] = snapshot
+
+        try:
+            result = self._runner(scene_job, on_progress)
+        except Exception as e:
+            result = {'scene': scene_job.get('scene'), 'output': scene_job.get('output'), 'ok': False, 'log': str(e)}
+        with self._lock:
+            record['running'] -= 1
+            record['results'].append(result)
+            done = len(record['results']) == record['total']
+        if done:
+            self._finish(record)
+
+    def _finish(self, record):
+        remove_paths(record['cleanup'])
+        with self._lock:
+            record['finished'] = time.time()
+            record['status'] = 'done' if all(r['ok'] for r in record['results']) else 'failed'
+
+    def status(self, job_id):
+        """Salinan status job (None jika ID tidak dikenal)."""
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                return None
+            snapshot = dict(record)
+            snapshot['results'] = sorted(record['results'], key=scene_sort_key)
+            snapshot['progress'] = dict(record['progress'])
+        return snapshot
+
+    def active_paths(self):
+        """Input/output semua job yang belum selesai (lihat scene_job_paths)."""
+        with self._lock:
+            return {path for r in self._jobs.values() if r['finished'] is None for path in r['paths']}
+
+    def prune(self, max_age=FINISHED_JOB_TTL):
+        """Membuang job yang sudah lama selesai."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            for job_id in [j for j, r in self._jobs.items() if r['finished'] and r['finished'] < cutoff]:
+                del self._jobs[job_id]
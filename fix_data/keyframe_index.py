@@ -0,0 +1,155 @@
+"""
+Index keyframe per source: timestamp, byte offset dan ukuran GOP.
+Dibangun sekali dengan ffprobe (output di-stream baris per baris, sehingga VOD
+berjam-jam tidak perlu ditampung di memori) lalu disimpan di disk per source.
+Timestamp disimpan relatif terhadap start_time container, sama dengan -ss ffmpeg.
+"""
+import bisect
+import json
+import os
+import subprocess
+
+from cache_utils import CACHE_DIR, atomic_write_text, source_fingerprint
+
+INDEX_DIR = os.path.join(CACHE_DIR, "keyframes")
+INDEX_VERSION = 2
+
+
+class KeyframeIndex:
+    """Daftar keyframe terurut beserta posisi byte dan ukuran GOP setelahnya."""
+
+    __slots__ = ("times", "positions", "gop_packets", "gop_bytes", "duration")
+
+    def __init__(self, times, positions, gop_packets, gop_bytes, duration):
+        self.times = times
+        self.positions = positions
+        self.gop_packets = gop_packets
+        self.gop_bytes = gop_bytes
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.times)
+
+    def before(self, seconds):
+        """Keyframe terakhir <= seconds (None jika tidak ada)."""
+        i = bisect.bisect_right(self.times, seconds + 1e-6)
+        return self.times[i - 1] if i else None
+
+    def after(self, seconds):
+        """Keyframe pertama >= seconds (None jika tidak ada)."""
+        i = bisect.bisect_left(self.times, seconds - 1e-6)
+        return self.times[i] if i < len(self.times) else None
+
+    def nearest(self, seconds):
+        """Keyframe terdekat dari seconds."""
+        candidates = [t for t in (self.before(seconds), self.after(seconds)) if t is not None]
+        return min(candidates, key=lambda t: abs(t - seconds)) if candidates else None
+
+    def between(self, start, end):
+        """Semua keyframe di rentang [start, end]."""
+        lo = bisect.bisect_left(self.times, start - 1e-6)
+        hi = bisect.bisect_right(self.times, end + 1e-6)
+        return self.times[lo:hi]
+
+    def snap(self, seconds, direction="nearest"):
+        """Menggeser waktu ke keyframe: 'before', 'after' atau 'nearest'."""
+        snapped = {"before": self.before, "after": self.after}.get(direction, self.nearest)(seconds)
+        return seconds if snapped is None else snapped
+
+    def to_dict(self):
+        return {
+            "version": INDEX_VERSION,
+            "times": self.times,
+            "positions": self.positions,
+            "gop_packets": self.gop_packets,
+            "gop_bytes": self.gop_bytes,
+            "duration": self.duration,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["times"], data["positions"], data["gop_packets"], data["gop_bytes"], data["duration"])
+
+
+def index_path(source):
+    """Lokasi file index untuk source (berdasarkan source_fingerprint)."""
+    return os.path.join(INDEX_DIR, source_fingerprint(source) + ".json")
+
+
+def load_index(source):
+    """Memuat index dari disk. Mengembalikan None jika belum ada atau rusak."""
+    try:
+        with open(index_path(source), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION:
+        return None
+    return KeyframeIndex.from_dict(data)
+
+
+def build_index(source, probe_args=()):
+    """
+    Membangun index keyframe dengan membaca daftar paket video via ffprobe.
+    `probe_args` adalah argumen tambahan sebelum input (mis. opsi reconnect URL).
+    """
+    cmd = ["ffprobe", "-v", "error", *probe_args,
+           "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,dts_time,pos,size,flags:format=start_time",
+           "-of", "csv=p=0", source]
+
+    times, positions, gop_packets, gop_bytes = [], [], [], []
+    last_time = 0.0
+    start_time = 0.0
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        for line in proc.stdout:
+            fields = line.strip().split(",")
+            if len(fields) == 1:
+                # Baris section format (setelah semua paket): start_time container
+                try:
+                    start_time = float(fields[0])
+                except ValueError:
+                    pass
+                continue
+            if len(fields) < 5:
+                continue
+            pts_time, dts_time, size, pos, flags = fields[:5]
+            t_str = pts_time if pts_time not in ("", "N/A") else dts_time
+            if t_str in ("", "N/A"):
+                continue
+            t = float(t_str)
+            last_time = max(last_time, t)
+            if "K" in flags:
+                times.append(t)
+                positions.append(int(pos) if pos.isdigit() else -1)
+                gop_packets.append(0)
+                gop_bytes.append(0)
+            if gop_packets:
+                gop_packets[-1] += 1
+                gop_bytes[-1] += int(size) if size.isdigit() else 0
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+
+    if returncode != 0 or not times:
+        raise RuntimeError(f"ffprobe gagal membangun index keyframe untuk {source}")
+
+    # Paket dibaca dalam urutan decode; pastikan keyframe terurut berdasarkan waktu
+    order = sorted(range(len(times)), key=times.__getitem__)
+    return KeyframeIndex(
+        [times[i] - start_time for i in order],
+        [positions[i] for i in order],
+        [gop_packets[i] for i in order],
+        [gop_bytes[i] for i in order],
+        last_time - start_time,
+    )
+
+
+def get_index(source, probe_args=(), build=True):
+    """Index dari cache disk; dibangun dan disimpan jika belum ada dan build=True."""
+    index = load_index(source)
+    if index is None and build:
+        index = build_index(source, probe_args)
+        atomic_write_text(index_path(source), json.dumps(index.to_dict(), separators=(",", ":")))
+    return index
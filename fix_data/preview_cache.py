@@ -0,0 +1,78 @@
+"""
+Cache preview berbasis konten: setiap preview disimpan dengan kunci dari
+(fingerprint source, start, end, crop mode, profil preview), dibatasi total
+ukuran byte dan dibuang berdasarkan LRU (waktu akses terakhir = mtime file).
+"""
+import hashlib
+import os
+import threading
+import uuid
+
+from cache_utils import source_fingerprint
+
+PREVIEW_DIR = os.environ.get("SHORTGEN_PREVIEW_DIR", "previews")
+MAX_CACHE_BYTES = int(os.environ.get("SHORTGEN_PREVIEW_CACHE_MB", "500")) * 1024 * 1024
+
+_evict_lock = threading.Lock()
+
+
+def preview_key(source, start, end, crop_mode=None, profile="default"):
+    """Kunci cache untuk satu preview."""
+    parts = [source_fingerprint(source), start, end, crop_mode or "", profile]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def cache_path(key):
+    return os.path.join(PREVIEW_DIR, key + ".mp4")
+
+
+def lookup(key):
+    """Path preview jika sudah ada di cache (dan menandainya baru dipakai), selain itu None."""
+    path = cache_path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def temp_path(key):
+    """Path sementara yang unik untuk merender preview sebelum dimasukkan ke cache."""
+    os.makedirs(PREVIEW_DIR, exist_ok=True)
+    return os.path.join(PREVIEW_DIR, f"{key}.{uuid.uuid4().hex}.tmp.mp4")
+
+
+def commit(key, rendered_path):
+    """Memindahkan hasil render ke cache secara atomik lalu menjalankan eviction."""
+    path = cache_path(key)
+    os.replace(rendered_path, path)
+    evict(keep=path)
+    return path
+
+
+def evict(max_bytes=None, keep=None):
+    """Menghapus preview yang paling lama tidak dipakai sampai total ukuran <= max_bytes."""
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    with _evict_lock:
+        entries = []
+        for name in os.listdir(PREVIEW_DIR):
+            if not name.endswith(".mp4") or name.endswith(".tmp.mp4"):
+                continue
+            path = os.path.join(PREVIEW_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
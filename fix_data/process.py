@@ -1,51 +1,125 @@
 import subprocess
 import os
-import streamlit as st
-from datetime import datetime, timedelta
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cache_utils import is_url_source, remove_paths
+
+import edl
+import encoders
+import ffmpeg_progress
+import filtergraph
+import http_cache
+import job_queue
+import keyframe_index
+import preview_cache
+import proxy
+import render_farm
+import reporter
+import sections
+import thumbnails
+import url_resolver
+
+# Jumlah maksimal proses ffmpeg yang berjalan bersamaan. libx264 sudah memakai
+# beberapa thread per proses, jadi default-nya seperempat jumlah core.
+# Bisa diubah lewat environment variable SHORTGEN_MAX_WORKERS.
+DEFAULT_MAX_WORKERS = int(os.environ.get("SHORTGEN_MAX_WORKERS", max(1, (os.cpu_count() or 1) // 4)))
+
+# Database antrean render farm (lihat render_farm). Jika diisi, semua scene dirender
+# oleh proses worker (di node mana pun), bukan oleh pool thread proses ini.
+FARM_DB = os.environ.get("SHORTGEN_FARM_DB")
+# Folder file sementara job (smart cut, frame background); untuk render farm harus di storage bersama
+SCRATCH_DIR = os.environ.get("SHORTGEN_SCRATCH_DIR") or None
+if SCRATCH_DIR:
+    SCRATCH_DIR = os.path.abspath(SCRATCH_DIR)
+    os.makedirs(SCRATCH_DIR, exist_ok=True)
+
+# Mode output tanpa crop: memakai smart cut (copy GOP, re-encode tepi saja)
+SMART_CUT_MODE = "Original (Smart Cut)"
+SMART_CUT_CODECS = ("h264",)
+
+# Nama profile H.264 dari ffprobe -> nama -profile:v libx264. Profile lain tidak
+# bisa ditiru x264, jadi scene-nya di-encode penuh
+X264_PROFILES = {
+    "constrained baseline": "baseline",
+    "baseline": "baseline",
+    "main": "main",
+    "high": "high",
+    "high 10": "high10",
+    "high 4:2:2": "high422",
+    "high 4:4:4 predictive": "high444",
+}
+
+# Path input/output render yang sedang berjalan di luar RENDER_QUEUE (render_scenes,
+# batch manual, preview), dihitung per pemakai; lihat active_paths
+_running_paths = Counter()
+_running_lock = threading.Lock()
+
+# Pesan error ffmpeg saat direct URL bertanda tangan sudah kedaluwarsa
+EXPIRED_URL_ERRORS = ("403 Forbidden", "410 Gone")
+
+# Parameter input agar ffmpeg otomatis reconnect saat membaca dari URL
+URL_INPUT_ARGS = [
+    "-reconnect", "1",
+    "-reconnect_at_eof", "1",
+    "-reconnect_streamed", "1",
+    "-reconnect_delay_max", "2",
+]
 
 def parse_timestamp(ts):
-    """Mengubah format timestamp HH:MM:SS:ms menjadi format FFmpeg HH:MM:SS.mmm."""
-    parts = ts.strip().split(":")
-    if len(parts) != 4:
-        raise ValueError("Format timestamp harus HH:MM:SS:ms (contoh: 00:01:23:456)")
-    hours, minutes, seconds, milliseconds = parts
-
-    if not (all(p.isdigit() for p in parts)):
-        raise ValueError("Semua bagian timestamp harus berupa angka.")
-
-    milliseconds = milliseconds.zfill(3) # Pastikan milidetik 3 digit
-    return f"{hours}:{minutes}:{seconds}.{milliseconds}"
+    """
+    Mengubah format timestamp HH:MM:SS:ms menjadi format FFmpeg HH:MM:SS.mmm.
+    Jam boleh >= 24 (VOD livestream panjang), lihat edl.parse_ms.
+    """
+    return edl.format_ffmpeg(edl.parse_ms(ts))
 
 def calc_duration(start, end):
     """Menghitung durasi dalam detik antara dua timestamp HH:MM:SS.mmm."""
-    fmt = "%H:%M:%S.%f"
     try:
-        start_dt = datetime.strptime(start, fmt)
-        end_dt = datetime.strptime(end, fmt)
-        duration = (end_dt - start_dt).total_seconds()
-        if duration <= 0:
+        duration_ms = edl.parse_ms(end) - edl.parse_ms(start)
+        if duration_ms <= 0:
             raise ValueError("Timestamp 'end' harus lebih besar dari 'start'")
-        return str(duration)
+        return str(duration_ms / edl.MS_PER_SECOND)
     except ValueError as e:
-        st.error(f"Error kalkulasi durasi: {e}. Pastikan format timestamp benar.")
+        reporter.error(f"Error kalkulasi durasi: {e}. Pastikan format timestamp benar.")
         raise
 
 def timestamp_to_seconds(ts):
     """Mengubah timestamp HH:MM:SS.mmm menjadi total detik."""
-    # Mengatasi format waktu tanpa tanggal
-    t = datetime.strptime(ts, "%H:%M:%S.%f").time()
-    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1_000_000
+    return edl.parse_ms(ts) / edl.MS_PER_SECOND
 
 def seconds_to_timestamp(seconds):
-    """Mengubah detik menjadi format timestamp HH:MM:SS.mmm."""
-    if seconds < 0:
-        seconds = 0
-    td = timedelta(seconds=seconds)
-    total_seconds = int(td.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, secs = divmod(remainder, 60)
-    milliseconds = td.microseconds // 1000
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+    """Mengubah detik menjadi format timestamp HH:MM:SS.mmm (milidetik dibulatkan ke bawah)."""
+    # 1e-6 menahan galat float (mis. 2.01 * 1000 = 2009.9999999999998)
+    return edl.format_ffmpeg(int(max(0.0, seconds) * edl.MS_PER_SECOND + 1e-6))
+
+def seconds_to_cut_timestamp(seconds):
+    """Mengubah detik menjadi format input scene HH:MM:SS:ms."""
+    return seconds_to_timestamp(seconds).replace(".", ":")
+
+def get_keyframe_index(source, is_url=False, build=False):
+    """Index keyframe source dari cache disk; dibangun dengan ffprobe jika build=True."""
+    return keyframe_index.get_index(source, URL_INPUT_ARGS if is_url else (), build=build)
+
+def snap_cuts_to_keyframes(cut_list, index):
+    """
+    Menggeser start/end setiap scene ke keyframe terdekat, sehingga potongan
+    bisa di-copy tanpa re-encode. Mengembalikan daftar scene baru.
+    """
+    snapped = []
+    for cut in cut_list:
+        start = timestamp_to_seconds(parse_timestamp(cut['start']))
+        end = timestamp_to_seconds(parse_timestamp(cut['end']))
+        new_start = index.snap(start)
+        new_end = index.snap(end)
+        if new_end <= new_start:
+            new_start, new_end = start, end
+        snapped.append({**cut, 'start': seconds_to_cut_timestamp(new_start), 'end': seconds_to_cut_timestamp(new_end)})
+    return snapped
 
 def parse_time_input(time_str):
     """Mengubah input waktu HH:MM:SS menjadi format timestamp HH:MM:SS.000."""
@@ -59,13 +133,633 @@ def parse_time_input(time_str):
     else:
         raise ValueError("Format waktu untuk Start/End Video B harus HH:MM:SS (contoh: 00:05:00)")
 
+def scene_filter_graph(crop_mode, bg_mode=None, src="0:v", out="out", tag="", facecam=None):
+    """
+    Menyusun filtergraph satu scene dari label input `src` ke label output `out`.
+    `tag` ditambahkan ke label internal agar beberapa scene bisa digabung dalam satu graph.
+    Mengembalikan None jika crop_mode tidak memerlukan filter.
+    Graph dibangun oleh filtergraph.py dari spesifikasi layout (crop sebelum scale, pad untuk warna).
+    `facecam` (x, y, w, h di frame 1920x1080) hanya dipakai mode Streamer.
+    """
+    return filtergraph.graph_for_mode(crop_mode, bg_mode, src=src, out=out, tag=tag, facecam=facecam)
+
+def crop_filter_args(crop_mode, bg_mode=None, facecam=None):
+    """Mengembalikan argumen filter ffmpeg (-filter_complex + -map) untuk crop_mode yang dipilih."""
+    vf_filter = scene_filter_graph(crop_mode, bg_mode, facecam=facecam)
+    if vf_filter is None:
+        return []
+
+    return [
+        "-filter_complex", vf_filter,
+        "-map", "[out]",
+        "-map", "0:a?"
+    ]
+
+def url_input(source, is_url=False):
+    """
+    Source untuk argumen -i. Direct URL hasil yt-dlp yang sudah lewat masa berlaku
+    diekstrak ulang dulu (lihat url_resolver), lalu dibaca lewat cache HTTP lokal
+    (lihat http_cache) jika aktif.
+    """
+    if not is_url:
+        return source
+    source = url_resolver.current(source)
+    if http_cache.ENABLED:
+        return http_cache.local_url(source)
+    return source
+
+def prefetch_url(video_url):
+    """Mengambil header container URL ke cache lokal di background (dipanggil setelah validasi)."""
+    if http_cache.ENABLED:
+        http_cache.prefetch_header(video_url)
+
+def has_audio_stream(source, is_url=False):
+    """Cek dengan ffprobe apakah source memiliki stream audio."""
+    cmd = ["ffprobe", "-v", "error"]
+    if is_url:
+        cmd += URL_INPUT_ARGS
+    cmd += ["-select_streams", "a", "-show_entries", "stream=index", "-of", "csv=p=0", url_input(source, is_url)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return result.returncode == 0 and result.stdout.strip() != ""
+
+def input_args(source, start, duration, is_url=False):
+    """Argumen input ffmpeg (seek + durasi + reconnect untuk URL) untuk satu source."""
+    args = URL_INPUT_ARGS[:] if is_url else []
+    return args + ["-ss", start, "-t", duration, "-i", url_input(source, is_url)]
+
+def refresh_expired_sources(cmd, log=""):
+    """
+    Jika input URL di `cmd` kedaluwarsa (server asli membalas 403/410), direct URL-nya
+    diekstrak ulang lewat url_resolver. URL mentah diganti langsung di `cmd`; URL yang
+    dibaca lewat http_cache cukup diperbarui di entry cache-nya (alamat lokal tetap).
+    Mengembalikan True jika ada source yang diperbarui.
+    """
+    log_expired = any(marker in log for marker in EXPIRED_URL_ERRORS)
+    refreshed = False
+    for i, arg in enumerate(cmd):
+        if not is_url_source(arg):
+            continue
+        entry = http_cache.entry_for(arg)
+        if entry is not None:
+            if entry.last_status not in (403, 410):
+                continue
+            new_url = url_resolver.refresh(entry.url)
+            if new_url:
+                http_cache.register(new_url)
+                refreshed = True
+        elif log_expired:
+            new_url = url_resolver.refresh(arg)
+            if new_url:
+                cmd[i] = new_url
+                refreshed = True
+    return refreshed
+
+@contextmanager
+def _rendering(paths):
+    """Mendaftarkan path ke active_paths selama blok with."""
+    paths = list(paths)
+    with _running_lock:
+        _running_paths.update(paths)
+    try:
+        yield
+    finally:
+        with _running_lock:
+            _running_paths.subtract(paths)
+            for path in paths:
+                if _running_paths[path] <= 0:
+                    del _running_paths[path]
+
+def run_ffmpeg(cmd, duration=None, on_progress=None, software=False):
+    """
+    Menjalankan satu perintah ffmpeg dengan laporan progres (lihat ffmpeg_progress).
+    Perintah ditulis untuk libx264 lalu diadaptasi ke backend encoder tercepat
+    (lihat encoders), kecuali software=True; jika sesi encoder/hwaccel GPU gagal
+    dibuka (encoders.is_hardware_failure), diulang otomatis dengan libx264. Error
+    lain dikembalikan apa adanya.
+    Jika direct URL kedaluwarsa di tengah jalan, URL diekstrak ulang lalu diulang sekali.
+    Hasilnya punya returncode dan stderr (hanya baris-baris terakhir).
+    Input dan output perintah masuk active_paths selama ffmpeg berjalan.
+    """
+    with _rendering([*job_queue.command_inputs(cmd), cmd[-1]]):
+        profile = encoders.SOFTWARE if software else encoders.select_profile(cmd)
+        result = ffmpeg_progress.run(encoders.adapt_command(cmd, profile), duration=duration, on_progress=on_progress)
+        if result.returncode != 0 and refresh_expired_sources(cmd, result.stderr):
+            result = ffmpeg_progress.run(encoders.adapt_command(cmd, profile), duration=duration, on_progress=on_progress)
+        if result.returncode != 0 and profile is not encoders.SOFTWARE and encoders.is_hardware_failure(result.stderr):
+            result = ffmpeg_progress.run(encoders.adapt_command(cmd, encoders.SOFTWARE), duration=duration, on_progress=on_progress)
+        return result
+
+def write_concat_list(list_file, parts):
+    """Menulis file list untuk concat demuxer ffmpeg."""
+    with open(list_file, "w", encoding="utf-8") as f:
+        for part in parts:
+            f.write(f"file '{part}'\n")
+
+def _render_job(job, on_progress=None):
+    """
+    Menjalankan satu job scene dan mengembalikan ringkasan hasilnya.
+    Job boleh punya 'pre_cmds' (dijalankan berurutan sebelum 'cmd'),
+    'cleanup' (file/folder sementara yang dihapus setelah selesai),
+    'duration' (detik, untuk menghitung persen/ETA di on_progress),
+    'software' (True: semua perintah wajib libx264, tanpa encoder hardware) dan
+    'concat_lists' ({path file list: [path part]}, ditulis sebelum pre_cmds).
+    job_queue.SCRATCH_TOKEN di path diganti folder sementara baru untuk setiap
+    pemanggilan, sehingga percobaan ulang (mis. lease render farm yang diambil alih)
+    tidak menimpa file percobaan yang masih berjalan.
+    """
+    software = job.get('software', False)
+    scratch_dir = None
+    if any(job_queue.SCRATCH_TOKEN in arg for cmd in [job['cmd'], *job.get('pre_cmds', [])] for arg in cmd):
+        scratch_dir = tempfile.mkdtemp(prefix="scene_", dir=SCRATCH_DIR)
+
+    def local(arg):
+        return arg.replace(job_queue.SCRATCH_TOKEN, scratch_dir) if scratch_dir else arg
+
+    try:
+        for list_file, parts in job.get('concat_lists', {}).items():
+            write_concat_list(local(list_file), [local(part) for part in parts])
+        for pre_cmd in job.get('pre_cmds', []):
+            result = run_ffmpeg([local(arg) for arg in pre_cmd], software=software)
+            if result.returncode != 0:
+                break
+        else:
+            result = run_ffmpeg([local(arg) for arg in job['cmd']], job.get('duration'), on_progress, software=software)
+    finally:
+        remove_paths(job.get('cleanup', []) + ([scratch_dir] if scratch_dir else []))
+
+    output = job['output']
+    ok = result.returncode == 0 and os.path.exists(output) and os.path.getsize(output) > 0
+    return {'scene': job['scene'], 'output': output, 'ok': ok, 'log': result.stderr}
+
+# Antrean render bersama untuk semua sesi (lihat job_queue), atau antrean render farm
+if FARM_DB:
+    RENDER_QUEUE = render_farm.FarmQueue(FARM_DB)
+else:
+    RENDER_QUEUE = job_queue.JobQueue(_render_job, max_workers=DEFAULT_MAX_WORKERS)
+
+def active_paths():
+    """
+    Path lokal yang dipakai job di RENDER_QUEUE yang belum selesai dan render lain
+    yang sedang berjalan (render_scenes, run_ffmpeg): file input/output dan folder
+    cache HTTP untuk input URL. Dipakai sebagai `keep` di workspace.enforce_quota.
+    """
+    with _running_lock:
+        running = list(_running_paths)
+    paths = set()
+    for path in [*RENDER_QUEUE.active_paths(), *running]:
+        if is_url_source(path):
+            entry = http_cache.entry_for(path)
+            paths.add(entry.dir if entry is not None else http_cache.cache_dir_for(path))
+        else:
+            paths.add(path)
+    return paths
+
+def render_scenes(jobs, max_workers=None, on_progress=None, poll_interval=None):
+    """
+    Merender daftar job scene secara paralel dengan jumlah worker terbatas.
+    Hasil di-yield sesuai urutan selesai, bukan urutan scene. Jika poll_interval
+    diisi, None di-yield setiap interval tanpa hasil baru agar pemanggil bisa
+    memperbarui UI. on_progress(scene, snapshot) dipanggil dari thread worker.
+    """
+    if not jobs:
+        return
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(jobs)))
+    # Scene yang masih menunggu giliran di pool juga dilindungi dari kuota disk
+    paths = [path for job in jobs for path in job_queue.scene_job_paths(job)]
+    with _rendering(paths), ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for job in jobs:
+            callback = None
+            if on_progress:
+                callback = (lambda scene: lambda snapshot: on_progress(scene, snapshot))(job['scene'])
+            pending.add(pool.submit(_render_job, job, callback))
+        while pending:
+            finished, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            if not finished:
+                yield None
+            for future in finished:
+                yield future.result()
+
+def _report_scene(result, success_msg):
+    """Melaporkan status satu scene ke reporter aktif."""
+    if result['ok']:
+        reporter.success(f"🎯 Scene {result['scene']} {success_msg}")
+    else:
+        reporter.error(f"❌ Gagal memproses scene {result['scene']}!")
+        reporter.error("Log ffmpeg:\n" + result['log'])
+
+def report_scene_results(jobs, max_workers=None, success_msg="berhasil dipotong!"):
+    """Merender job scene dan melaporkan status sukses/gagal per scene ke reporter aktif."""
+    results = []
+    if not jobs:
+        return results
+
+    progress = reporter.progress()
+    progress.update(0.0, f"Merender {len(jobs)} scene (maks. {max_workers or DEFAULT_MAX_WORKERS} paralel)...")
+
+    # Diisi dari thread worker, dibaca di sini (thread pemanggil) untuk update reporter
+    snapshots = {}
+    durations = {job['scene']: job.get('duration') or 0.0 for job in jobs}
+
+    def on_progress(scene, snapshot):
+        snapshots[scene] = snapshot
+
+    for result in render_scenes(jobs, max_workers, on_progress=on_progress, poll_interval=0.5):
+        if result is not None:
+            results.append(result)
+            snapshots[result['scene']] = ffmpeg_progress.make_snapshot({'progress': 'end'})
+            _report_scene(result, success_msg)
+
+        overall = ffmpeg_progress.aggregate(snapshots, durations)
+        running = [
+            f"Scene {scene}: {ffmpeg_progress.format_snapshot(snap)}"
+            for scene, snap in sorted(snapshots.items()) if not snap['done']
+        ]
+        eta = f" • ETA {overall['eta']:.0f}s" if overall['eta'] is not None else ""
+        progress.update(
+            min(1.0, overall['percent']),
+            f"{len(results)}/{len(jobs)} scene selesai{eta}" + ("\n" + "\n".join(running) if running else "")
+        )
+
+    progress.close()
+    return sorted(results, key=lambda r: r['scene'])
+
+def follow_queue_job(job_id, success_msg="berhasil dipotong!", poll_interval=1.0):
+    """Menunggu job di RENDER_QUEUE selesai sambil melaporkan progres dan hasil per scene."""
+    progress = reporter.progress()
+    reported = set()
+    try:
+        while True:
+            job = RENDER_QUEUE.status(job_id)
+            for result in job['results']:
+                if result['scene'] not in reported:
+                    reported.add(result['scene'])
+                    _report_scene(result, success_msg)
+            snapshots = dict(job['progress'])
+            for scene in reported:
+                snapshots[scene] = ffmpeg_progress.make_snapshot({'progress': 'end'})
+            overall = ffmpeg_progress.aggregate(snapshots, job['durations'])
+            eta = f" • ETA {overall['eta']:.0f}s" if overall['eta'] is not None else ""
+            # Tanpa worker aktif, FarmQueue.status menggagalkan job setelah NO_WORKER_TIMEOUT
+            idle = " • belum ada worker render farm aktif" if job.get('workers') == 0 else ""
+            progress.update(min(1.0, overall['percent']),
+                            f"{len(job['results'])}/{job['total']} scene selesai di render farm{eta}{idle}")
+            if job['finished'] is not None:
+                return job['results']
+            time.sleep(poll_interval)
+    finally:
+        progress.close()
+
+def dispatch_scene_jobs(jobs, max_workers=None, success_msg="berhasil dipotong!",
+                        background=False, label="", cleanup=()):
+    """
+    Render job scene langsung (dengan laporan per scene), atau jika background=True
+    kirim ke RENDER_QUEUE dan kembalikan ID job untuk dipantau.
+    """
+    if background and jobs:
+        job_id = RENDER_QUEUE.submit(jobs, label=label, cleanup=cleanup)
+        reporter.info(f"📨 {len(jobs)} scene dikirim ke antrean render (job {job_id})")
+        return job_id
+    if FARM_DB and jobs:
+        # Render farm: tetap lewat antrean bersama, pemanggil menunggu sampai selesai
+        return follow_queue_job(RENDER_QUEUE.submit(jobs, label=label, cleanup=cleanup), success_msg)
+    try:
+        return report_scene_results(jobs, max_workers, success_msg)
+    finally:
+        remove_paths(cleanup)
+
+def plan_manual_cut(video_source, cut_list, crop_mode, bg_mode=None, is_url=False, facecam=None, scene_offset=0,
+                    output_dir="output"):
+    """
+    Menyusun perintah ffmpeg untuk setiap scene tanpa menjalankannya.
+    Nomor scene (dan nama output) dimulai dari scene_offset + 1.
+    Melempar ValueError jika timestamp atau mode tidak valid.
+    """
+    filter_args = crop_filter_args(crop_mode, bg_mode, facecam)
+    stream_info = None
+    if crop_mode == SMART_CUT_MODE:
+        stream_info = probe_video_stream(video_source, is_url)
+    jobs = []
+
+    for idx, cut in enumerate(cut_list):
+        start = parse_timestamp(cut['start'])
+        end = parse_timestamp(cut['end'])
+        duration = calc_duration(start, end)
+
+        scene = scene_offset + idx + 1
+        output_file = os.path.join(output_dir, f"manual_cut_{scene:03d}.mp4")
+
+        if stream_info and stream_info.get('codec_name') in SMART_CUT_CODECS:
+            job = plan_smart_cut_scene(scene, video_source, start, end, output_file, stream_info, is_url)
+            if job:
+                jobs.append(job)
+                continue
+
+        ffmpeg_cmd = ["ffmpeg", "-y", "-hwaccel", "auto"]
+        ffmpeg_cmd += input_args(video_source, start, duration, is_url)
+        ffmpeg_cmd += filter_args
+        ffmpeg_cmd += [
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-b:v", "4M",
+            "-c:a", "aac", "-b:a", "192k",
+            output_file
+        ]
+        jobs.append({'scene': scene, 'cmd': ffmpeg_cmd, 'output': output_file, 'duration': float(duration)})
+
+    return jobs
+
+def probe_video_stream(source, is_url=False):
+    """
+    Mengambil info stream video pertama (codec, pix_fmt, ukuran, profile, level)
+    dan start_time container dengan ffprobe.
+    """
+    cmd = ["ffprobe", "-v", "error"]
+    if is_url:
+        cmd += URL_INPUT_ARGS
+    cmd += [
+        "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,pix_fmt,width,height,profile,level:format=start_time",
+        "-of", "default=noprint_wrappers=1", url_input(source, is_url)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    info = {}
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition("=")
+        if key:
+            info[key.strip()] = value.strip()
+    return info
+
+def stream_start_time(stream_info):
+    """start_time container (detik) dari hasil probe_video_stream, 0 jika tidak diketahui."""
+    try:
+        return float((stream_info or {}).get('start_time', 0))
+    except ValueError:
+        return 0.0
+
+def x264_match_args(stream_info):
+    """
+    Argumen libx264 agar hasil encode cocok dengan profile/level stream source,
+    atau None jika profile source tidak bisa ditiru x264.
+    """
+    profile = X264_PROFILES.get((stream_info.get('profile') or "").lower())
+    if profile is None:
+        return None
+    args = ["-profile:v", profile]
+    level = stream_info.get('level') or ""
+    if level.isdigit() and int(level) > 0:
+        args += ["-level", f"{int(level) / 10:.1f}"]
+    return args
+
+def probe_keyframes(source, start_seconds, end_seconds, is_url=False, start_time=0.0):
+    """
+    Mengembalikan daftar timestamp (detik) keyframe video di antara start dan end.
+    Hanya membaca paket (tanpa decode), dibatasi dengan -read_intervals.
+    pts paket bersifat absolut, sedangkan -ss relatif terhadap start_time container,
+    jadi start_time dikurangkan dari hasilnya (dan ditambahkan ke interval baca).
+    """
+    cmd = ["ffprobe", "-v", "error"]
+    if is_url:
+        cmd += URL_INPUT_ARGS
+    cmd += [
+        "-select_streams", "v:0",
+        "-read_intervals", f"{start_seconds + start_time:.3f}%{end_seconds + start_time:.3f}",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0", url_input(source, is_url)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return []
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            t = float(pts_time) - start_time
+            if start_seconds <= t <= end_seconds:
+                keyframes.append(t)
+    return sorted(keyframes)
+
+def plan_smart_cut_scene(scene, video_source, start, end, output_file, stream_info, is_url=False):
+    """
+    Smart cut: hanya GOP parsial di awal (start -> keyframe pertama) dan di akhir
+    (keyframe terakhir -> end) yang di-encode ulang, GOP di antaranya di-copy.
+    Ketiga bagian (MPEG-TS, SPS/PPS in-band) digabung dengan concat demuxer, lalu
+    audio di-encode sekali dari source. Bagian awal/akhir selalu di-encode dengan
+    libx264 (profile/level sama dengan source) agar bisa disambung dengan GOP hasil copy.
+    Mengembalikan None jika profile source tidak bisa ditiru x264 atau tidak ada dua
+    keyframe di dalam scene (scene terlalu pendek), sehingga pemanggil memakai encode biasa.
+    """
+    match_args = x264_match_args(stream_info)
+    if match_args is None:
+        return None
+    start_s = timestamp_to_seconds(start)
+    end_s = timestamp_to_seconds(end)
+    index = get_keyframe_index(video_source, is_url)
+    if index is not None:
+        keyframes = index.between(start_s, end_s)
+    else:
+        keyframes = probe_keyframes(video_source, start_s, end_s, is_url, stream_start_time(stream_info))
+    if len(keyframes) < 2:
+        return None
+    copy_start, copy_end = keyframes[0], keyframes[-1]
+
+    # Folder kerja dibuat oleh _render_job di setiap percobaan (lihat job_queue.SCRATCH_TOKEN)
+    work_dir = job_queue.SCRATCH_TOKEN
+    edge_encode = [
+        "-an", "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", *match_args,
+        "-pix_fmt", stream_info.get('pix_fmt') or "yuv420p",
+        "-f", "mpegts"
+    ]
+    parts = []
+    pre_cmds = []
+
+    # Bagian awal: dari start sampai keyframe pertama (seek akurat, re-encode)
+    if copy_start - start_s > 0.001:
+        head = os.path.join(work_dir, "head.ts")
+        pre_cmds.append(
+            ["ffmpeg", "-y"] + input_args(video_source, start, f"{copy_start - start_s:.6f}", is_url)
+            + edge_encode + [head]
+        )
+        parts.append(head)
+
+    # Bagian tengah: GOP utuh, cukup stream-copy
+    middle = os.path.join(work_dir, "middle.ts")
+    pre_cmds.append(
+        ["ffmpeg", "-y"] + input_args(video_source, f"{copy_start:.6f}", f"{copy_end - copy_start:.6f}", is_url)
+        + ["-an", "-c:v", "copy", "-f", "mpegts", middle]
+    )
+    parts.append(middle)
+
+    # Bagian akhir: dari keyframe terakhir sampai end (re-encode)
+    if end_s - copy_end > 0.001:
+        tail = os.path.join(work_dir, "tail.ts")
+        pre_cmds.append(
+            ["ffmpeg", "-y"] + input_args(video_source, f"{copy_end:.6f}", f"{end_s - copy_end:.6f}", is_url)
+            + edge_encode + [tail]
+        )
+        parts.append(tail)
+
+    list_file = os.path.join(work_dir, "parts.txt")
+    ffmpeg_cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file]
+    ffmpeg_cmd += input_args(video_source, start, f"{end_s - start_s:.6f}", is_url)
+    ffmpeg_cmd += [
+        "-map", "0:v", "-map", "1:a?",
+        "-c:v", "copy",
+        "-c:a", "aac", "-b:a", "192k",
+        "-movflags", "+faststart",
+        output_file
+    ]
+    return {
+        'scene': scene, 'cmd': ffmpeg_cmd, 'output': output_file, 'duration': end_s - start_s,
+        'pre_cmds': pre_cmds, 'concat_lists': {list_file: parts}, 'software': True,
+    }
+
+def plan_manual_cut_batch(video_source, cut_list, crop_mode, script_path, bg_mode=None, is_url=False, with_audio=True,
+                          facecam=None, output_dir="output"):
+    """
+    Menyusun SATU perintah ffmpeg yang men-decode source sekali lalu menulis semua scene.
+    Setiap scene diambil dengan trim/atrim dari cabang split. Mengembalikan
+    (ffmpeg_cmd, filter_script, outputs, durasi_total); filter_script harus ditulis pemanggil ke `script_path`.
+    """
+    scenes = []
+    for idx, cut in enumerate(cut_list):
+        start = timestamp_to_seconds(parse_timestamp(cut['start']))
+        end = timestamp_to_seconds(parse_timestamp(cut['end']))
+        if end <= start:
+            raise ValueError(f"Scene {idx+1}: timestamp 'end' harus lebih besar dari 'start'")
+        scenes.append((idx + 1, start, end))
+
+    if not scenes:
+        raise ValueError("Daftar scene kosong")
+
+    # Seek input ke scene paling awal dan berhenti setelah scene paling akhir
+    base = min(start for _, start, _ in scenes)
+    last = max(end for _, _, end in scenes)
+    n = len(scenes)
+
+    graph = ["[0:v]split=" + str(n) + "".join(f"[vs{i}]" for i, _, _ in scenes)]
+    if with_audio:
+        graph.append("[0:a]asplit=" + str(n) + "".join(f"[as{i}]" for i, _, _ in scenes))
+
+    for i, start, end in scenes:
+        trim = f"start={start - base:.3f}:end={end - base:.3f}"
+        graph.append(f"[vs{i}]trim={trim},setpts=PTS-STARTPTS[vt{i}]")
+        chain = scene_filter_graph(crop_mode, bg_mode, src=f"vt{i}", out=f"vo{i}", tag=f"_{i}", facecam=facecam)
+        graph.append(chain if chain is not None else f"[vt{i}]null[vo{i}]")
+        if with_audio:
+            graph.append(f"[as{i}]atrim={trim},asetpts=PTS-STARTPTS[ao{i}]")
+
+    ffmpeg_cmd = ["ffmpeg", "-y", "-hwaccel", "auto"]
+    if is_url:
+        ffmpeg_cmd += URL_INPUT_ARGS
+    ffmpeg_cmd += [
+        "-ss", seconds_to_timestamp(base),
+        "-t", f"{last - base:.3f}",
+        "-i", url_input(video_source, is_url),
+        "-filter_complex_script", script_path,
+    ]
+
+    outputs = []
+    for i, _, _ in scenes:
+        output_file = os.path.join(output_dir, f"manual_cut_{i:03d}.mp4")
+        ffmpeg_cmd += ["-map", f"[vo{i}]"]
+        if with_audio:
+            ffmpeg_cmd += ["-map", f"[ao{i}]"]
+        ffmpeg_cmd += [
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-b:v", "4M",
+            "-c:a", "aac", "-b:a", "192k",
+            output_file
+        ]
+        outputs.append((i, output_file))
+
+    return ffmpeg_cmd, ";\n".join(graph), outputs, last - base
+
+def manual_cut_batch(video_source, cut_list, crop_mode, bg_mode=None, is_url=False, facecam=None, output_dir="output"):
+    """
+    Mode batch: semua scene dari satu source dirender oleh satu proses ffmpeg,
+    sehingga source hanya dibuka, di-probe dan di-decode sekali.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Graph ditulis ke file agar daftar scene yang panjang tidak melebihi batas argv
+    fd, script_path = tempfile.mkstemp(suffix=".ffgraph")
+    os.close(fd)
+
+    progress = reporter.progress()
+    try:
+        try:
+            ffmpeg_cmd, filter_script, outputs, batch_span = plan_manual_cut_batch(
+                video_source, cut_list, crop_mode, script_path, bg_mode, is_url=is_url,
+                with_audio=has_audio_stream(video_source, is_url), facecam=facecam, output_dir=output_dir
+            )
+        except ValueError as e:
+            reporter.error(f"❌ Error parsing timestamp: {e}")
+            return []
+
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write(filter_script)
+
+        progress.update(0.0, f"Merender {len(outputs)} scene dalam satu proses ffmpeg...")
+
+        def on_progress(snapshot):
+            # Dipanggil di thread ini (pembaca stdout ffmpeg), aman untuk Streamlit
+            progress.update(snapshot['percent'] or 0.0,
+                            f"Merender {len(outputs)} scene: {ffmpeg_progress.format_snapshot(snapshot)}")
+
+        result = run_ffmpeg(ffmpeg_cmd, duration=batch_span, on_progress=on_progress)
+    finally:
+        os.remove(script_path)
+        progress.close()
+
+    results = []
+    for scene, output_file in outputs:
+        ok = result.returncode == 0 and os.path.exists(output_file) and os.path.getsize(output_file) > 0
+        scene_result = {'scene': scene, 'output': output_file, 'ok': ok, 'log': result.stderr}
+        _report_scene(scene_result, "berhasil dipotong (batch)!")
+        results.append(scene_result)
+    return results
+
+def plan_merge_scene(scene, video_a_source, start_a, duration_a, video_b_source, start_b, duration_b,
+                     output_file, is_url_a=False, is_url_b=False, video_bitrate="4M"):
+    """
+    Menyusun SATU perintah ffmpeg untuk satu scene merge: A dan B di-seek, di-scale
+    sekali, ditumpuk dengan vstack dan di-encode sekali. Hanya audio A yang dipakai,
+    sehingga audio B tidak pernah di-decode maupun di-encode.
+    """
+    vf_filter = (
+        "[0:v]scale=1080:960,setsar=1,settb=AVTB[up];"
+        "[1:v]scale=1080:960,setsar=1,settb=AVTB[down];"
+        "[up][down]vstack=inputs=2[out]"
+    )
+    ffmpeg_cmd = ["ffmpeg", "-y", "-hwaccel", "auto"]
+    ffmpeg_cmd += input_args(video_a_source, start_a, duration_a, is_url_a)
+    ffmpeg_cmd += input_args(video_b_source, start_b, duration_b, is_url_b)
+    ffmpeg_cmd += [
+        "-filter_complex", vf_filter,
+        "-map", "[out]",
+        "-map", "0:a?",
+        "-c:v", "libx264",
+        "-preset", "veryfast",
+        "-b:v", video_bitrate,
+        "-c:a", "aac", "-b:a", "192k",
+        output_file
+    ]
+    return {'scene': scene, 'cmd': ffmpeg_cmd, 'output': output_file,
+            'duration': max(float(duration_a), float(duration_b))}
+
 def manual_cut_merge_auto(video_a_source, cut_list_a, video_b_source, is_url_a=False, is_url_b=False, 
-                          video_b_start="00:00:00", video_b_end=None):
+                          video_b_start="00:00:00", video_b_end=None, max_workers=None, background=False,
+                          output_dir="output"):
     """
     (VERSI BARU) Mode otomatis untuk menggabungkan 2 video.
     Durasi klip Video B akan sama persis dengan durasi klip Video A.
+    Setiap scene dirender dalam satu proses ffmpeg (lihat plan_merge_scene).
     """
-    os.makedirs("output", exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
     
     try:
         # Konversi waktu start/end Video B ke detik untuk kalkulasi
@@ -75,14 +769,15 @@ def manual_cut_merge_auto(video_a_source, cut_list_a, video_b_source, is_url_a=F
         if video_b_end and video_b_end.strip() != "":
             b_end_seconds = timestamp_to_seconds(parse_time_input(video_b_end))
             if b_end_seconds <= b_start_seconds:
-                st.error("Waktu 'End' Video B harus lebih besar dari waktu 'Start'")
-                return
+                reporter.error("Waktu 'End' Video B harus lebih besar dari waktu 'Start'")
+                return []
             
     except Exception as e:
-        st.error(f"❌ Error parsing waktu Video B: {e}")
-        return
+        reporter.error(f"❌ Error parsing waktu Video B: {e}")
+        return []
 
     current_b_position = b_start_seconds
+    jobs = []
     
     for idx, cut_a in enumerate(cut_list_a):
         try:
@@ -100,233 +795,125 @@ def manual_cut_merge_auto(video_a_source, cut_list_a, video_b_source, is_url_a=F
                 remaining_duration = b_end_seconds - current_b_position
                 if remaining_duration > 1: # Batas minimal klip 1 detik
                     clip_duration_b = remaining_duration
-                    st.warning(f"⚠️ Scene {idx+1}: Durasi klip Video B dipotong menjadi {clip_duration_b:.2f} detik karena mencapai batas akhir.")
+                    reporter.warning(f"⚠️ Scene {idx+1}: Durasi klip Video B dipotong menjadi {clip_duration_b:.2f} detik karena mencapai batas akhir.")
                 else:
-                    st.error(f"❌ Scene {idx+1}: Video B sudah mencapai batas akhir yang ditentukan. Proses berhenti.")
+                    reporter.error(f"❌ Scene {idx+1}: Video B sudah mencapai batas akhir yang ditentukan. Proses berhenti.")
                     break # Hentikan loop jika video B sudah habis
             
             # Tentukan timestamp start dan durasi untuk Video B
             start_b_ts = seconds_to_timestamp(current_b_position)
             
-            st.info(f"🎬 Scene {idx+1}: Klip A ({cut_a['start']}) & B ({start_b_ts}) akan dipotong dengan durasi {duration_a_seconds:.2f} detik")
+            reporter.info(f"🎬 Scene {idx+1}: Klip A ({cut_a['start']}) & B ({start_b_ts}) akan dipotong dengan durasi {duration_a_seconds:.2f} detik")
             
         except Exception as e:
-            st.error(f"❌ Error kalkulasi timestamp untuk scene {idx+1}: {e}")
+            reporter.error(f"❌ Error kalkulasi timestamp untuk scene {idx+1}: {e}")
             continue
 
-        # Nama file sementara dan akhir
-        output_file_a = f"output/tmp_a_{idx+1:03d}.mp4"
-        output_file_b = f"output/tmp_b_{idx+1:03d}.mp4"
-        final_output = f"output/merged_auto_{idx+1:03d}.mp4"
-
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        # 1. Proses Potong Video A
-        status_text.text(f"Memproses Video A - Scene {idx+1}...")
-        cmd_a = ["ffmpeg", "-y", "-hwaccel", "auto", "-ss", start_a_ts, "-i", video_a_source, "-t", str(duration_a_seconds), "-vf", "scale=1080:960,setsar=1", "-c:v", "libx264", "-preset", "veryfast", "-b:v", "4M", "-c:a", "aac", "-b:a", "192k"]
-        if is_url_a: cmd_a.extend(["-reconnect", "1", "-reconnect_at_eof", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"])
-        cmd_a.append(output_file_a)
-        result_a = subprocess.run(cmd_a, capture_output=True, text=True, encoding='utf-8')
-        if not os.path.exists(output_file_a) or os.path.getsize(output_file_a) == 0:
-            st.error(f"❌ Gagal memproses Video A scene {idx+1}. Log: {result_a.stderr}")
-            status_text.empty(); progress_bar.empty()
-            continue
-        progress_bar.progress(0.3)
-
-        # 2. Proses Potong Video B
-        status_text.text(f"Memproses Video B - Scene {idx+1}...")
-        cmd_b = ["ffmpeg", "-y", "-hwaccel", "auto", "-ss", start_b_ts, "-i", video_b_source, "-t", str(clip_duration_b), "-vf", "scale=1080:960,setsar=1", "-an", "-c:v", "libx264", "-preset", "veryfast", "-b:v", "4M"]
-        if is_url_b: cmd_b.extend(["-reconnect", "1", "-reconnect_at_eof", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"])
-        cmd_b.append(output_file_b)
-        result_b = subprocess.run(cmd_b, capture_output=True, text=True, encoding='utf-8')
-        if not os.path.exists(output_file_b) or os.path.getsize(output_file_b) == 0:
-            st.error(f"❌ Gagal memproses Video B scene {idx+1}. Log: {result_b.stderr}")
-            if os.path.exists(output_file_a): os.remove(output_file_a)
-            status_text.empty(); progress_bar.empty()
-            continue
-        progress_bar.progress(0.6)
-
-        # 3. Gabungkan Video A dan B
-        status_text.text(f"Menggabungkan Video A & B - Scene {idx+1}...")
-        merge_cmd = ["ffmpeg", "-y", "-i", output_file_a, "-i", output_file_b, "-filter_complex", "[0:v]settb=AVTB[v0];[1:v]settb=AVTB[v1];[v0][v1]vstack=inputs=2[out]", "-map", "[out]", "-map", "0:a?", "-c:v", "libx264", "-preset", "veryfast", "-b:v", "6M", "-c:a", "copy", final_output]
-        result_merge = subprocess.run(merge_cmd, capture_output=True, text=True, encoding='utf-8')
-        progress_bar.progress(0.9)
-
-        if os.path.exists(output_file_a): os.remove(output_file_a)
-        if os.path.exists(output_file_b): os.remove(output_file_b)
-        progress_bar.progress(1.0)
-        
-        if os.path.exists(final_output) and os.path.getsize(final_output) > 0:
-            st.success(f"🎯 Scene {idx+1} berhasil digabung (Mode Otomatis)!")
-        else:
-            st.error(f"❌ Gagal menggabung scene {idx+1}! Log: {result_merge.stderr}")
-
-        progress_bar.empty()
-        status_text.empty()
+        jobs.append(plan_merge_scene(
+            idx + 1,
+            video_a_source, start_a_ts, str(duration_a_seconds),
+            video_b_source, start_b_ts, str(clip_duration_b),
+            os.path.join(output_dir, f"merged_auto_{idx+1:03d}.mp4"),
+            is_url_a=is_url_a, is_url_b=is_url_b, video_bitrate="6M"
+        ))
         
         # Update posisi untuk klip Video B berikutnya (tanpa jeda/gap)
         current_b_position += clip_duration_b
 
-# (Fungsi-fungsi lainnya tetap sama, saya sertakan kembali untuk kelengkapan)
-
-def manual_cut(video_path, cut_list, crop_mode, bg_mode=None):
-    """Fungsi original untuk memotong video dari file lokal."""
-    os.makedirs("output", exist_ok=True)
-    st.info(f"Memproses {len(cut_list)} scene dari file lokal: {os.path.basename(video_path)}")
+    return dispatch_scene_jobs(jobs, max_workers, success_msg="berhasil digabung (Mode Otomatis)!",
+                               background=background, label="Merge 2 Video (Otomatis)")
 
-    for idx, cut in enumerate(cut_list):
-        with st.spinner(f"Memproses Scene {idx+1}/{len(cut_list)}..."):
-            try:
-                start = parse_timestamp(cut['start'])
-                duration = calc_duration(start, parse_timestamp(cut['end']))
-            except Exception as e:
-                st.error(f"❌ Error parsing timestamp scene {idx+1}: {e}")
-                continue
-
-            output_file = f"output/manual_cut_{os.path.basename(video_path)}_{idx+1:03d}.mp4"
-            ffmpeg_cmd = ["ffmpeg", "-y", "-hwaccel", "auto", "-ss", start, "-i", video_path, "-t", duration]
-
-            # ... (implementasi filter lengkap Anda) ...
+def manual_cut_direct(video_url, cut_list, crop_mode, bg_mode=None, max_workers=None, background=False, facecam=None,
+                      output_dir="output"):
+    """
+    Memotong video langsung dari URL tanpa download penuh.
+    Scene dirender paralel, maksimal `max_workers` proses ffmpeg sekaligus.
+    """
+    os.makedirs(output_dir, exist_ok=True)
 
-            ffmpeg_cmd.append(output_file)
-            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, encoding='utf-8')
+    try:
+        jobs = plan_manual_cut(video_url, cut_list, crop_mode, bg_mode, is_url=True, facecam=facecam,
+                               output_dir=output_dir)
+    except ValueError as e:
+        reporter.error(f"❌ Error parsing timestamp: {e}")
+        return []
 
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                st.success(f"🎯 Scene {idx+1} berhasil dipotong!")
-            else:
-                st.error(f"❌ Gagal memotong scene {idx+1}! Log ffmpeg:\n" + result.stderr)
+    return dispatch_scene_jobs(jobs, max_workers, success_msg="berhasil dipotong dari URL!",
+                               background=background, label=crop_mode)
 
+def cut_seconds(cut_list):
+    """Daftar (start, end) dalam detik dari cut list (atau edl.EDL); ValueError jika timestamp tidak valid."""
+    cuts = cut_list if isinstance(cut_list, edl.EDL) else edl.EDL.from_cut_list(cut_list)
+    problems = cuts.validate()
+    if problems:
+        raise ValueError(problems[0][1])
+    return cuts.seconds()
 
-def manual_cut_direct(video_url, cut_list, crop_mode, bg_mode=None):
+def download_sections(page_url, cut_list, padding=sections.DEFAULT_PADDING):
     """
-    Memotong video langsung dari URL tanpa download penuh
+    Download hanya bagian scene (+ padding) dengan yt-dlp, bukan seluruh video.
+    Mengembalikan manifest klip (lihat sections) atau None jika gagal.
     """
-    os.makedirs("output", exist_ok=True)
+    try:
+        scenes = cut_seconds(cut_list)
+    except ValueError as e:
+        reporter.error(f"❌ Error parsing timestamp: {e}")
+        return None
 
-    for idx, cut in enumerate(cut_list):
-        try:
-            start = parse_timestamp(cut['start'])
-            end = parse_timestamp(cut['end'])
-            duration = calc_duration(start, end)
-        except Exception as e:
-            st.error(f"❌ Error parsing timestamp: {e}")
-            return
-
-        output_file = f"output/manual_cut_{idx+1:03d}.mp4"
-
-        # Base command untuk direct URL processing
-        ffmpeg_cmd = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-ss", start,
-            "-i", video_url,  # Langsung menggunakan URL
-            "-t", duration
-        ]
+    progress = reporter.progress()
 
-        if crop_mode == "Potrait (9:16 TikTok Mode)":
-            vf_filter = "crop=in_h*9/16:in_h:(in_w-in_h*9/16)/2:0,scale=1080:1920"
-            ffmpeg_cmd += ["-vf", vf_filter]
-
-        elif crop_mode == "Potrait Streamer (Berat)":
-            vf_filter = (
-                "[0:v]scale=1920:1080[scaled];"
-                "[scaled]crop=1920:900:0:0[gameplay];"
-                "[scaled]crop=150:250:20:ih-250[facecam];"
-                "[gameplay]scale=1080:1000[gameplay_scaled];"
-                "[facecam]scale=1080:920[facecam_scaled];"
-                "[gameplay_scaled][facecam_scaled]vstack=inputs=2[out]"
-            )
-            ffmpeg_cmd += [
-                "-filter_complex", vf_filter,
-                "-map", "[out]",
-                "-map", "0:a?"
-            ]
-
-        elif crop_mode == "Potrait Left-Right to Up-Bottom":
-            vf_filter = (
-                "[0:v]crop=iw/2:ih:0:0[left];"
-                "[0:v]crop=iw/2:ih:iw/2:0[right];"
-                "[left][right]vstack,scale=1080:1920[out]"
-            )
-            ffmpeg_cmd += [
-                "-filter_complex", vf_filter,
-                "-map", "[out]",
-                "-map", "0:a?"
-            ]
-
-        elif crop_mode == "Potrait (Landscape Blur, Hitam, Putih)":
-            if bg_mode == "Blur (Berat)":
-                vf_filter = (
-                    "[0:v]scale=1080:1920:force_original_aspect_ratio=increase,"
-                    "crop=1080:1920,boxblur=30:30[bg];"
-                    "[0:v]scale=1080:800[fg];"
-                    "[bg][fg]overlay=(W-w)/2:(H-h)/2[out]"
-                )
-            elif bg_mode == "Hitam":
-                vf_filter = (
-                    "color=c=black:s=1080x1920:d=999[bg];"
-                    "[0:v]scale=1080:800[fg];"
-                    "[bg][fg]overlay=(W-w)/2:(H-h)/2[out]"
-                )
-            elif bg_mode == "Putih":
-                vf_filter = (
-                    "color=c=white:s=1080x1920:d=999[bg];"
-                    "[0:v]scale=1080:800[fg];"
-                    "[bg][fg]overlay=(W-w)/2:(H-h)/2[out]"
-                )
-            else:
-                st.error("Mode background tidak dikenali!")
-                return
-
-            ffmpeg_cmd += [
-                "-filter_complex", vf_filter,
-                "-map", "[out]",
-                "-map", "0:a?"
-            ]
-
-        # Tambahkan encoding parameters
-        ffmpeg_cmd += [
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k",
-            "-reconnect", "1",  # Auto reconnect jika koneksi terputus
-            "-reconnect_at_eof", "1",  # Reconnect di end of file
-            "-reconnect_streamed", "1",  # Reconnect untuk streaming
-            "-reconnect_delay_max", "2",  # Max delay 2 detik
-            output_file
-        ]
+    def progress_hook(d):
+        # Dipanggil di thread ini oleh yt-dlp, aman untuk Streamlit
+        if d['status'] == 'downloading':
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            progress.update(min(d['downloaded_bytes'] / total, 1.0) if total else None,
+                            f"Download bagian scene: {d['downloaded_bytes'] / (1024*1024):.1f} MB")
 
-        # Progress bar untuk setiap scene
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        status_text.text(f"Memproses Scene {idx+1} dari URL...")
+    try:
+        return sections.download_sections(page_url, scenes, padding=padding, progress_hook=progress_hook)
+    except Exception as e:
+        reporter.error(f"❌ Gagal download bagian scene: {e}")
+        return None
+    finally:
+        progress.close()
 
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+def manual_cut_sections(manifest, cut_list, crop_mode, bg_mode=None, max_workers=None, background=False, facecam=None,
+                        output_dir="output"):
+    """
+    Memotong scene dari klip hasil download_sections. Setiap scene dirender dari
+    klip yang memuatnya, dengan timestamp digeser ke timeline klip.
+    """
+    os.makedirs(output_dir, exist_ok=True)
 
-        progress_bar.progress(1.0)
-        
-        if os.path.exists(output_file):
-            st.success(f"🎯 Scene {idx+1} berhasil dipotong dari URL!")
-            status_text.text(f"Scene {idx+1} selesai!")
-        else:
-            st.error(f"❌ Gagal memotong scene {idx+1} dari URL!")
-            st.error("Log ffmpeg:\n" + result.stderr)
-        
-        progress_bar.empty()
-        status_text.empty()
+    jobs = []
+    try:
+        for idx, (start, end) in enumerate(cut_seconds(cut_list)):
+            clip_path, clip_start = sections.locate(manifest, start, end)
+            local_cut = {
+                'start': seconds_to_cut_timestamp(clip_start),
+                'end': seconds_to_cut_timestamp(clip_start + (end - start)),
+            }
+            jobs += plan_manual_cut(clip_path, [local_cut], crop_mode, bg_mode, facecam=facecam, scene_offset=idx,
+                                    output_dir=output_dir)
+    except ValueError as e:
+        reporter.error(f"❌ Error parsing timestamp: {e}")
+        return []
+
+    return dispatch_scene_jobs(jobs, max_workers, success_msg="berhasil dipotong dari klip!",
+                               background=background, label=crop_mode)
 
-def manual_cut_merge_direct(video_a_source, cut_list_a, video_b_source, cut_list_b, is_url_a=False, is_url_b=False):
+def manual_cut_merge_direct(video_a_source, cut_list_a, video_b_source, cut_list_b, is_url_a=False, is_url_b=False,
+                            max_workers=None, background=False, output_dir="output"):
     """
     Merge 2 video dengan support direct URL dan file
     """
-    os.makedirs("output", exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
 
     if len(cut_list_a) != len(cut_list_b):
-        st.error("Jumlah scene di Video A dan Video B harus sama!")
-        return
+        reporter.error("Jumlah scene di Video A dan Video B harus sama!")
+        return []
 
+    jobs = []
     for idx, (cut_a, cut_b) in enumerate(zip(cut_list_a, cut_list_b)):
         try:
             start_a = parse_timestamp(cut_a['start'])
@@ -337,509 +924,283 @@ def manual_cut_merge_direct(video_a_source, cut_list_a, video_b_source, cut_list
             end_b = parse_timestamp(cut_b['end'])
             duration_b = calc_duration(start_b, end_b)
         except Exception as e:
-            st.error(f"❌ Error parsing timestamp: {e}")
-            return
-
-        output_file_a = f"output/tmp_a_{idx+1:03d}.mp4"
-        output_file_b = f"output/tmp_b_{idx+1:03d}.mp4"
-        final_output = f"output/merged_{idx+1:03d}.mp4"
-
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        # Process Video A
-        status_text.text(f"Memproses Video A - Scene {idx+1}...")
-        cmd_a = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-ss", start_a, "-i", video_a_source,
-            "-t", duration_a,
-            "-vf", "scale=1080:960",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k"
-        ]
-        
-        # Tambahkan parameter khusus URL untuk video A
-        if is_url_a:
-            cmd_a += ["-reconnect", "1", "-reconnect_at_eof", "1", "-reconnect_streamed", "1"]
-        
-        cmd_a.append(output_file_a)
-        result_a = subprocess.run(cmd_a, capture_output=True, text=True, encoding='utf-8')
-        if result_a.returncode != 0:
-            st.error(f"❌ Gagal memproses Video A scene {idx+1}. Log FFmpeg:")
-            st.code(result_a.stderr)
-            # Hentikan proses untuk scene ini jika gagal
-            continue 
-        progress_bar.progress(0.25)
-
-        # Process Video B
-        status_text.text(f"Memproses Video B - Scene {idx+1}...")
-        cmd_b = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-ss", start_b, "-i", video_b_source,
-            "-t", duration_b,
-            "-vf", "scale=1080:960",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k"
-        ]
-        
-        # Tambahkan parameter khusus URL untuk video B
-        if is_url_b:
-            cmd_b += ["-reconnect", "1", "-reconnect_at_eof", "1", "-reconnect_streamed", "1"]
-        
-        cmd_b.append(output_file_b)
-        result_b = subprocess.run(cmd_b, capture_output=True, text=True, encoding='utf-8')
-        if result_b.returncode != 0:
-            st.error(f"❌ Gagal memproses Video B scene {idx+1}. Log FFmpeg:")
-            st.code(result_b.stderr)
-            continue
-        progress_bar.progress(0.5)
-
-        # Merge videos
-        status_text.text(f"Menggabungkan Video A & B - Scene {idx+1}...")
-        merge_cmd = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-i", output_file_a,
-            "-i", output_file_b,
-            "-filter_complex",
-            "[0:v]scale=1080:960[up];[1:v]scale=1080:960[down];[up][down]vstack=inputs=2[out]",
-            "-map", "[out]",
-            "-map", "0:a?",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k",
-            final_output
-        ]
-        result_merge = subprocess.run(merge_cmd, capture_output=True, text=True, encoding='utf-8')
-        if result_merge.returncode != 0:
-            st.error(f"❌ Gagal menggabungkan video scene {idx+1}. Log FFmpeg:")
-            st.code(result_merge.stderr)
-            continue
-        progress_bar.progress(0.9)
+            reporter.error(f"❌ Error parsing timestamp: {e}")
+            return []
 
-        # Cleanup temp files
-        if os.path.exists(output_file_a):
-            os.remove(output_file_a)
-        if os.path.exists(output_file_b):
-            os.remove(output_file_b)
+        jobs.append(plan_merge_scene(
+            idx + 1,
+            video_a_source, start_a, duration_a,
+            video_b_source, start_b, duration_b,
+            os.path.join(output_dir, f"merged_{idx+1:03d}.mp4"),
+            is_url_a=is_url_a, is_url_b=is_url_b
+        ))
 
-        progress_bar.progress(1.0)
-        
-        if os.path.exists(final_output):
-            st.success(f"🎯 Scene {idx+1} berhasil merge!")
-        else:
-            st.error(f"❌ Gagal merge scene {idx+1}!")
+    return dispatch_scene_jobs(jobs, max_workers, success_msg="berhasil merge!",
+                               background=background, label="Merge 2 Video")
+
+def prepare_background(background_path):
+    """
+    Men-decode gambar background SEKALI per job menjadi satu frame rawvideo yuv420p.
+    Scene-scene berikutnya cukup membaca byte mentah tanpa decode PNG lagi.
+    Mengembalikan dict {'path', 'width', 'height'}; pemanggil wajib menghapus 'path'.
+    """
+    probe = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height", "-of", "csv=p=0:s=x", background_path],
+        capture_output=True, text=True
+    )
+    if probe.returncode != 0 or "x" not in probe.stdout:
+        raise RuntimeError(f"Tidak bisa membaca background {background_path}: {probe.stderr}")
+    width, height = (int(v) for v in probe.stdout.strip().split("x")[:2])
+
+    fd, raw_path = tempfile.mkstemp(suffix=".yuv", dir=SCRATCH_DIR)
+    os.close(fd)
+    result = run_ffmpeg([
+        "ffmpeg", "-y", "-i", background_path,
+        "-frames:v", "1", "-pix_fmt", "yuv420p", "-f", "rawvideo", raw_path
+    ])
+    if result.returncode != 0:
+        os.remove(raw_path)
+        raise RuntimeError(f"Gagal menyiapkan background: {result.stderr}")
 
-        progress_bar.empty()
-        status_text.empty()
+    return {'path': raw_path, 'width': width, 'height': height}
+
+def plan_overlay_scene(scene, background, video_source, start, duration, output_file, is_url=False):
+    """
+    Menyusun SATU perintah ffmpeg untuk overlay: source di-seek, di-scale, diberi eq
+    lalu ditempel ke background (hasil prepare_background) dalam satu kali encode.
+    """
+    vf_filter = (
+        "[1:v]scale=800:478,eq=brightness=-0.1:contrast=0.9[scaled];"
+        "[0:v][scaled]overlay=140:900,format=yuv420p[out]"
+    )
+    ffmpeg_cmd = [
+        "ffmpeg", "-y",
+        "-f", "rawvideo", "-pix_fmt", "yuv420p",
+        "-video_size", f"{background['width']}x{background['height']}",
+        "-i", background['path'],
+        "-hwaccel", "auto",
+    ]
+    ffmpeg_cmd += input_args(video_source, start, duration, is_url)
+    ffmpeg_cmd += [
+        "-filter_complex", vf_filter,
+        "-map", "[out]",
+        "-map", "1:a?",
+        "-c:v", "libx264", "-preset", "veryfast", "-b:v", "4M",
+        "-c:a", "aac", "-b:a", "192k",
+        output_file
+    ]
+    return {'scene': scene, 'cmd': ffmpeg_cmd, 'output': output_file, 'duration': float(duration)}
 
-def overlay_to_laptop_direct(background_path, video_url, cuts):
+def overlay_to_laptop_direct(background_path, video_url, cuts, is_url=True, max_workers=None, background=False,
+                             output_dir="output"):
     """
-    Overlay video dari URL ke background laptop
+    Overlay video dari URL ke background laptop.
+    Background di-decode sekali per job, setiap scene dirender dalam satu kali encode.
     """
-    os.makedirs("output", exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
 
+    scenes = []
     for idx, cut in enumerate(cuts):
         try:
             start = parse_timestamp(cut['start'])
             end = parse_timestamp(cut['end'])
             duration = calc_duration(start, end)
         except Exception as e:
-            st.error(f"❌ Error parsing timestamp: {e}")
-            return
+            reporter.error(f"❌ Error parsing timestamp: {e}")
+            return []
+        scenes.append((idx + 1, start, duration))
 
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        cut_file = f"output/tmp_cut_{idx+1:03d}.mp4"
-        
-        # Cut video dari URL
-        status_text.text(f"Memotong video dari URL - Scene {idx+1}...")
-        cut_cmd = [
-            "ffmpeg", "-y", "-hwaccel", "auto", "-ss", start, "-i", video_url, "-t", duration,
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k",
-            "-reconnect", "1",
-            "-reconnect_at_eof", "1",
-            "-reconnect_streamed", "1",
-            cut_file
-        ]
-        subprocess.run(cut_cmd, capture_output=True, text=True)
-        progress_bar.progress(0.5)
-
-        # Overlay ke background
-        status_text.text(f"Membuat overlay - Scene {idx+1}...")
-        overlay_file = f"output/overlay_{idx+1:03d}.mp4"
-        scale_filter = "[1:v]scale=800:478,eq=brightness=-0.1:contrast=0.9[scaled];"
-        overlay_filter = "[0:v][scaled]overlay=140:900"
-        vf_filter = scale_filter + overlay_filter
-
-        overlay_cmd = [
-            "ffmpeg", "-y", "-hwaccel", "auto", "-i", background_path, "-i", cut_file,
-            "-filter_complex", vf_filter,
-            "-c:v", "libx264", "-preset", "veryfast", "-b:v", "4M",
-            "-pix_fmt", "yuv420p", overlay_file
-        ]
-        result_overlay = subprocess.run(overlay_cmd, capture_output=True, text=True)
-        progress_bar.progress(1.0)
-        
-        if result_overlay.returncode == 0:
-            st.success(f"✅ Overlay scene {idx+1} berhasil!")
-        else:
-            st.error(f"❌ Gagal overlay scene {idx+1}!")
-            st.error(result_overlay.stderr)
+    try:
+        prepared_bg = prepare_background(background_path)
+    except RuntimeError as e:
+        reporter.error(f"❌ {e}")
+        return []
+
+    jobs = [
+        plan_overlay_scene(scene, prepared_bg, video_url, start, duration,
+                           os.path.join(output_dir, f"overlay_{scene:03d}.mp4"), is_url=is_url)
+        for scene, start, duration in scenes
+    ]
+    # Frame background mentah baru dihapus setelah semua scene selesai
+    return dispatch_scene_jobs(jobs, max_workers, success_msg="overlay berhasil!",
+                               background=background, label="Video Overlay", cleanup=[prepared_bg['path']])
+
+def start_proxy(video_source, is_url=False):
+    """Memulai pembuatan proxy 360p di background untuk source ini."""
+    return proxy.start_proxy_job(video_source, URL_INPUT_ARGS if is_url else ())
+
+def _thumbnail_source(video_source, is_url=False):
+    """Source untuk thumbnail: proxy lokal jika ada, selain itu source asli."""
+    proxy_file = proxy.get_proxy(video_source)
+    if proxy_file:
+        return proxy_file, ()
+    return url_input(video_source, is_url), (URL_INPUT_ARGS if is_url else ())
+
+def scene_boundary_frames(video_source, cut, is_url=False):
+    """
+    Frame pertama dan terakhir sebuah scene (path JPEG), tanpa merender preview.
+    Melempar ValueError untuk timestamp tidak valid, RuntimeError jika ffmpeg gagal.
+    """
+    start = timestamp_to_seconds(parse_timestamp(cut['start']))
+    end = timestamp_to_seconds(parse_timestamp(cut['end']))
+    source, extra_args = _thumbnail_source(video_source, is_url)
+    start_frame = thumbnails.frame_at(source, start, extra_args, cache_source=video_source)
+    # Frame terakhir yang masih masuk scene ada tepat sebelum 'end'
+    end_frame = thumbnails.frame_at(source, max(start, end - 0.001), extra_args, cache_source=video_source)
+    return start_frame, end_frame
+
+def source_filmstrip(video_source, is_url=False, interval=10):
+    """Filmstrip sprite sheet seluruh source (lihat thumbnails.filmstrip)."""
+    source, extra_args = _thumbnail_source(video_source, is_url)
+    return thumbnails.filmstrip(source, interval, extra_args, cache_source=video_source)
+
+def generate_preview_from_proxy(video_source, proxy_file, start, end, duration, crop_mode=None):
+    """
+    Preview dari proxy lokal: cukup seek + stream copy karena proxy ber-GOP pendek,
+    sehingga tidak ada akses ke source asli maupun transcode.
+    """
+    key = preview_cache.preview_key(video_source, start, end, crop_mode, profile="proxy-copy")
+    cached = preview_cache.lookup(key)
+    if cached:
+        return cached
+    preview_file = preview_cache.temp_path(key)
+
+    ffmpeg_cmd = ["ffmpeg", "-y"] + input_args(proxy_file, start, duration) + ["-c", "copy", preview_file]
+    result = run_ffmpeg(ffmpeg_cmd)
+    if result.returncode != 0 or not os.path.exists(preview_file):
+        reporter.error("Gagal membuat preview dari proxy.")
+        reporter.error("Log ffmpeg:\n" + result.stderr)
+        if os.path.exists(preview_file):
+            os.remove(preview_file)
+        return None
 
-        # Cleanup
-        if os.path.exists(cut_file):
-            os.remove(cut_file)
-            
-        progress_bar.empty()
-        status_text.empty()
+    return preview_cache.commit(key, preview_file)
 
-def generate_preview_from_url(video_url, cut):
+def generate_preview_from_url(video_url, cut, crop_mode=None):
     """
-    Membuat preview langsung dari URL tanpa download
+    Membuat preview langsung dari URL tanpa download.
+    Hasilnya di-cache (lihat preview_cache), klik preview yang sama langsung dikembalikan.
     """
-    os.makedirs("previews", exist_ok=True)
-    preview_file = "previews/preview_temp.mp4"
-
     try:
         start = parse_timestamp(cut['start'])
         end = parse_timestamp(cut['end'])
         duration = calc_duration(start, end)
     except Exception as e:
-        st.error(f"❌ Error pada timestamp untuk preview: {e}")
+        reporter.error(f"❌ Error pada timestamp untuk preview: {e}")
         return None
 
+    proxy_file = proxy.get_proxy(video_url)
+    if proxy_file:
+        return generate_preview_from_proxy(video_url, proxy_file, start, end, duration, crop_mode)
+
+    key = preview_cache.preview_key(video_url, start, end, crop_mode, profile="url-360p")
+    cached = preview_cache.lookup(key)
+    if cached:
+        return cached
+    preview_file = preview_cache.temp_path(key)
+
     # Buat preview dengan kualitas rendah untuk kecepatan
-    ffmpeg_cmd = [
-        "ffmpeg", "-y",
-        "-ss", start,
-        "-i", video_url,
-        "-t", duration,
+    ffmpeg_cmd = ["ffmpeg", "-y"]
+    ffmpeg_cmd += input_args(video_url, start, duration, is_url=True)
+    ffmpeg_cmd += [
         "-vf", "scale=640:360",  # Resolusi kecil untuk preview cepat
         "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
         "-c:a", "aac", "-b:a", "64k",
-        "-reconnect", "1",
-        "-reconnect_at_eof", "1",
-        "-reconnect_streamed", "1",
-        "-reconnect_delay_max", "2",
         preview_file
     ]
 
-    result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+    result = run_ffmpeg(ffmpeg_cmd)
 
-    if result.returncode != 0:
-        st.error("Gagal membuat preview dari URL.")
-        st.error("Log ffmpeg:\n" + result.stderr)
+    if result.returncode != 0 or not os.path.exists(preview_file):
+        reporter.error("Gagal membuat preview dari URL.")
+        reporter.error("Log ffmpeg:\n" + result.stderr)
+        if os.path.exists(preview_file):
+            os.remove(preview_file)
         return None
 
-    if os.path.exists(preview_file):
-        return preview_file
-    else:
-        return None
+    return preview_cache.commit(key, preview_file)
 
-# Fungsi-fungsi original tetap dipertahankan untuk backward compatibility
-def manual_cut(video_path, cut_list, crop_mode, bg_mode=None):
+def manual_cut(video_path, cut_list, crop_mode, bg_mode=None, max_workers=None, background=False, facecam=None,
+               output_dir="output"):
     """
-    Fungsi original untuk memotong video dari file lokal
+    Fungsi original untuk memotong video dari file lokal.
+    Scene dirender paralel, maksimal `max_workers` proses ffmpeg sekaligus.
     """
-    os.makedirs("output", exist_ok=True)
-
-    for idx, cut in enumerate(cut_list):
-        try:
-            start = parse_timestamp(cut['start'])
-            end = parse_timestamp(cut['end'])
-            duration = calc_duration(start, end)
-        except Exception as e:
-            st.error(f"❌ Error parsing timestamp: {e}")
-            return
-
-        output_file = f"output/manual_cut_{idx+1:03d}.mp4"
+    os.makedirs(output_dir, exist_ok=True)
 
-        ffmpeg_cmd = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-ss", start,
-            "-i", video_path,
-            "-t", duration
-        ]
-
-        if crop_mode == "Potrait (9:16 TikTok Mode)":
-            vf_filter = "crop=in_h*9/16:in_h:(in_w-in_h*9/16)/2:0,scale=1080:1920"
-            ffmpeg_cmd += ["-vf", vf_filter]
-
-        elif crop_mode == "Potrait Streamer (Berat)":
-            vf_filter = (
-                "[0:v]scale=1920:1080[scaled];"
-                "[scaled]crop=1920:900:0:0[gameplay];"
-                "[scaled]crop=150:250:20:ih-250[facecam];"
-                "[gameplay]scale=1080:1000[gameplay_scaled];"
-                "[facecam]scale=1080:920[facecam_scaled];"
-                "[gameplay_scaled][facecam_scaled]vstack=inputs=2[out]"
-            )
-            ffmpeg_cmd += [
-                "-filter_complex", vf_filter,
-                "-map", "[out]",
-                "-map", "0:a?"
-            ]
-
-        elif crop_mode == "Potrait Left-Right to Up-Bottom":
-            vf_filter = (
-                "[0:v]crop=iw/2:ih:0:0[left];"
-                "[0:v]crop=iw/2:ih:iw/2:0[right];"
-                "[left][right]vstack,scale=1080:1920[out]"
-            )
-            ffmpeg_cmd += [
-                "-filter_complex", vf_filter,
-                "-map", "[out]",
-                "-map", "0:a?"
-            ]
-
-        elif crop_mode == "Potrait (Landscape Blur, Hitam, Putih)":
-            if bg_mode == "Blur (Berat)":
-                vf_filter = (
-                    "[0:v]scale=1080:1920:force_original_aspect_ratio=increase,"
-                    "crop=1080:1920,boxblur=30:30[bg];"
-                    "[0:v]scale=1080:800[fg];"
-                    "[bg][fg]overlay=(W-w)/2:(H-h)/2[out]"
-                )
-            elif bg_mode == "Hitam":
-                vf_filter = (
-                    "color=c=black:s=1080x1920:d=999[bg];"
-                    "[0:v]scale=1080:800[fg];"
-                    "[bg][fg]overlay=(W-w)/2:(H-h)/2[out]"
-                )
-            elif bg_mode == "Putih":
-                vf_filter = (
-                    "color=c=white:s=1080x1920:d=999[bg];"
-                    "[0:v]scale=1080:800[fg];"
-                    "[bg][fg]overlay=(W-w)/2:(H-h)/2[out]"
-                )
-            else:
-                st.error("Mode background tidak dikenali!")
-                return
-
-            ffmpeg_cmd += [
-                "-filter_complex", vf_filter,
-                "-map", "[out]",
-                "-map", "0:a?"
-            ]
-
-        ffmpeg_cmd += [
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k",
-            output_file
-        ]
+    try:
+        jobs = plan_manual_cut(video_path, cut_list, crop_mode, bg_mode, facecam=facecam, output_dir=output_dir)
+    except ValueError as e:
+        reporter.error(f"❌ Error parsing timestamp: {e}")
+        return []
 
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+    return dispatch_scene_jobs(jobs, max_workers, background=background, label=crop_mode)
 
-        if os.path.exists(output_file):
-            st.success(f"🎯 Scene {idx+1} berhasil dipotong!")
-        else:
-            st.error(f"❌ Gagal memotong scene {idx+1}!")
-            st.error("Log ffmpeg:\n" + result.stderr)
-
-def manual_cut_merge(video_a_path, cut_list_a, video_b_path, cut_list_b):
+def manual_cut_merge(video_a_path, cut_list_a, video_b_path, cut_list_b, max_workers=None, background=False,
+                     output_dir="output"):
     """
     Fungsi original untuk merge 2 video lokal
     """
-    os.makedirs("output", exist_ok=True)
-
-    if len(cut_list_a) != len(cut_list_b):
-        st.error("Jumlah scene di Video A dan Video B harus sama!")
-        return
-
-    for idx, (cut_a, cut_b) in enumerate(zip(cut_list_a, cut_list_b)):
-        try:
-            start_a = parse_timestamp(cut_a['start'])
-            end_a = parse_timestamp(cut_a['end'])
-            duration_a = calc_duration(start_a, end_a)
-
-            start_b = parse_timestamp(cut_b['start'])
-            end_b = parse_timestamp(cut_b['end'])
-            duration_b = calc_duration(start_b, end_b)
-        except Exception as e:
-            st.error(f"❌ Error parsing timestamp: {e}")
-            return
-
-        output_file_a = f"output/tmp_a_{idx+1:03d}.mp4"
-        output_file_b = f"output/tmp_b_{idx+1:03d}.mp4"
-        final_output = f"output/merged_{idx+1:03d}.mp4"
-
-        cmd_a = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-ss", start_a, "-i", video_a_path,
-            "-t", duration_a,
-            "-vf", "scale=1080:960",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k",
-            output_file_a
-        ]
-        result_a = subprocess.run(cmd_a, capture_output=True, text=True, encoding='utf-8')
-        if result_a.returncode != 0:
-            st.error(f"❌ Gagal memproses Video A scene {idx+1}. Log FFmpeg:")
-            st.code(result_a.stderr)
-            # Hentikan proses untuk scene ini jika gagal
-            continue 
-
-        cmd_b = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-ss", start_b, "-i", video_b_path,
-            "-t", duration_b,
-            "-vf", "scale=1080:960",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k",
-            output_file_b
-        ]
-        result_b = subprocess.run(cmd_b, capture_output=True, text=True, encoding='utf-8')
-        if result_b.returncode != 0:
-            st.error(f"❌ Gagal memproses Video B scene {idx+1}. Log FFmpeg:")
-            st.code(result_b.stderr)
-            continue
-
-        merge_cmd = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-i", output_file_a,
-            "-i", output_file_b,
-            "-filter_complex",
-            "[0:v]scale=1080:960[up];[1:v]scale=1080:960[down];[up][down]vstack=inputs=2[out]",
-            "-map", "[out]",
-            "-map", "0:a?",
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k",
-            final_output
-        ]
-        result_merge = subprocess.run(merge_cmd, capture_output=True, text=True, encoding='utf-8')
-        if result_merge.returncode != 0:
-            st.error(f"❌ Gagal menggabungkan video scene {idx+1}. Log FFmpeg:")
-            st.code(result_merge.stderr)
-            continue
+    return manual_cut_merge_direct(video_a_path, cut_list_a, video_b_path, cut_list_b,
+                                   max_workers=max_workers, background=background, output_dir=output_dir)
 
-        if os.path.exists(output_file_a):
-            os.remove(output_file_a)
-        if os.path.exists(output_file_b):
-            os.remove(output_file_b)
-
-        if os.path.exists(final_output):
-            st.success(f"🎯 Scene {idx+1} berhasil merge!")
-        else:
-            st.error(f"❌ Gagal merge scene {idx+1}!")
-
-def overlay_to_laptop(background_path, video_path, cuts):
+def overlay_to_laptop(background_path, video_path, cuts, max_workers=None, background=False, output_dir="output"):
     """
     Fungsi original untuk overlay video lokal
     """
-    os.makedirs("output", exist_ok=True)
-
-    for idx, cut in enumerate(cuts):
-        try:
-            start = parse_timestamp(cut['start'])
-            end = parse_timestamp(cut['end'])
-            duration = calc_duration(start, end)
-        except Exception as e:
-            st.error(f"❌ Error parsing timestamp: {e}")
-            return
-
-        cut_file = f"output/tmp_cut_{idx+1:03d}.mp4"
-        cut_cmd = [
-            "ffmpeg", "-y", "-hwaccel", "auto", "-ss", start, "-i", video_path, "-t", duration,
-            "-c:v", "libx264",
-            "-preset", "veryfast",
-            "-b:v", "4M",
-            "-c:a", "aac", "-b:a", "192k", cut_file
-        ]
-        subprocess.run(cut_cmd, capture_output=True, text=True)
-
-        overlay_file = f"output/overlay_{idx+1:03d}.mp4"
-        scale_filter = "[1:v]scale=800:478,eq=brightness=-0.1:contrast=0.9[scaled];"
-        overlay_filter = "[0:v][scaled]overlay=140:900"
-        vf_filter = scale_filter + overlay_filter
-
-        overlay_cmd = [
-            "ffmpeg", "-y", "-hwaccel", "auto", "-i", background_path, "-i", cut_file,
-            "-filter_complex", vf_filter,
-            "-c:v", "libx264", "-preset", "veryfast", "-b:v", "4M",
-            "-pix_fmt", "yuv420p", overlay_file
-        ]
-        result_overlay = subprocess.run(overlay_cmd, capture_output=True, text=True)
-        if result_overlay.returncode == 0:
-            st.success(f"✅ Overlay scene {idx+1} berhasil!")
-        else:
-            st.error(f"❌ Gagal overlay scene {idx+1}!")
-            st.error(result_overlay.stderr)
+    return overlay_to_laptop_direct(background_path, video_path, cuts, is_url=False,
+                                    max_workers=max_workers, background=background, output_dir=output_dir)
 
-        if os.path.exists(cut_file):
-            os.remove(cut_file)
-
-def generate_preview(video_path, cut):
+def generate_preview(video_path, cut, crop_mode=None):
     """
-    Fungsi original untuk membuat preview dari file lokal
+    Fungsi original untuk membuat preview dari file lokal.
+    Hasilnya di-cache (lihat preview_cache), klik preview yang sama langsung dikembalikan.
     """
-    os.makedirs("previews", exist_ok=True)
-    preview_file = "previews/preview_temp.mp4"
-
     try:
         start = parse_timestamp(cut['start'])
         end = parse_timestamp(cut['end'])
         duration = calc_duration(start, end)
     except Exception as e:
-        st.error(f"❌ Error pada timestamp untuk preview: {e}")
+        reporter.error(f"❌ Error pada timestamp untuk preview: {e}")
         return None
 
-    ffmpeg_cmd = [
-        "ffmpeg", "-y",
-        "-hwaccel", "auto",
-        "-ss", start,
-        "-i", video_path,
-        "-t", duration,
+    proxy_file = proxy.get_proxy(video_path)
+    if proxy_file:
+        return generate_preview_from_proxy(video_path, proxy_file, start, end, duration, crop_mode)
+
+    key = preview_cache.preview_key(video_path, start, end, crop_mode, profile="local-copy")
+    cached = preview_cache.lookup(key)
+    if cached:
+        return cached
+    preview_file = preview_cache.temp_path(key)
+
+    ffmpeg_cmd = ["ffmpeg", "-y", "-hwaccel", "auto"]
+    ffmpeg_cmd += input_args(video_path, start, duration)
+    ffmpeg_cmd += [
         "-c:v", "copy",
         "-c:a", "copy",
         preview_file
     ]
 
-    result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+    result = run_ffmpeg(ffmpeg_cmd)
 
     if result.returncode != 0:
-        st.error("Gagal membuat preview. Mencoba ulang dengan re-encoding...")
-        ffmpeg_cmd_recode = [
-            "ffmpeg", "-y",
-            "-hwaccel", "auto",
-            "-ss", start,
-            "-i", video_path,
-            "-t", duration,
+        reporter.error("Gagal membuat preview. Mencoba ulang dengan re-encoding...")
+        ffmpeg_cmd_recode = ["ffmpeg", "-y", "-hwaccel", "auto"]
+        ffmpeg_cmd_recode += input_args(video_path, start, duration)
+        ffmpeg_cmd_recode += [
             "-c:v", "libx264", "-preset", "veryfast",
             "-c:a", "aac",
             preview_file
         ]
-        result_recode = subprocess.run(ffmpeg_cmd_recode, capture_output=True, text=True)
-        if result_recode.returncode == 0 and os.path.exists(preview_file):
-             return preview_file
-        else:
-             st.error("Gagal membuat preview bahkan dengan re-encoding.")
-             return None
+        result = run_ffmpeg(ffmpeg_cmd_recode)
+        if result.returncode != 0:
+            reporter.error("Gagal membuat preview bahkan dengan re-encoding.")
 
-    if os.path.exists(preview_file):
-        return preview_file
-    else:
-        return None
\ No newline at end of file
+    if result.returncode != 0 or not os.path.exists(preview_file):
+        if os.path.exists(preview_file):
+            os.remove(preview_file)
+        return None
+
+    return preview_cache.commit(key, preview_file)
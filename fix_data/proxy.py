@@ -0,0 +1,88 @@
+"""
+Proxy resolusi rendah (360p, GOP pendek) untuk editing interaktif.
+Proxy dibuat di background thread setelah source divalidasi/di-upload dan
+disimpan per source; preview memakai proxy lokal, render final tetap dari source asli.
+"""
+import os
+import threading
+import uuid
+
+import ffmpeg_progress
+
+from cache_utils import CACHE_DIR, source_fingerprint
+
+PROXY_DIR = os.path.join(CACHE_DIR, "proxies")
+# Keyframe setiap 0.25 detik agar seek + stream copy di proxy hampir presisi
+PROXY_KEYFRAME_INTERVAL = 0.25
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def proxy_path(source):
+    return os.path.join(PROXY_DIR, source_fingerprint(source) + ".mp4")
+
+
+def get_proxy(source):
+    """Path proxy jika sudah selesai dibuat, selain itu None."""
+    try:
+        path = proxy_path(source)
+    except OSError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def proxy_status(source):
+    """'ready', 'running', 'failed' atau None jika belum pernah dibuat."""
+    if get_proxy(source):
+        return "ready"
+    with _jobs_lock:
+        return _jobs.get(source)
+
+
+def build_proxy_cmd(source, output_file, input_args=()):
+    """Perintah ffmpeg untuk membuat proxy 360p dengan GOP pendek."""
+    return [
+        "ffmpeg", "-y", *input_args, "-i", source,
+        "-vf", "scale=-2:360",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "30",
+        "-force_key_frames", f"expr:gte(t,n_forced*{PROXY_KEYFRAME_INTERVAL})",
+        "-c:a", "aac", "-b:a", "64k",
+        "-movflags", "+faststart",
+        output_file
+    ]
+
+
+def _build_proxy(source, input_args):
+    status = "failed"
+    tmp_path = None
+    try:
+        final_path = proxy_path(source)
+        tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp.mp4"
+        os.makedirs(PROXY_DIR, exist_ok=True)
+        result = ffmpeg_progress.run(build_proxy_cmd(source, tmp_path, input_args))
+        if result.returncode == 0 and os.path.exists(tmp_path):
+            os.replace(tmp_path, final_path)
+            status = "ready"
+    finally:
+        # Status selalu diperbarui, juga saat ada exception (mis. source hilang,
+        # ffmpeg tidak ditemukan), agar source tidak tertahan di "running" selamanya
+        if status != "ready" and tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with _jobs_lock:
+            _jobs[source] = status
+
+
+def start_proxy_job(source, input_args=()):
+    """
+    Memulai pembuatan proxy di background thread (sekali per source).
+    Mengembalikan status saat ini.
+    """
+    if get_proxy(source):
+        return "ready"
+    with _jobs_lock:
+        if _jobs.get(source) == "running":
+            return "running"
+        _jobs[source] = "running"
+    threading.Thread(target=_build_proxy, args=(source, list(input_args)), daemon=True).start()
+    return "running"
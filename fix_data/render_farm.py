@@ -0,0 +1,508 @@
+"""
+Render farm: antrean scene bersama (SQLite) untuk banyak worker di banyak node.
+
+Aplikasi/CLI mengirim job scene ke database antrean (FarmQueue, antarmuka sama
+dengan job_queue.JobQueue sehingga bisa menggantikan process.RENDER_QUEUE), lalu
+sejumlah proses worker di node mana pun mengklaim scene satu per satu dengan
+lease. Worker memperbarui lease lewat heartbeat selama ffmpeg berjalan; scene
+yang lease-nya habis (worker mati/hang) otomatis dikembalikan ke antrean, sampai
+MAX_ATTEMPTS kali. Setiap proses worker juga mencatat dirinya di tabel workers;
+job yang menunggu lebih dari NO_WORKER_TIMEOUT detik tanpa satu pun worker aktif
+digagalkan oleh status(), agar pemanggil tidak menunggu selamanya.
+
+Syarat deployment:
+- File database (SHORTGEN_FARM_DB) dan folder output/upload/scratch berada di
+  storage bersama yang di-mount di path yang sama di semua node, dan filesystem-nya
+  mendukung file lock SQLite (hindari NFS tanpa lock; journal mode default DELETE).
+- Frame background overlay ditulis ke SHORTGEN_SCRATCH_DIR, yang juga harus ada
+  di storage bersama. File kerja smart cut dibuat per percobaan oleh worker yang
+  merendernya (lihat job_queue.SCRATCH_TOKEN), jadi scene yang diambil alih
+  setelah lease habis tidak berbagi file dengan percobaan yang masih berjalan.
+
+Perintah ffmpeg yang dikirim selalu memakai URL asli, bukan URL loopback
+http_cache milik node pengirim; setiap worker membaca URL itu lewat cache HTTP
+dan url_resolver-nya sendiri.
+
+Worker:
+    python fix_data/render_farm.py worker --db /shared/farm.db --concurrency 2
+    python fix_data/render_farm.py status --db /shared/farm.db
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import closing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_cache  # noqa: E402
+import job_queue  # noqa: E402
+import url_resolver  # noqa: E402
+from cache_utils import is_url_source, remove_paths  # noqa: E402
+
+LEASE_SECONDS = int(os.environ.get("SHORTGEN_FARM_LEASE", "60"))
+HEARTBEAT_INTERVAL = max(1, LEASE_SECONDS // 4)
+MAX_ATTEMPTS = int(os.environ.get("SHORTGEN_FARM_MAX_ATTEMPTS", "3"))
+# Job tanpa worker aktif selama ini (detik) digagalkan (lihat FarmQueue.status)
+NO_WORKER_TIMEOUT = int(os.environ.get("SHORTGEN_FARM_NO_WORKER_TIMEOUT", "300"))
+# Job yang sudah selesai lebih lama dari ini dibuang dari database
+FINISHED_JOB_TTL = 6 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    label TEXT,
+    created REAL,
+    finished REAL,
+    total INTEGER,
+    durations TEXT,
+    cleanup TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    scene TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    progress TEXT,
+    result TEXT,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    seen REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until);
+CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id);
+"""
+
+
+def _abspath(path):
+    return os.path.abspath(path) if path and not is_url_source(path) else path
+
+
+def portable_job(scene_job):
+    """
+    Salinan job scene yang bisa dijalankan di node lain: URL loopback http_cache
+    diganti URL aslinya dan path lokal (output, input, cleanup) dijadikan absolut.
+    Direct URL hasil yt-dlp disertai URL halamannya di 'page_urls' agar worker
+    bisa mengekstrak ulang jika kedaluwarsa.
+    """
+    output = _abspath(scene_job['output'])
+    page_urls = {}
+
+    def convert(cmd):
+        converted = []
+        for i, arg in enumerate(cmd):
+            if arg == scene_job['output']:
+                arg = output
+            elif i > 0 and cmd[i - 1] == "-i":
+                entry = http_cache.entry_for(arg) if is_url_source(arg) else None
+                if entry is not None:
+                    arg = entry.url
+                if is_url_source(arg):
+                    page_url = url_resolver.page_url_for(arg)
+                    if page_url:
+                        page_urls[arg] = page_url
+                elif job_queue.SCRATCH_TOKEN not in arg:
+                    arg = _abspath(arg)
+            converted.append(arg)
+        return converted
+
+    job = dict(scene_job)
+    job['output'] = output
+    job['cmd'] = convert(scene_job['cmd'])
+    job['pre_cmds'] = [convert(cmd) for cmd in scene_job.get('pre_cmds', [])]
+    job['cleanup'] = [_abspath(p) for p in scene_job.get('cleanup', [])]
+    job['page_urls'] = page_urls
+    return job
+
+
+class FarmQueue:
+    """
+    Antrean job render di database SQLite bersama.
+    submit()/status()/prune() sama dengan job_queue.JobQueue; claim()/heartbeat()/
+    complete() dipakai worker.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _transaction(self):
+        """Koneksi dengan BEGIN IMMEDIATE: lock tulis diambil di awal agar klaim tidak bentrok."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def submit(self, scene_jobs, label="", cleanup=()):
+        """Mengirim daftar scene sebagai satu job. Mengembalikan ID job."""
+        self.prune()
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        durations = [[j['scene'], j.get('duration') or 0.0] for j in scene_jobs]
+        tasks = [(job_id, json.dumps(j['scene']), json.dumps(portable_job(j)), now) for j in scene_jobs]
+        conn = self._transaction()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, label, created, finished, total, durations, cleanup) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, label, now, None if scene_jobs else now, len(scene_jobs), json.dumps(durations),
+                 json.dumps([_abspath(p) for p in cleanup]))
+            )
+            conn.executemany("INSERT INTO tasks (job_id, scene, payload, updated) VALUES (?, ?, ?, ?)", tasks)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if not scene_jobs:
+            remove_paths(cleanup)
+        return job_id
+
+    def _finish_jobs(self, conn, job_ids, now):
+        """Menandai job yang semua scene-nya selesai; mengembalikan daftar cleanup yang harus dihapus."""
+        cleanup = []
+        for job_id in set(job_ids):
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE job_id = ? AND status IN ('queued', 'running')", (job_id,)
+            ).fetchone()[0]
+            if pending:
+                continue
+            updated = conn.execute(
+                "UPDATE jobs SET finished = ? WHERE id = ? AND finished IS NULL", (now, job_id)
+            ).rowcount
+            if updated:
+                row = conn.execute("SELECT cleanup FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                cleanup += json.loads(row['cleanup'] or "[]")
+        return cleanup
+
+    def _reap(self, conn, now):
+        """Scene yang lease-nya habis dikembalikan ke antrean, atau gagal jika sudah MAX_ATTEMPTS kali."""
+        expired = conn.execute(
+            "SELECT id, job_id, scene, payload, attempts, worker FROM tasks WHERE status = 'running' AND lease_until < ?",
+            (now,)
+        ).fetchall()
+        failed_jobs = []
+        for row in expired:
+            if row['attempts'] < MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE tasks SET status = 'queued', worker = NULL, lease_until = NULL, progress = NULL, updated = ? "
+                    "WHERE id = ?", (now, row['id'])
+                )
+                continue
+            result = {
+                'scene': json.loads(row['scene']), 'output': json.loads(row['payload'])['output'], 'ok': False,
+                'log': f"Worker {row['worker']} berhenti merespons ({row['attempts']}x percobaan)",
+            }
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', result = ?, updated = ? WHERE id = ?",
+                (json.dumps(result), now, row['id'])
+            )
+            failed_jobs.append(row['job_id'])
+        return self._finish_jobs(conn, failed_jobs, now)
+
+    def claim(self, worker_id, lease=LEASE_SECONDS):
+        """Mengklaim satu scene yang antre. Mengembalikan (task_id, job scene) atau None."""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            cleanup = self._reap(conn, now)
+            row = conn.execute("SELECT id, payload FROM tasks WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE tasks SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                    "updated = ? WHERE id = ?", (worker_id, now + lease, now, row['id'])
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        remove_paths(cleanup)
+        return (row['id'], json.loads(row['payload'])) if row is not None else None
+
+    def heartbeat(self, task_id, worker_id, snapshot=None, lease=LEASE_SECONDS):
+        """Memperpanjang lease (dan menyimpan progres). False jika lease sudah diambil alih."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            updated = conn.execute(
+                "UPDATE tasks SET lease_until = ?, progress = COALESCE(?, progress), updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + lease, json.dumps(snapshot) if snapshot else None, now, task_id, worker_id)
+            ).rowcount
+        return updated == 1
+
+    def complete(self, task_id, worker_id, result):
+        """Mencatat hasil scene. False jika lease sudah hilang (hasil diabaikan)."""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            updated = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, progress = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                ('done' if result['ok'] else 'failed', json.dumps(result), now, task_id, worker_id)
+            ).rowcount
+            cleanup = []
+            if updated:
+                job_id = conn.execute("SELECT job_id FROM tasks WHERE id = ?", (task_id,)).fetchone()['job_id']
+                cleanup = self._finish_jobs(conn, [job_id], now)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        remove_paths(cleanup)
+        return updated == 1
+
+    def worker_seen(self, worker_id):
+        """Heartbeat proses worker (lihat run_worker)."""
+        with closing(self._connect()) as conn:
+            conn.execute("INSERT OR REPLACE INTO workers (id, seen) VALUES (?, ?)", (worker_id, time.time()))
+
+    def worker_stopped(self, worker_id):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def active_workers(self, max_age=LEASE_SECONDS):
+        """ID proses worker yang mengirim heartbeat dalam max_age detik terakhir."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id FROM workers WHERE seen >= ? ORDER BY id", (time.time() - max_age,))
+            return [r['id'] for r in rows]
+
+    def _stalled(self, conn, job_id, now):
+        """True jika job belum selesai dan tidak ada worker aktif selama NO_WORKER_TIMEOUT detik."""
+        job = conn.execute("SELECT created, finished FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None or job['finished'] is not None:
+            return False
+        last_seen = conn.execute("SELECT MAX(seen) FROM workers").fetchone()[0] or 0.0
+        return now - max(last_seen, job['created']) > NO_WORKER_TIMEOUT
+
+    def _settle(self, job_id):
+        """
+        Lease yang habis dikembalikan ke antrean walau tidak ada worker yang mengklaim,
+        dan scene yang masih antre digagalkan jika job macet tanpa worker (_stalled).
+        Transaksi tulis hanya dibuka jika memang ada yang perlu diubah.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            expired = conn.execute(
+                "SELECT 1 FROM tasks WHERE job_id = ? AND status = 'running' AND lease_until < ? LIMIT 1", (job_id, now)
+            ).fetchone()
+            if expired is None and not self._stalled(conn, job_id, now):
+                return
+        conn = self._transaction()
+        try:
+            cleanup = self._reap(conn, now)
+            if self._stalled(conn, job_id, now):
+                rows = conn.execute(
+                    "SELECT id, scene, payload FROM tasks WHERE job_id = ? AND status = 'queued'", (job_id,)
+                ).fetchall()
+                for row in rows:
+                    result = {
+                        'scene': json.loads(row['scene']), 'output': json.loads(row['payload'])['output'], 'ok': False,
+                        'log': f"Tidak ada worker render farm aktif selama {NO_WORKER_TIMEOUT} detik",
+                    }
+                    conn.execute(
+                        "UPDATE tasks SET status = 'failed', result = ?, updated = ? WHERE id = ?",
+                        (json.dumps(result), now, row['id'])
+                    )
+                cleanup += self._finish_jobs(conn, [job_id], now)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        remove_paths(cleanup)
+
+    def status(self, job_id):
+        """
+        Status job dengan bentuk yang sama seperti JobQueue.status (None jika ID tidak
+        dikenal), ditambah 'workers' (jumlah worker aktif). Lihat juga _settle.
+        """
+        self._settle(job_id)
+        with closing(self._connect()) as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            tasks = conn.execute("SELECT scene, status, progress, result FROM tasks WHERE job_id = ?", (job_id,)).fetchall()
+        results = [json.loads(t['result']) for t in tasks if t['status'] in ('done', 'failed') and t['result']]
+        progress = {json.loads(t['scene']): json.loads(t['progress'])
+                    for t in tasks if t['status'] == 'running' and t['progress']}
+        running = sum(1 for t in tasks if t['status'] == 'running')
+        if job['finished'] is not None:
+            state = 'done' if all(r['ok'] for r in results) else 'failed'
+        else:
+            state = 'running' if running or results else 'queued'
+        return {
+            'id': job['id'],
+            'label': job['label'],
+            'created': job['created'],
+            'finished': job['finished'],
+            'total': job['total'],
+            'running': running,
+            'results': sorted(results, key=job_queue.scene_sort_key),
+            'progress': progress,
+            'durations': {scene: duration for scene, duration in json.loads(job['durations'])},
+            'status': state,
+            'cleanup': json.loads(job['cleanup'] or "[]"),
+            'workers': len(self.active_workers()),
+        }
+
+    def active_paths(self):
+        """Input/output semua scene yang masih antre atau berjalan (lihat job_queue.scene_job_paths)."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT payload FROM tasks WHERE status IN ('queued', 'running')").fetchall()
+        return {path for row in rows for path in job_queue.scene_job_paths(json.loads(row['payload']))}
+
+    def prune(self, max_age=FINISHED_JOB_TTL):
+        """Membuang job yang sudah lama selesai."""
+        cutoff = time.time() - max_age
+        with closing(self._connect()) as conn:
+            old = [r['id'] for r in conn.execute("SELECT id FROM jobs WHERE finished IS NOT NULL AND finished < ?", (cutoff,))]
+            for job_id in old:
+                conn.execute("DELETE FROM tasks WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def counts(self):
+        """Jumlah scene per status, untuk pemantauan."""
+        with closing(self._connect()) as conn:
+            return {r['status']: r['n'] for r in conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status")}
+
+
+def render_task(job, on_progress=None):
+    """
+    Runner default worker: URL dibaca lewat cache HTTP node ini, hasil ditulis ke
+    file .tmp.mp4 dulu lalu dipindah ke path output agar worker lama yang lease-nya
+    sudah diambil alih tidak menimpa hasil worker baru di tengah jalan.
+    """
+    import process
+
+    for direct_url, page_url in job.get('page_urls', {}).items():
+        url_resolver.track(direct_url, page_url)
+
+    def localize(cmd):
+        return [process.url_input(arg, True) if i > 0 and cmd[i - 1] == "-i" and is_url_source(arg) else arg
+                for i, arg in enumerate(cmd)]
+
+    output = job['output']
+    tmp_output = f"{os.path.splitext(output)[0]}.{uuid.uuid4().hex[:8]}.tmp.mp4"
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    local_job = dict(job)
+    local_job['output'] = tmp_output
+    local_job['cmd'] = [tmp_output if arg == output else arg for arg in localize(job['cmd'])]
+    local_job['pre_cmds'] = [localize(cmd) for cmd in job.get('pre_cmds', [])]
+
+    result = process._render_job(local_job, on_progress)
+    if result['ok']:
+        os.replace(tmp_output, output)
+    elif os.path.exists(tmp_output):
+        os.remove(tmp_output)
+    result['output'] = output
+    return result
+
+
+def _work_one(queue, worker_id, runner, claimed, lease=LEASE_SECONDS):
+    task_id, job = claimed
+    interval = min(HEARTBEAT_INTERVAL, lease / 4)
+    latest = {}
+    lost = threading.Event()
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            if not queue.heartbeat(task_id, worker_id, latest.get('snapshot'), lease=lease):
+                lost.set()
+                return
+
+    def on_progress(snapshot):
+        latest['snapshot'] = snapshot
+
+    heartbeat_thread = threading.Thread(target=beat, daemon=True, name=f"heartbeat-{task_id}")
+    heartbeat_thread.start()
+    try:
+        result = runner(job, on_progress)
+    except Exception as e:
+        result = {'scene': job.get('scene'), 'output': job.get('output'), 'ok': False, 'log': str(e)}
+    finally:
+        stop.set()
+        heartbeat_thread.join()
+    if lost.is_set() or not queue.complete(task_id, worker_id, result):
+        print(f"{worker_id}: lease scene {job.get('scene')} sudah diambil alih, hasil diabaikan", file=sys.stderr)
+    return result
+
+
+def run_worker(queue, worker_id=None, runner=None, concurrency=1, poll_interval=1.0, stop_event=None, once=False,
+               lease=LEASE_SECONDS):
+    """
+    Menjalankan worker sampai stop_event diset (atau antrean kosong jika once=True).
+    Setiap slot concurrency mengklaim dan merender satu scene sekaligus; selama
+    berjalan, worker mengirim heartbeat ke tabel workers (lihat active_workers).
+    """
+    runner = runner or render_task
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    stop_event = stop_event or threading.Event()
+    slots_done = threading.Event()
+
+    def announce():
+        while True:
+            queue.worker_seen(worker_id)
+            if slots_done.wait(min(HEARTBEAT_INTERVAL, lease / 4)):
+                return
+
+    def slot(index):
+        slot_id = f"{worker_id}/{index}"
+        while not stop_event.is_set():
+            claimed = queue.claim(slot_id, lease=lease)
+            if claimed is None:
+                if once:
+                    return
+                stop_event.wait(poll_interval)
+                continue
+            _work_one(queue, slot_id, runner, claimed, lease=lease)
+
+    announcer = threading.Thread(target=announce, daemon=True, name="farm-worker-heartbeat")
+    announcer.start()
+    threads = [threading.Thread(target=slot, args=(i,), name=f"farm-worker-{i}") for i in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        # Scene yang sedang berjalan diselesaikan dulu; yang belum diklaim tetap di antrean
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        slots_done.set()
+        announcer.join()
+        queue.worker_stopped(worker_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["worker", "status"])
+    parser.add_argument("--db", default=os.environ.get("SHORTGEN_FARM_DB"), help="file database antrean bersama")
+    parser.add_argument("--concurrency", type=int, default=1, help="jumlah scene yang dirender paralel oleh worker ini")
+    parser.add_argument("--once", action="store_true", help="berhenti jika antrean kosong")
+    args = parser.parse_args(argv)
+    if not args.db:
+        parser.error("--db atau SHORTGEN_FARM_DB wajib diisi")
+
+    queue = FarmQueue(args.db)
+    if args.command == "status":
+        print(json.dumps({'tasks': queue.counts(), 'workers': queue.active_workers()}))
+        return
+    run_worker(queue, concurrency=args.concurrency, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
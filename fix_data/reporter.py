@@ -0,0 +1,170 @@
+"""
+Reporter: tujuan pesan dan progres dari fungsi-fungsi di process.
+
+Fungsi render tidak memanggil Streamlit langsung, melainkan reporter aktif
+(get_reporter), sehingga process bisa dijalankan di worker, cron, benchmark atau
+CLI tanpa runtime Streamlit. Adapter yang tersedia:
+
+    Reporter            mengabaikan semua event (headless, tanpa output)
+    ConsoleReporter     menulis ke stderr (default)
+    CollectingReporter  mencatat event sebagai dict, opsional diteruskan ke reporter lain
+    StreamlitReporter   st.error/st.info/st.progress (lihat streamlit_reporter)
+
+set_reporter() mengganti reporter default untuk seluruh proses; using() memakai
+reporter lain sementara untuk context saat ini saja (mis. per job di CLI).
+"""
+import contextlib
+import contextvars
+import sys
+import threading
+import time
+
+LEVELS = ("info", "success", "warning", "error")
+
+
+class Progress:
+    """Handle satu progress bar + teks status. update() boleh dipanggil berulang."""
+
+    def update(self, fraction=None, text=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class Reporter:
+    """Reporter dasar: semua event diabaikan."""
+
+    def message(self, level, text):
+        pass
+
+    def progress(self):
+        return Progress()
+
+    def info(self, text):
+        self.message("info", text)
+
+    def success(self, text):
+        self.message("success", text)
+
+    def warning(self, text):
+        self.message("warning", text)
+
+    def error(self, text):
+        self.message("error", text)
+
+
+class _ConsoleProgress(Progress):
+    def __init__(self, reporter):
+        self.reporter = reporter
+        self.last_text = None
+        self.last_write = 0.0
+
+    def update(self, fraction=None, text=None):
+        now = time.monotonic()
+        if text is None or text == self.last_text or now - self.last_write < self.reporter.progress_interval:
+            return
+        self.last_text, self.last_write = text, now
+        percent = f"[{fraction * 100:5.1f}%] " if fraction is not None else ""
+        self.reporter.write(percent + text.replace("\n", " | "))
+
+
+class ConsoleReporter(Reporter):
+    """Menulis pesan ke stream (default stderr); progres dibatasi satu baris per `progress_interval` detik."""
+
+    def __init__(self, stream=None, prefix="", progress_interval=2.0):
+        self.stream = stream
+        self.prefix = prefix
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+
+    def write(self, line):
+        stream = self.stream or sys.stderr
+        with self._lock:
+            stream.write(f"{self.prefix}{line}\n")
+            stream.flush()
+
+    def message(self, level, text):
+        self.write(f"{level.upper()}: {text}")
+
+    def progress(self):
+        return _ConsoleProgress(self)
+
+
+class _CollectingProgress(Progress):
+    def __init__(self, reporter, forward):
+        self.reporter = reporter
+        self.forward = forward
+
+    def update(self, fraction=None, text=None):
+        self.reporter.last_progress = {'fraction': fraction, 'text': text}
+        self.forward.update(fraction, text)
+
+    def close(self):
+        self.forward.close()
+
+
+class CollectingReporter(Reporter):
+    """Mencatat pesan di `events` ({'level', 'text', 'time'}) dan meneruskannya ke `forward` jika ada."""
+
+    def __init__(self, forward=None):
+        self.forward = forward or Reporter()
+        self.events = []
+        self.last_progress = None
+        self._lock = threading.Lock()
+
+    def message(self, level, text):
+        with self._lock:
+            self.events.append({'level': level, 'text': text, 'time': time.time()})
+        self.forward.message(level, text)
+
+    def progress(self):
+        return _CollectingProgress(self, self.forward.progress())
+
+    def errors(self):
+        return [e['text'] for e in self.events if e['level'] == "error"]
+
+
+_default = ConsoleReporter()
+_current = contextvars.ContextVar("reporter", default=None)
+
+
+def set_reporter(reporter):
+    """Mengganti reporter default proses; mengembalikan yang lama."""
+    global _default
+    previous, _default = _default, reporter
+    return previous
+
+
+def get_reporter():
+    return _current.get() or _default
+
+
+@contextlib.contextmanager
+def using(reporter):
+    """Memakai `reporter` di dalam blok with (hanya untuk context/thread saat ini)."""
+    token = _current.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current.reset(token)
+
+
+def info(text):
+    get_reporter().info(text)
+
+
+def success(text):
+    get_reporter().success(text)
+
+
+def warning(text):
+    get_reporter().warning(text)
+
+
+def error(text):
+    get_reporter().error(text)
+
+
+def progress():
+    return get_reporter().progress()
@@ -0,0 +1,115 @@
+"""
+Download sebagian video dengan yt-dlp (download_ranges): hanya rentang scene
+(+ padding) yang diambil, bukan seluruh video. Hasilnya satu klip lokal per
+rentang, dicatat di manifest beserta posisinya di timeline video asli, sehingga
+setiap scene bisa dirender dari klip yang memuatnya (lihat locate).
+
+Klip disimpan per video di cache/sections/<id>; rentang yang sudah pernah
+di-download dipakai ulang dan hanya rentang yang belum tercakup diambil.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from cache_utils import CACHE_DIR, atomic_write_text
+from url_resolver import YT_DLP_FORMAT, video_id
+
+SECTIONS_DIR = os.path.join(CACHE_DIR, "sections")
+# Padding di kiri-kanan setiap scene agar keyframe sebelum start ikut terambil
+DEFAULT_PADDING = 3.0
+DEFAULT_CONCURRENT_FRAGMENTS = int(os.environ.get("SHORTGEN_CONCURRENT_FRAGMENTS", "8"))
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def section_dir(url):
+    return os.path.join(SECTIONS_DIR, hashlib.sha1(video_id(url).encode("utf-8")).hexdigest())
+
+
+def plan_ranges(scenes, padding=DEFAULT_PADDING):
+    """
+    Rentang download (start, end) dalam detik dari daftar scene (start, end):
+    diberi padding lalu yang bertumpuk/berdekatan digabung.
+    """
+    padded = sorted((max(0.0, start - padding), end + padding) for start, end in scenes)
+    ranges = []
+    for start, end in padded:
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    return [tuple(r) for r in ranges]
+
+
+def load_manifest(url):
+    try:
+        with open(os.path.join(section_dir(url), "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'url': url, 'sections': []}
+    manifest['sections'] = [s for s in manifest['sections'] if os.path.exists(s['path'])]
+    return manifest
+
+
+def _covered(sections, start, end):
+    return any(s['start'] <= start and end <= s['end'] for s in sections)
+
+
+def locate(manifest, start, end):
+    """
+    Klip yang memuat scene [start, end) timeline asli.
+    Mengembalikan (path klip, start relatif terhadap klip); ValueError jika tidak ada.
+    """
+    for section in manifest['sections']:
+        if section['start'] <= start and end <= section['end']:
+            return section['path'], start - section['start']
+    raise ValueError(f"Scene {start:.3f}-{end:.3f} tidak ada di klip yang sudah di-download")
+
+
+def download_sections(url, scenes, padding=DEFAULT_PADDING, concurrent_fragments=None, progress_hook=None):
+    """
+    Download hanya rentang scene (detik, timeline asli) dari URL halaman dengan yt-dlp.
+    `progress_hook` adalah progress hook yt-dlp. Mengembalikan manifest
+    {'url', 'sections': [{'path', 'start', 'end'}]}. Error yt-dlp diteruskan ke pemanggil.
+    """
+    import yt_dlp
+    from yt_dlp.utils import download_range_func
+
+    out_dir = section_dir(url)
+    os.makedirs(out_dir, exist_ok=True)
+    with _locks_guard:
+        lock = _locks.setdefault(out_dir, threading.Lock())
+
+    with lock:
+        manifest = load_manifest(url)
+        wanted = [r for r in plan_ranges(scenes, padding) if not _covered(manifest['sections'], *r)]
+        if not wanted:
+            return manifest
+
+        ydl_opts = {
+            'format': YT_DLP_FORMAT,
+            'outtmpl': os.path.join(out_dir, '%(id)s.%(section_start)s-%(section_end)s.%(ext)s'),
+            'download_ranges': download_range_func(None, wanted),
+            'concurrent_fragment_downloads': concurrent_fragments or DEFAULT_CONCURRENT_FRAGMENTS,
+            'noplaylist': True,
+            'quiet': True,
+        }
+        if progress_hook:
+            ydl_opts['progress_hooks'] = [progress_hook]
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+
+        for download in info.get('requested_downloads') or []:
+            path = download.get('filepath')
+            if path and os.path.exists(path):
+                manifest['sections'].append({
+                    'path': path,
+                    'start': float(download.get('section_start') or 0.0),
+                    'end': float(download.get('section_end') or info.get('duration') or 0.0),
+                })
+        manifest['sections'].sort(key=lambda s: s['start'])
+        atomic_write_text(os.path.join(out_dir, "manifest.json"), json.dumps(manifest))
+        return manifest
@@ -0,0 +1,34 @@
+"""
+Adapter reporter untuk Streamlit: pesan menjadi st.info/st.success/st.warning/st.error,
+progres menjadi st.progress + teks status di placeholder st.empty.
+
+Satu instance cukup untuk semua sesi: fungsi st.* menulis ke sesi milik thread
+yang memanggilnya, jadi app.py cukup memanggil reporter.set_reporter sekali.
+"""
+import streamlit as st
+
+from reporter import Progress, Reporter
+
+
+class _StreamlitProgress(Progress):
+    def __init__(self):
+        self.bar = st.progress(0)
+        self.status = st.empty()
+
+    def update(self, fraction=None, text=None):
+        if fraction is not None:
+            self.bar.progress(min(1.0, max(0.0, fraction)))
+        if text is not None:
+            self.status.text(text)
+
+    def close(self):
+        self.bar.empty()
+        self.status.empty()
+
+
+class StreamlitReporter(Reporter):
+    def message(self, level, text):
+        getattr(st, level)(text)
+
+    def progress(self):
+        return _StreamlitProgress()
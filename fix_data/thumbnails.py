@@ -0,0 +1,95 @@
+"""
+Layanan thumbnail: frame tunggal di batas scene dan filmstrip sprite sheet
+untuk seluruh source. Semua hasil di-cache di disk per source.
+"""
+import glob
+import hashlib
+import math
+import os
+import shutil
+import subprocess
+import uuid
+
+from cache_utils import CACHE_DIR, source_fingerprint
+
+THUMB_DIR = os.path.join(CACHE_DIR, "thumbnails")
+
+
+def _run(cmd):
+    return subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
+
+
+def frame_at(source, seconds, input_args=(), width=320, cache_source=None):
+    """
+    Mengambil satu frame di `seconds` sebagai JPEG.
+    Seek input ffmpeg melompat ke keyframe lalu men-decode maju seperlunya.
+    `cache_source` dipakai untuk kunci cache jika frame diambil dari proxy.
+    """
+    seconds = max(0.0, seconds)
+    key = hashlib.sha1(
+        f"{source_fingerprint(cache_source or source)}|{seconds:.3f}|{width}".encode("utf-8")
+    ).hexdigest()
+    path = os.path.join(THUMB_DIR, "frames", key + ".jpg")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.jpg"
+    result = _run([
+        "ffmpeg", "-y", *input_args, "-ss", f"{seconds:.3f}", "-i", source,
+        "-frames:v", "1", "-vf", f"scale={width}:-2", "-q:v", "4", tmp_path
+    ])
+    if result.returncode != 0 or not os.path.exists(tmp_path):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise RuntimeError(f"Gagal mengambil frame di {seconds:.3f}s: {result.stderr[-500:]}")
+    os.replace(tmp_path, path)
+    return path
+
+
+def probe_duration(source, input_args=()):
+    """Durasi source dalam detik (0 jika tidak diketahui)."""
+    result = _run([
+        "ffprobe", "-v", "error", *input_args,
+        "-show_entries", "format=duration", "-of", "csv=p=0", source
+    ])
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return 0.0
+
+
+def filmstrip(source, interval=10, input_args=(), columns=10, rows=10, tile_width=160, cache_source=None):
+    """
+    Membuat sprite sheet filmstrip (satu frame setiap `interval` detik) dalam satu
+    kali decode. Satu sheet berisi columns x rows frame; source panjang menghasilkan
+    beberapa sheet. Hanya keyframe yang di-decode (-skip_frame nokey) agar cepat.
+    Mengembalikan dict {'sheets', 'interval', 'columns', 'rows', 'frames'}.
+    """
+    key = hashlib.sha1(
+        f"{source_fingerprint(cache_source or source)}|{interval}|{columns}x{rows}|{tile_width}".encode("utf-8")
+    ).hexdigest()
+    sheet_dir = os.path.join(THUMB_DIR, "filmstrip", key)
+
+    sheets = sorted(glob.glob(os.path.join(sheet_dir, "sheet_*.jpg")))
+    duration = probe_duration(source, input_args)
+    frames = math.ceil(duration / interval) if duration else None
+    if not sheets:
+        tmp_dir = f"{sheet_dir}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        result = _run([
+            "ffmpeg", "-y", "-skip_frame", "nokey", *input_args, "-i", source,
+            "-an", "-vf", f"fps=1/{interval},scale={tile_width}:-2,tile={columns}x{rows}",
+            "-q:v", "5", os.path.join(tmp_dir, "sheet_%03d.jpg")
+        ])
+        if result.returncode != 0:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise RuntimeError(f"Gagal membuat filmstrip: {result.stderr[-500:]}")
+        try:
+            os.replace(tmp_dir, sheet_dir)
+        except OSError:
+            # Proses lain sudah selesai lebih dulu, pakai hasilnya
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        sheets = sorted(glob.glob(os.path.join(sheet_dir, "sheet_*.jpg")))
+
+    return {'sheets': sheets, 'interval': interval, 'columns': columns, 'rows': rows, 'frames': frames}
@@ -0,0 +1,148 @@
+"""
+Penyimpanan upload berbasis konten.
+
+File upload ditulis per chunk ke file sementara sambil di-hash (SHA-256), lalu
+dipindah ke uploads/<hash><ext>. Jika konten yang sama sudah ada, file sementara
+dibuang dan path yang lama dipakai, sehingga upload ulang tidak disimpan dua kali
+dan cache yang dikunci per source (keyframe, proxy, preview) tetap berlaku.
+
+Sebelum menyalin, file yang bisa di-seek dicocokkan dulu dengan kunci murah
+(sample_key: ukuran + hash byte awal, tengah dan akhir); jika cocok dengan objek
+yang sudah ada, upload ulang langsung memakai path lama tanpa disalin dan di-hash
+penuh.
+
+uploads/index.json memetakan nama tampilan -> hash konten (nama yang sama dengan
+isi berbeda tidak lagi saling menimpa).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from cache_utils import atomic_write_text
+
+UPLOAD_DIR = os.environ.get("SHORTGEN_UPLOAD_DIR", "uploads")
+INDEX_FILE = "index.json"
+CHUNK_SIZE = 1024 * 1024
+# Jumlah byte per titik sampel (awal, tengah, akhir) untuk sample_key
+SAMPLE_SIZE = CHUNK_SIZE
+
+_lock = threading.Lock()
+
+
+def _index_path(upload_dir):
+    return os.path.join(upload_dir, INDEX_FILE)
+
+
+def load_index(upload_dir=UPLOAD_DIR):
+    """Index {'names': {nama: hash}, 'objects': {hash: {'path', 'size', 'sample', 'names', 'stored'}}}."""
+    try:
+        with open(_index_path(upload_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'names': {}, 'objects': {}}
+
+
+def lookup_name(display_name, upload_dir=UPLOAD_DIR):
+    """Path file untuk nama tampilan, None jika belum pernah di-upload atau filenya sudah hilang."""
+    index = load_index(upload_dir)
+    digest = index['names'].get(display_name)
+    record = index['objects'].get(digest) if digest else None
+    if record and os.path.exists(record['path']):
+        return record['path']
+    return None
+
+
+def sample_key(fileobj, size):
+    """
+    Kunci murah konten: SHA-256 dari ukuran + SAMPLE_SIZE byte di awal, tengah dan
+    akhir file. `fileobj` harus bisa di-seek; posisinya dikembalikan ke awal.
+    """
+    digest = hashlib.sha256(str(size).encode("ascii"))
+    for offset in sorted({0, max(0, (size - SAMPLE_SIZE) // 2), max(0, size - SAMPLE_SIZE)}):
+        fileobj.seek(offset)
+        digest.update(fileobj.read(SAMPLE_SIZE))
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _file_sample_key(path, size):
+    with open(path, "rb") as f:
+        return sample_key(f, size)
+
+
+def _find_by_sample(index, size, key):
+    """Hash konten objek tersimpan dengan ukuran dan sample_key yang sama, None jika tidak ada."""
+    for content_hash, record in index['objects'].items():
+        if record.get('size') != size or not os.path.exists(record['path']):
+            continue
+        if 'sample' not in record:
+            # Objek dari index lama: kunci dihitung dari file di disk (hanya beberapa MB dibaca)
+            record['sample'] = _file_sample_key(record['path'], size)
+        if record['sample'] == key:
+            return content_hash
+    return None
+
+
+def _add_name(index, content_hash, path, size, sample, display_name, upload_dir):
+    """Mencatat objek dan nama tampilannya di index lalu menyimpan index (lock sudah dipegang)."""
+    record = index['objects'].setdefault(content_hash, {'path': path, 'size': size, 'names': [], 'stored': time.time()})
+    record['path'] = path
+    record['sample'] = sample
+    if display_name not in record['names']:
+        record['names'].append(display_name)
+    index['names'][display_name] = content_hash
+    atomic_write_text(_index_path(upload_dir), json.dumps(index, indent=1))
+
+
+def store(fileobj, display_name, upload_dir=UPLOAD_DIR):
+    """
+    Menyimpan isi `fileobj` (punya read(n)) ke store.
+    Mengembalikan (path, sudah_ada): sudah_ada True jika konten identik sudah tersimpan.
+    File yang bisa di-seek dibaca dari awal dan dicocokkan dulu lewat sample_key.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    ext = os.path.splitext(display_name)[1].lower()
+
+    seekable = getattr(fileobj, "seekable", None)
+    if seekable is not None and seekable():
+        size = fileobj.seek(0, os.SEEK_END)
+        sample = sample_key(fileobj, size)
+        with _lock:
+            index = load_index(upload_dir)
+            content_hash = _find_by_sample(index, size, sample)
+            if content_hash is not None:
+                path = index['objects'][content_hash]['path']
+                _add_name(index, content_hash, path, size, sample, display_name, upload_dir)
+                return path, True
+
+    tmp_path = os.path.join(upload_dir, f".{uuid.uuid4().hex}.tmp")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    content_hash = digest.hexdigest()
+    path = os.path.join(upload_dir, content_hash + ext)
+    with _lock:
+        existed = os.path.exists(path) and os.path.getsize(path) == size
+        if existed:
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        _add_name(load_index(upload_dir), content_hash, path, size, _file_sample_key(path, size),
+                  display_name, upload_dir)
+    return path, existed
@@ -0,0 +1,226 @@
+"""
+Cache hasil ekstraksi yt-dlp (direct URL, judul, durasi, format, kedaluwarsa).
+
+Hasil disimpan per ID video kanonik (mis. "youtube:<id>") di memori dan di disk,
+dengan TTL dari parameter `expire` direct URL (URL googlevideo bertanda tangan).
+Validasi ulang URL yang sama tidak menjalankan yt-dlp lagi selama belum kedaluwarsa.
+
+Jika direct URL ternyata kedaluwarsa di tengah job (ffmpeg dapat 403/410),
+refresh() mengekstrak ulang dari URL halaman aslinya. Fungsi ekstraksi bisa
+diganti dengan set_extractor() (mis. stub untuk pengujian).
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from cache_utils import CACHE_DIR, atomic_write_text, canonical_url
+
+EXTRACT_DIR = os.path.join(CACHE_DIR, "extract")
+# TTL jika direct URL tidak punya parameter expire
+DEFAULT_TTL = int(os.environ.get("SHORTGEN_EXTRACT_TTL", "1800"))
+# Dianggap kedaluwarsa sedikit lebih awal agar job panjang tidak mulai dengan URL yang hampir mati
+EXPIRY_MARGIN = 300
+# Ekstraksi ulang untuk video yang sama paling sering sekali per interval ini
+MIN_REFRESH_INTERVAL = 30
+
+YT_DLP_FORMAT = 'best[ext=mp4][height<=1080]/best[height<=1080]/best'
+
+YOUTUBE_ID_PATTERN = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/)|youtu\.be/)([\w-]{11})'
+)
+
+_records = {}
+_by_direct = {}
+_lock = threading.Lock()
+_extract_locks = {}
+
+
+def yt_dlp_extract(url):
+    """Ekstraksi default dengan yt-dlp tanpa download, mengembalikan dict info yt-dlp."""
+    import yt_dlp
+
+    ydl_opts = {
+        'format': YT_DLP_FORMAT,
+        'noplaylist': True,
+        'quiet': True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+_extractor = yt_dlp_extract
+
+
+def set_extractor(extractor):
+    """Mengganti fungsi ekstraksi `extractor(url) -> info dict`; mengembalikan yang lama."""
+    global _extractor
+    previous, _extractor = _extractor, extractor
+    return previous
+
+
+def video_id(url):
+    """ID kanonik video: youtube:<id> untuk YouTube, selain itu URL kanonik."""
+    match = YOUTUBE_ID_PATTERN.search(url)
+    if match:
+        return "youtube:" + match.group(1)
+    return canonical_url(url)
+
+
+def url_expiry(direct_url, now=None):
+    """Waktu (epoch) direct URL dianggap kedaluwarsa: dari parameter expire, atau now + DEFAULT_TTL."""
+    now = time.time() if now is None else now
+    params = parse_qs(urlparse(direct_url).query)
+    expire = params.get("expire", [None])[0]
+    if expire is None:
+        # Beberapa URL googlevideo menaruh parameter di path: /expire/1700000000/...
+        match = re.search(r"/expire/(\d+)", urlparse(direct_url).path)
+        expire = match.group(1) if match else None
+    if expire and expire.isdigit():
+        return int(expire) - EXPIRY_MARGIN
+    return now + DEFAULT_TTL
+
+
+def _record_path(vid):
+    return os.path.join(EXTRACT_DIR, hashlib.sha1(vid.encode("utf-8")).hexdigest() + ".json")
+
+
+def _summarize_formats(formats):
+    keys = ("format_id", "ext", "width", "height", "fps", "vcodec", "acodec", "tbr", "protocol")
+    return [{k: f.get(k) for k in keys if f.get(k) is not None} for f in formats or []]
+
+
+def _load_record(vid):
+    try:
+        with open(_record_path(vid), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _remember(record):
+    with _lock:
+        _records[record['id']] = record
+        _by_direct[canonical_url(record['url'])] = record['id']
+
+
+def is_fresh(record, now=None):
+    now = time.time() if now is None else now
+    return record is not None and now < record['expires']
+
+
+def lookup(url):
+    """Hasil ekstraksi yang masih berlaku untuk URL halaman, selain itu None."""
+    vid = video_id(url)
+    with _lock:
+        record = _records.get(vid)
+    if record is None:
+        record = _load_record(vid)
+        if record is not None:
+            _remember(record)
+    return record if is_fresh(record) else None
+
+
+def _extract(page_url, vid):
+    info = _extractor(page_url)
+    direct_url = info.get('url')
+    if not direct_url:
+        raise ValueError("Tidak bisa mendapatkan direct video URL")
+    now = time.time()
+    record = {
+        'id': vid,
+        'page_url': page_url,
+        'url': direct_url,
+        'title': info.get('title', 'video'),
+        'duration': info.get('duration', 0),
+        'formats': _summarize_formats(info.get('formats')),
+        'extracted': now,
+        'expires': url_expiry(direct_url, now),
+    }
+    atomic_write_text(_record_path(vid), json.dumps(record))
+    _remember(record)
+    return record
+
+
+def _extract_lock(vid):
+    with _lock:
+        return _extract_locks.setdefault(vid, threading.Lock())
+
+
+def resolve(url, force=False):
+    """
+    Hasil ekstraksi untuk URL halaman (dari cache jika masih berlaku).
+    Error dari extractor (mis. yt_dlp.utils.DownloadError) diteruskan ke pemanggil.
+    """
+    vid = video_id(url)
+    with _extract_lock(vid):
+        record = None if force else lookup(url)
+        if record is None:
+            record = _extract(url, vid)
+        return record
+
+
+def current(direct_url):
+    """Direct URL terbaru untuk `direct_url`; diekstrak ulang dulu jika sudah lewat masa berlaku."""
+    with _lock:
+        record = _records.get(_by_direct.get(canonical_url(direct_url)))
+    if record is None:
+        return direct_url
+    if not is_fresh(record):
+        return refresh(record['url']) or direct_url
+    return record['url']
+
+
+def refresh(direct_url):
+    """
+    Mengekstrak ulang direct URL yang kedaluwarsa. Mengembalikan direct URL baru,
+    atau None jika URL bukan hasil ekstraksi atau ekstraksi ulang gagal.
+    Beberapa scene yang gagal bersamaan hanya memicu satu ekstraksi ulang.
+    """
+    with _lock:
+        vid = _by_direct.get(canonical_url(direct_url))
+    if vid is None:
+        return None
+    with _extract_lock(vid):
+        with _lock:
+            record = _records.get(vid)
+        if record['url'] != direct_url and time.time() - record['extracted'] < MIN_REFRESH_INTERVAL:
+            return record['url']
+        try:
+            return _extract(record['page_url'], vid)['url']
+        except Exception:
+            return None
+
+
+def page_url_for(direct_url):
+    """URL halaman asal sebuah direct URL hasil ekstraksi, None jika tidak dikenal."""
+    with _lock:
+        record = _records.get(_by_direct.get(canonical_url(direct_url)))
+    return record['page_url'] if record else None
+
+
+def track(direct_url, page_url):
+    """
+    Mencatat direct URL yang diekstrak di proses lain (mis. node render farm) agar
+    current()/refresh() di proses ini bisa mengekstrak ulang dari `page_url`.
+    """
+    vid = video_id(page_url)
+    with _lock:
+        if vid in _records:
+            # Sudah ada hasil ekstraksi (mungkin lebih baru) untuk video ini
+            _by_direct.setdefault(canonical_url(direct_url), vid)
+            return
+    # extracted=0: refresh pertama tidak ditahan MIN_REFRESH_INTERVAL
+    _remember({
+        'id': vid,
+        'page_url': page_url,
+        'url': direct_url,
+        'title': 'video',
+        'duration': 0,
+        'formats': [],
+        'extracted': 0,
+        'expires': url_expiry(direct_url),
+    })
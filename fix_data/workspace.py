@@ -0,0 +1,208 @@
+"""
+Workspace per sesi dan per job, dengan kuota disk bersama.
+
+Setiap sesi mendapat folder workspaces/<sesi>/ dan setiap render mendapat folder
+job sendiri di workspaces/<sesi>/output/<job>/, sehingga beberapa pengguna bisa
+merender paralel di satu mesin tanpa saling menimpa manual_cut_001.mp4 dan
+sejenisnya. Tidak ada lagi folder yang dikosongkan saat start: upload dan cache
+(proxy, preview, thumbnail, cache HTTP, klip section) tetap hangat antar sesi.
+
+Ruang disk dijaga oleh enforce_quota(): jika total ukuran (byte yang benar-benar
+teralokasi, jadi file sparse cache HTTP dihitung sesuai isinya) melebihi kuota,
+unit yang paling lama tidak dipakai dihapus lebih dulu. Waktu pakai terakhir =
+mtime terbaru di dalam unit, atau catatan mark_used() jika lebih baru: upload,
+proxy dan cache HTTP tidak berubah saat dibaca, dan mtime-nya tidak boleh
+disentuh karena ikut menentukan source_fingerprint. Unit yang baru saja dipakai
+(MIN_AGE) dan path di `keep` (mis. input/output job yang sedang dirender) tidak
+pernah dihapus.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+import http_cache
+from cache_utils import CACHE_DIR, atomic_write_text, remove_paths
+from preview_cache import PREVIEW_DIR
+from upload_store import INDEX_FILE, UPLOAD_DIR
+
+WORKSPACE_ROOT = os.environ.get("SHORTGEN_WORKSPACE_DIR", "workspaces")
+DISK_QUOTA_BYTES = int(os.environ.get("SHORTGEN_DISK_QUOTA_MB", "20000")) * 1024 * 1024
+# Unit yang diakses kurang dari MIN_AGE detik lalu dianggap sedang dipakai
+MIN_AGE = int(os.environ.get("SHORTGEN_WORKSPACE_MIN_AGE", "600"))
+
+# Folder cache yang setiap entri teratasnya adalah satu unit eviction
+CACHE_UNIT_DIRS = [
+    os.path.join(CACHE_DIR, "proxies"),
+    os.path.join(CACHE_DIR, "thumbnails", "frames"),
+    os.path.join(CACHE_DIR, "thumbnails", "filmstrip"),
+    http_cache.HTTP_CACHE_DIR,
+    os.path.join(CACHE_DIR, "sections"),
+]
+
+# Catatan waktu pakai terakhir {path absolut: epoch} dari mark_used
+LAST_USED_FILE = os.path.join(CACHE_DIR, "last_used.json")
+# Path yang sama paling sering dicatat ulang sekali per interval ini (detik)
+MARK_INTERVAL = 60
+
+_quota_lock = threading.Lock()
+_marked = {}
+
+
+def new_session_id():
+    """ID sesi acak; juga menjadi bagian URL file hasil, jadi harus sulit ditebak."""
+    return uuid.uuid4().hex
+
+
+def is_valid_session_id(session_id):
+    return bool(session_id) and len(session_id) == 32 and all(c in "0123456789abcdef" for c in session_id)
+
+
+def session_dir(session_id):
+    return os.path.join(WORKSPACE_ROOT, session_id)
+
+
+def session_output_dir(session_id):
+    """Folder berisi semua folder job hasil render milik sesi."""
+    return os.path.join(session_dir(session_id), "output")
+
+
+def job_output_dir(session_id):
+    """Membuat folder output baru yang unik untuk satu job render: <sesi>/output/<waktu>-<acak>."""
+    name = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    path = os.path.join(session_output_dir(session_id), name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def touch(path):
+    """Menandai workspace/file baru dipakai agar tidak dibuang lebih dulu."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _load_last_used():
+    try:
+        with open(LAST_USED_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def mark_used(paths):
+    """
+    Mencatat bahwa path (upload, proxy, folder cache HTTP, preview) sedang dipakai,
+    tanpa mengubah mtime-nya. Dipanggil berulang (mis. setiap rerun) cukup murah:
+    path yang sama hanya ditulis ulang sekali per MARK_INTERVAL.
+    """
+    now = time.time()
+    fresh = {}
+    for path in paths:
+        if path:
+            path = os.path.abspath(path)
+            if now - _marked.get(path, 0) >= MARK_INTERVAL:
+                fresh[path] = now
+    if not fresh:
+        return
+    with _quota_lock:
+        last_used = _load_last_used()
+        last_used.update(fresh)
+        # Path yang sudah dihapus tidak perlu dicatat lagi
+        last_used = {path: used for path, used in last_used.items() if os.path.exists(path)}
+        atomic_write_text(LAST_USED_FILE, json.dumps(last_used))
+        _marked.update(fresh)
+
+
+def _allocated(stat):
+    """Byte yang benar-benar dipakai di disk (file sparse hanya bagian yang terisi)."""
+    blocks = getattr(stat, "st_blocks", None)
+    return blocks * 512 if blocks is not None else stat.st_size
+
+
+def _usage(path):
+    """(total byte teralokasi, mtime terbaru) untuk file atau seluruh isi folder."""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return _allocated(stat), stat.st_mtime
+    size, latest = 0, os.stat(path).st_mtime
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            size += _allocated(stat)
+            latest = max(latest, stat.st_mtime)
+    return size, latest
+
+
+def _is_kept(path, keep):
+    """True jika path ada di keep atau berisi salah satu path di keep (mis. output di dalam folder job)."""
+    prefix = path + os.sep
+    return any(k == path or k.startswith(prefix) for k in keep)
+
+
+def _children(folder, skip=()):
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, name) for name in os.listdir(folder) if name not in skip]
+
+
+def eviction_units():
+    """Semua unit yang bisa dibuang: folder job, file upload, preview dan entri cache."""
+    units = []
+    for session in _children(WORKSPACE_ROOT):
+        units += _children(os.path.join(session, "output"))
+    units += [p for p in _children(UPLOAD_DIR, skip=(INDEX_FILE,)) if not p.endswith(".tmp")]
+    units += [p for p in _children(PREVIEW_DIR) if not p.endswith(".tmp.mp4")]
+    for folder in CACHE_UNIT_DIRS:
+        units += _children(folder)
+    return units
+
+
+def _remove_empty_sessions():
+    for session in _children(WORKSPACE_ROOT):
+        output = os.path.join(session, "output")
+        if os.path.isdir(output) and not os.listdir(output) and time.time() - os.stat(session).st_mtime > MIN_AGE:
+            remove_paths([session])
+
+
+def enforce_quota(max_bytes=None, keep=()):
+    """
+    Menghapus unit yang paling lama tidak dipakai sampai total ukuran <= max_bytes.
+    Unit yang berisi path di `keep` dan unit yang dipakai dalam MIN_AGE detik terakhir
+    (mtime atau mark_used) tidak dihapus. Mengembalikan daftar path yang dihapus.
+    """
+    max_bytes = DISK_QUOTA_BYTES if max_bytes is None else max_bytes
+    keep = {os.path.abspath(p) for p in keep}
+    removed = []
+    with _quota_lock:
+        last_used = _load_last_used()
+        entries = []
+        for path in eviction_units():
+            try:
+                size, latest = _usage(path)
+            except OSError:
+                continue
+            latest = max(latest, last_used.get(os.path.abspath(path), 0))
+            entries.append((latest, size, path))
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for latest, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if _is_kept(os.path.abspath(path), keep) or now - latest < MIN_AGE:
+                continue
+            if os.path.dirname(path) == http_cache.HTTP_CACHE_DIR:
+                # Lewat http_cache agar entry di memori ikut dibuang (dan yang sedang dibaca dilewati)
+                if not http_cache.discard(os.path.basename(path)):
+                    continue
+            else:
+                remove_paths([path])
+            removed.append(path)
+            total -= size
+        _remove_empty_sessions()
+    return removed